@@ -0,0 +1,127 @@
+"""目录批量导入"""
+import glob
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
+from data_processing.excel_processor import ExcelProcessor
+from data_processing.import_validator import ImportValidator
+from utils.config import Config
+
+
+def parse_workbook(file_path: str) -> Dict:
+    """解析单个工作簿为评估记录（在工作进程中执行，不访问数据库）"""
+    evaluation_type = None
+    validator = None
+    records = []
+    row_count = 0
+
+    for df in ExcelProcessor.iter_frames(file_path):
+        if evaluation_type is None:
+            evaluation_type = ExcelProcessor.detect_evaluation_type(df.columns)
+            if evaluation_type is None:
+                break
+            if Config.VALIDATE_IMPORTS:
+                validator = ImportValidator(file_path, evaluation_type)
+        row_count += len(df)
+        if validator is not None:
+            df = validator.validate(df)
+        records.extend(ExcelProcessor.build_evaluation_records(df, evaluation_type))
+
+    if validator is not None:
+        validator.summary()
+
+    return {
+        'file_path': file_path,
+        'evaluation_type': evaluation_type,
+        'records': records,
+        'row_count': row_count
+    }
+
+
+class DirectoryImporter:
+    """多进程解析目录下的全部评估工作簿，由主进程统一写库"""
+
+    def __init__(self, excel_processor: ExcelProcessor):
+        self.excel_processor = excel_processor
+
+    def discover_workbooks(self, data_dir: str) -> List[str]:
+        """查找目录下匹配的工作簿（忽略 Excel 临时文件）"""
+        pattern = os.path.join(data_dir, Config.DIRECTORY_IMPORT_PATTERN)
+        return sorted(
+            os.path.abspath(path) for path in glob.glob(pattern, recursive=True)
+            if not os.path.basename(path).startswith('~$')
+        )
+
+    def import_directory(self, data_dir: str, max_workers: Optional[int] = None) -> int:
+        """导入目录下的全部评估工作簿，返回写入（新增+更新）条数"""
+        print(f"\n=== 目录导入: {data_dir} ===")
+
+        files = self.discover_workbooks(data_dir)
+        print(f"发现 {len(files)} 个工作簿")
+
+        # 增量模式下先按文件指纹过滤未变化的文件
+        fingerprints = {}
+        for source_file in files:
+            fingerprint = None
+            if Config.INCREMENTAL_IMPORT:
+                fingerprint = self.excel_processor.changed_file_fingerprint(source_file)
+                if fingerprint is None:
+                    print(f"  文件未变化，跳过: {source_file}")
+                    continue
+            fingerprints[source_file] = fingerprint
+
+        if not fingerprints:
+            print("没有需要导入的工作簿")
+            return 0
+
+        workers = max_workers or Config.IMPORT_WORKERS or os.cpu_count() or 1
+        workers = min(workers, len(fingerprints))
+        print(f"使用 {workers} 个进程解析 {len(fingerprints)} 个工作簿")
+
+        written = 0
+        for source_file, result in self._parse_all(list(fingerprints), workers):
+            if result is None:
+                continue
+            fingerprint = fingerprints[source_file]
+            if result['evaluation_type'] is None:
+                print(f"  跳过无法识别问卷类型的文件: {source_file}")
+                if fingerprint is not None:
+                    # 登记指纹（问卷类型为空），文件未变化时下次不再计算哈希和解析
+                    self.excel_processor.db_manager.record_imported_file(source_file, None, fingerprint, 0)
+                continue
+
+            print(f"  写入: {source_file}")
+            counts = Counter(self.excel_processor.store_records(
+                result['records'], source_file, fingerprint, Counter()
+            ))
+            written += self.excel_processor.finish_file(
+                source_file, result['evaluation_type'], fingerprint, result['row_count'], counts
+            )
+
+        print(f"目录导入完成: 共写入 {written} 条评估记录")
+        return written
+
+    def _parse_all(self, files: List[str], workers: int) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """解析全部工作簿，按完成顺序产出（文件路径，解析结果）；解析失败时结果为 None"""
+        if workers <= 1:
+            for source_file in files:
+                try:
+                    yield source_file, parse_workbook(source_file)
+                except Exception as e:
+                    print(f"  解析工作簿失败: {source_file} - {str(e)}")
+                    yield source_file, None
+            return
+
+        # 以 spawn 启动工作进程：父进程中已有写线程和 SQLite 连接，fork 会把它们的锁状态复制到子进程；
+        # 工作进程只执行模块级的 parse_workbook，不访问数据库，按 utils.config 中的配置解析
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = {pool.submit(parse_workbook, source_file): source_file for source_file in files}
+            for future in as_completed(futures):
+                source_file = futures[future]
+                try:
+                    yield source_file, future.result()
+                except Exception as e:
+                    print(f"  解析工作簿失败: {source_file} - {str(e)}")
+                    yield source_file, None
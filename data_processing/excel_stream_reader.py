@@ -0,0 +1,74 @@
+"""Excel流式读取器"""
+import numpy as np
+import pandas as pd
+from typing import Iterator, List
+from openpyxl import load_workbook
+
+
+def iter_excel_chunks(file_path: str, chunk_size: int = 5000) -> Iterator[pd.DataFrame]:
+    """以只读模式逐行读取第一个工作表，按固定行数产出DataFrame分块
+
+    列名处理与 pd.read_excel 保持一致（重复列名追加 .1、.2 后缀）；整行为空的行被跳过，
+    分块索引仍与 pd.read_excel 相同（索引 = Excel 行号 - 2），校验隔离时据此报告真实行号。
+    内存占用只与 chunk_size 有关，与文件大小无关。
+    """
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook.worksheets[0]
+        rows = worksheet.iter_rows(values_only=True)
+
+        header_row = next(rows, None)
+        if header_row is None:
+            return
+        header = dedupe_header(header_row)
+        width = len(header)
+
+        chunk = []
+        index = []
+        # 数据行从 Excel 第2行开始，索引从0开始
+        for position, values in enumerate(rows):
+            # 跳过整行为空的行
+            if all(value is None for value in values):
+                continue
+
+            values = list(values[:width])
+            if len(values) < width:
+                values.extend([None] * (width - len(values)))
+            chunk.append(values)
+            index.append(position)
+
+            if len(chunk) >= chunk_size:
+                yield _to_frame(chunk, header, index)
+                chunk = []
+                index = []
+
+        if chunk:
+            yield _to_frame(chunk, header, index)
+    finally:
+        workbook.close()
+
+
+def dedupe_header(header_row) -> List[str]:
+    """生成与 pandas 一致的列名（空列名为 Unnamed: i，重复列名加序号后缀）"""
+    header = []
+    seen = {}
+    for i, value in enumerate(header_row):
+        name = f'Unnamed: {i}' if value is None else value
+        if name in seen:
+            seen[name] += 1
+            candidate = f'{name}.{seen[name]}'
+            while candidate in seen:
+                seen[name] += 1
+                candidate = f'{name}.{seen[name]}'
+            seen[candidate] = 0
+            name = candidate
+        else:
+            seen[name] = 0
+        header.append(name)
+    return header
+
+
+def _to_frame(chunk: List[list], header: List[str], index: List[int]) -> pd.DataFrame:
+    """将一批行转换为DataFrame，空单元格统一为NaN"""
+    df = pd.DataFrame(chunk, columns=header, index=index)
+    return df.where(df.notna(), np.nan)
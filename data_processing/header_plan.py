@@ -0,0 +1,247 @@
+"""表头映射计划"""
+import re
+import unicodedata
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from data_processing.questionnaire_schema import (
+    FUNCTIONAL_FEEDBACK_MAP, PROPERTY_FEEDBACK_MAP, SHEET_SPECS
+)
+
+# pandas 对重复列名追加的后缀，如 "您的描述：.1"
+_DUPLICATE_SUFFIX = re.compile(r'^(.*)\.\d+$')
+
+# 元数据字段 -> SHEET_SPECS 中的列名配置
+_FIELD_SPECS = {
+    'supplier': 'supplier_column',
+    'evaluator_name': 'name_column',
+    'evaluator_phone': 'phone_column',
+    'evaluator_dept': 'dept_column',
+    'date': 'date_column'
+}
+
+
+def normalize_header(text) -> str:
+    """归一化题目文本：全角转半角，去除空白和标点"""
+    text = unicodedata.normalize('NFKC', str(text))
+    return re.sub(r'[\W_]+', '', text).lower()
+
+
+def cell_text(value) -> str:
+    """单元格的文本值：空值为 ''，整数值的浮点数去掉 '.0'
+
+    一列中有空单元格时 pandas 把整列数字（如手机号）读成 float64，按原样转换会得到 '138….0'，
+    与没有空单元格时读到的 '138…' 不同；统一后同一单元格的文本不随同列其他单元格变化。
+    """
+    if isinstance(value, float):
+        if np.isnan(value):
+            return ''
+        if value.is_integer():
+            return str(int(value))
+    elif value is None or value is pd.NaT or value is pd.NA:
+        return ''
+    text = str(value)
+    return '' if text == 'nan' else text
+
+
+def text_values(values: pd.Series) -> pd.Series:
+    """逐个单元格转换为文本（见 cell_text）"""
+    return values.map(cell_text)
+
+
+def _short_title(text) -> str:
+    """题目的短标题（冒号前的部分），如"植物知识与养护技能" """
+    text = unicodedata.normalize('NFKC', str(text))
+    if ':' not in text:
+        return ''
+    return normalize_header(text.split(':', 1)[0])
+
+
+class _TextMatcher:
+    """题目文本匹配器：先按归一化全文匹配，再按唯一的短标题匹配"""
+
+    def __init__(self, text_to_key: Dict[str, str]):
+        self.full = {}
+        short_keys: Dict[str, set] = {}
+        for text, key in text_to_key.items():
+            self.full.setdefault(normalize_header(text), key)
+            short = _short_title(text)
+            if short:
+                short_keys.setdefault(short, set()).add(key)
+        # 短标题对应多个目标时存在歧义，不参与匹配
+        self.short = {short: keys.pop() for short, keys in short_keys.items() if len(keys) == 1}
+
+    def match(self, column) -> Optional[str]:
+        key = self.full.get(normalize_header(column))
+        if key is None:
+            short = _short_title(column)
+            key = self.short.get(short) if short else None
+        return key
+
+
+class HeaderPlan:
+    """按工作簿表头编译一次的列映射计划
+
+    score_columns 为 [(源列名, 评分项)]，按问卷定义顺序排列；
+    feedback_columns 为 [(源列名, 反馈字段)]，按源列顺序排列，
+    反馈字段为 None 表示需按上下文判断正负面的"您的描述"列；
+    fields 为元数据字段（供应商、姓名、手机号、部门、日期）对应的源列名。
+    """
+
+    def __init__(self, columns, evaluation_type: Optional[str] = None):
+        self.evaluation_type = evaluation_type
+        column_set = set(columns)
+
+        def is_duplicate(column) -> bool:
+            match = _DUPLICATE_SUFFIX.match(column) if isinstance(column, str) else None
+            return bool(match) and match.group(1) in column_set
+
+        primary = [column for column in columns if isinstance(column, str) and not is_duplicate(column)]
+
+        # 元数据字段
+        self.fields: Dict[str, str] = {}
+        if evaluation_type:
+            spec = SHEET_SPECS[evaluation_type]
+            normalized = {}
+            for column in primary:
+                normalized.setdefault(normalize_header(column), column)
+            for field, spec_key in _FIELD_SPECS.items():
+                target = spec.get(spec_key)
+                if target and normalize_header(target) in normalized:
+                    self.fields[field] = normalized[normalize_header(target)]
+
+        # 评分列
+        self.score_columns: List[Tuple[str, str]] = []
+        if evaluation_type:
+            score_definitions = SHEET_SPECS[evaluation_type]['score_columns']
+            matcher = _TextMatcher({text: key for key, text in score_definitions.items()})
+            resolved = {}
+            for column in primary:
+                key = matcher.match(column)
+                if key and key not in resolved:
+                    resolved[key] = column
+            self.score_columns = [(resolved[key], key) for key in score_definitions if key in resolved]
+
+        # 反馈列（重复列名不做精确匹配，只参与"您的描述"判断）
+        feedback_matcher = _TextMatcher({**PROPERTY_FEEDBACK_MAP, **FUNCTIONAL_FEEDBACK_MAP})
+        self.feedback_columns: List[Tuple[str, Optional[str]]] = []
+        for column in columns:
+            if not isinstance(column, str):
+                continue
+            key = None if is_duplicate(column) else feedback_matcher.match(column)
+            if key:
+                self.feedback_columns.append((column, key))
+            elif '您的描述' in normalize_header(column):
+                self.feedback_columns.append((column, None))
+
+    def extract_scores(self, df: pd.DataFrame) -> List[Dict[str, float]]:
+        """整块提取评分，返回每行的评分字典"""
+        if not self.score_columns:
+            return [{} for _ in range(len(df))]
+
+        keys = [key for _, key in self.score_columns]
+        raw = df[[column for column, _ in self.score_columns]]
+        numeric = raw.apply(pd.to_numeric, errors='coerce')
+
+        invalid = numeric.isna() & raw.notna()
+        if invalid.to_numpy().any():
+            print(f"警告: {int(invalid.to_numpy().sum())} 个评分无法转换为数值，已忽略")
+
+        block = numeric.to_numpy(dtype=float)
+        return [
+            {key: value for key, value in zip(keys, row) if not np.isnan(value)}
+            for row in block.tolist()
+        ]
+
+    def extract_feedback(self, df: pd.DataFrame) -> List[Dict[str, str]]:
+        """整块提取反馈信息，返回每行的反馈字典"""
+        columns: Dict[str, pd.Series] = {}
+        empty = pd.Series(None, index=df.index, dtype=object)
+
+        for column, key in self.feedback_columns:
+            # 空值及空白文本统一视为缺失
+            raw = df[column]
+            text = raw[raw.notna()].map(str).str.strip()
+            values = text[text != ''].reindex(df.index)
+
+            if key:
+                existing = columns.get(key)
+                columns[key] = values if existing is None else values.where(values.notna(), existing)
+                continue
+
+            # "您的描述"字段：根据同一行已有的案例判断是正面还是负面描述
+            positive_case = columns.get('positive_case', empty)
+            positive_desc = columns.get('positive_description', empty)
+            negative_case = columns.get('negative_case', empty)
+            negative_desc = columns.get('negative_description', empty)
+
+            has_value = values.notna()
+            to_positive = has_value & positive_case.notna() & positive_desc.isna()
+            to_negative = has_value & ~to_positive & negative_case.notna() & negative_desc.isna()
+            to_positive = has_value & ~to_negative
+
+            columns['positive_description'] = values.where(to_positive, positive_desc)
+            columns['negative_description'] = values.where(to_negative, negative_desc)
+
+        if not columns:
+            return [{} for _ in range(len(df))]
+
+        keys = list(columns)
+        rows = zip(*(columns[key].tolist() for key in keys))
+        return [
+            {key: value for key, value in zip(keys, row) if isinstance(value, str)}
+            for row in rows
+        ]
+
+    def extract_row_scores(self, row) -> Dict[str, float]:
+        """提取单行评分（逐行导入模式使用）"""
+        scores = {}
+        for column, key in self.score_columns:
+            value = row[column]
+            if pd.notna(value):
+                try:
+                    scores[key] = float(value)
+                except (TypeError, ValueError):
+                    print(f"警告: 无法转换评分 {column}: {value}")
+        return scores
+
+    def extract_row_feedback(self, row) -> Dict[str, str]:
+        """提取单行反馈信息（逐行导入模式使用）"""
+        feedback = {}
+        for column, key in self.feedback_columns:
+            value = row[column]
+            if not pd.notna(value) or not str(value).strip():
+                continue
+            value = str(value).strip()
+
+            if key:
+                feedback[key] = value
+            # 处理"您的描述"字段：根据上下文判断是正面还是负面描述
+            elif 'positive_case' in feedback and 'positive_description' not in feedback:
+                feedback['positive_description'] = value
+            elif 'negative_case' in feedback and 'negative_description' not in feedback:
+                feedback['negative_description'] = value
+            else:
+                # 默认作为正面描述
+                feedback['positive_description'] = value
+        return feedback
+
+
+@lru_cache(maxsize=64)
+def _compile(columns: tuple, evaluation_type: Optional[str]) -> HeaderPlan:
+    return HeaderPlan(columns, evaluation_type)
+
+
+def compile_header_plan(columns, evaluation_type: Optional[str] = None) -> HeaderPlan:
+    """编译（并缓存）表头映射计划，同一表头只编译一次"""
+    return _compile(tuple(columns), evaluation_type)
+
+
+def detect_evaluation_type(columns) -> Optional[str]:
+    """根据供应商列识别问卷类型（物管处 / 职能部门），无法识别时返回 None"""
+    normalized = {normalize_header(column) for column in columns if isinstance(column, str)}
+    for evaluation_type, spec in SHEET_SPECS.items():
+        if normalize_header(spec['supplier_column']) in normalized:
+            return evaluation_type
+    return None
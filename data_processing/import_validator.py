@@ -0,0 +1,115 @@
+"""导入数据校验与隔离"""
+import os
+import tempfile
+import pandas as pd
+from datetime import datetime
+from typing import Optional
+from data_processing.header_plan import compile_header_plan, text_values
+from data_processing.questionnaire_schema import SHEET_SPECS
+from utils.config import Config
+
+
+class ImportValidator:
+    """按列校验评估数据块，不合格的行连同原因写入隔离文件，只放行干净的行
+
+    校验项：供应商名称必填、评分为 SCORE_RANGE 范围内的数值、日期可解析；
+    开启 REJECT_DUPLICATE_RESPONSES 时同一手机号对同一供应商不重复作答（跨数据块检查，
+    只在其余校验通过的行中保留首次出现的行，已因其他原因拒绝的行不占用名额）。
+    每个源文件一个校验器实例，隔离文件在首次出现不合格行时创建（CSV，utf-8-sig）。
+    """
+
+    def __init__(self, source_file: str, evaluation_type: str, row_offset: int = 2):
+        self.source_file = source_file
+        self.evaluation_type = evaluation_type
+        # 源文件行号 = 数据块索引 + row_offset（Excel 表头占一行，行号从1开始）
+        self.row_offset = row_offset
+        self.quarantine_path: Optional[str] = None
+        self.rejected_count = 0
+        self._seen = set()
+
+    def validate(self, df: pd.DataFrame) -> pd.DataFrame:
+        """校验一个数据块，返回通过校验的行"""
+        if df.empty:
+            return df
+
+        plan = compile_header_plan(df.columns, self.evaluation_type)
+        reasons = pd.Series('', index=df.index)
+
+        def reject(mask: pd.Series, reason):
+            nonlocal reasons
+            if not mask.any():
+                return
+            text = reason if isinstance(reason, pd.Series) else pd.Series(reason, index=df.index)
+            reasons = reasons.mask(mask, reasons.where(reasons == '', reasons + '; ') + text)
+
+        # 供应商名称必填
+        supplier_column = plan.fields.get('supplier')
+        if supplier_column is None:
+            reject(pd.Series(True, index=df.index),
+                   f"缺少供应商列 {SHEET_SPECS[self.evaluation_type]['supplier_column']}")
+            suppliers = pd.Series('', index=df.index)
+        else:
+            suppliers = self._text(df[supplier_column])
+            reject(suppliers == '', '供应商名称为空')
+
+        # 评分：必须为范围内的数值（空值表示未作答，允许）
+        low, high = Config.SCORE_RANGE
+        for column, key in plan.score_columns:
+            raw = df[column]
+            numeric = pd.to_numeric(raw, errors='coerce')
+            bad = (raw.notna() & numeric.isna()) | (numeric < low) | (numeric > high)
+            if bad.any():
+                reject(bad, f"评分{key}无效(" + raw.astype(str) + ")")
+
+        # 日期：填写了但无法解析
+        date_column = plan.fields.get('date')
+        if date_column is not None:
+            raw = df[date_column]
+            parsed = pd.to_datetime(raw, errors='coerce', format='mixed')
+            reject(raw.notna() & parsed.isna(), '日期无法解析(' + raw.astype(str) + ')')
+
+        # 重复作答：同一手机号对同一供应商（数据块内及之前的数据块），只比较其余校验通过的行
+        phone_column = plan.fields.get('evaluator_phone')
+        if Config.REJECT_DUPLICATE_RESPONSES and phone_column is not None:
+            phones = self._text(df[phone_column])
+            keyed = (phones != '') & (suppliers != '') & (reasons == '')
+            keys = (suppliers + '|' + phones)[keyed]
+            duplicate = keys.duplicated(keep='first') | keys.isin(self._seen)
+            reject(duplicate.reindex(df.index, fill_value=False), '重复作答（同一手机号评价同一供应商）')
+            self._seen.update(keys[~duplicate])
+
+        rejected = reasons != ''
+        if rejected.any():
+            self._quarantine(df[rejected], reasons[rejected])
+        return df[~rejected]
+
+    def summary(self):
+        """输出隔离统计"""
+        if self.rejected_count:
+            print(f"警告: {self.rejected_count} 行未通过校验，已写入隔离文件: {self.quarantine_path}")
+
+    def _quarantine(self, rows: pd.DataFrame, reasons: pd.Series):
+        """追加写入隔离文件"""
+        if self.quarantine_path is None:
+            os.makedirs(Config.QUARANTINE_DIR, exist_ok=True)
+            name = os.path.splitext(os.path.basename(self.source_file))[0]
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            # 同名源文件（不同目录、并行导入的进程）在同一秒内也各自得到新文件
+            fd, self.quarantine_path = tempfile.mkstemp(
+                suffix='.csv', prefix=f"{name}_{timestamp}_", dir=Config.QUARANTINE_DIR
+            )
+            os.close(fd)
+            write_header = True
+        else:
+            write_header = False
+
+        output = rows.copy()
+        output.insert(0, '拒绝原因', reasons)
+        output.insert(0, '源文件行号', rows.index + self.row_offset)
+        output.to_csv(self.quarantine_path, mode='a', header=write_header,
+                      index=False, encoding='utf-8-sig' if write_header else 'utf-8')
+        self.rejected_count += len(rows)
+
+    @staticmethod
+    def _text(values: pd.Series) -> pd.Series:
+        return text_values(values).str.strip()
@@ -0,0 +1,186 @@
+"""增量评分"""
+import math
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+from data_processing.score_calculator import PROPERTY_DIMENSIONS, ScoreCalculator, _is_functional_item
+
+
+class RunningStats:
+    """加权 Welford 累加量：个数、权重和、均值、离差平方和，每次更新 O(1)"""
+    __slots__ = ('count', 'weight_sum', 'mean', 'm2')
+
+    def __init__(self):
+        self.count = 0
+        self.weight_sum = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value: float, weight: float = 1.0):
+        self.count += 1
+        self.weight_sum += weight
+        if self.weight_sum <= 0:
+            return
+        delta = value - self.mean
+        self.mean += delta * weight / self.weight_sum
+        self.m2 += weight * delta * (value - self.mean)
+
+    @property
+    def std(self) -> float:
+        """样本标准差（ddof=1，按等权计算），个数少于2时为 NaN"""
+        if self.count < 2:
+            return float('nan')
+        return math.sqrt(max(0.0, self.m2 / (self.count - 1)))
+
+
+class _TypeAccumulator:
+    """单个供应商、单种评估类型的累加量"""
+    __slots__ = ('evaluation_count', 'samples', 'dimensions')
+
+    def __init__(self):
+        self.evaluation_count = 0
+        # 样本量调整的输入：物管处为每条评估的调整后得分，职能部门为全部评分项
+        self.samples = RunningStats()
+        # 维度 -> 累加量（物管处按项目权重加权），按维度首次出现的顺序排列
+        self.dimensions: Dict[str, RunningStats] = {}
+
+
+class IncrementalScorer:
+    """按供应商、评估类型、维度维护运行累加量，新增评估时立即更新该供应商的得分和排名
+
+    每条新增评估只更新所属供应商的累加量（与该供应商已有的评估条数无关），
+    再由累加量计算维度得分、类型得分和综合得分，适合问卷仍在回收时的实时排行榜。
+    得分与 ScoreCalculator 整体计算的结果一致（浮点舍入误差范围内）。
+
+    供调用方在收到新答卷时维护实时排行榜：load 由数据库初始化，之后用 add_evaluation / add_records
+    逐条或逐批加入新评估；命令行 rankings 命令用它输出当前排行榜。
+    """
+
+    def __init__(self, score_calculator: Optional[ScoreCalculator] = None):
+        self.score_calculator = score_calculator or ScoreCalculator()
+        self._accumulators: Dict[str, Dict[str, _TypeAccumulator]] = {}
+        self._scores: Dict[str, Dict] = {}
+        # 排行榜：(-综合得分, 首次出现序号, 供应商) 有序列表，同分按首次出现的顺序排列（与 rank_suppliers 一致）
+        self._leaderboard: List[Tuple[float, int, str]] = []
+        self._order: Dict[str, int] = {}
+
+    def load(self, db_manager, cycle: Optional[str] = None) -> 'IncrementalScorer':
+        """由数据库中已有的评估记录初始化累加量"""
+        for supplier_name, evaluations in db_manager.iter_supplier_evaluations(cycle=cycle):
+            for evaluation in evaluations:
+                self._accumulate(supplier_name, evaluation)
+            self._refresh(supplier_name)
+        return self
+
+    def add_evaluation(self, supplier_name: str, evaluation: Dict) -> Dict:
+        """新增一条评估，返回该供应商更新后的得分"""
+        self._accumulate(supplier_name, evaluation)
+        return self._refresh(supplier_name)
+
+    def add_records(self, records: Iterable[Dict]):
+        """新增一批导入记录（包含 supplier_name、evaluation_type、scores、feedback 字段）"""
+        touched = []
+        for record in records:
+            self._accumulate(record['supplier_name'], record)
+            touched.append(record['supplier_name'])
+        for supplier_name in dict.fromkeys(touched):
+            self._refresh(supplier_name)
+
+    def supplier_score(self, supplier_name: str) -> Optional[Dict]:
+        """供应商当前得分，结构同 ScoreCalculator.score_all 的单个供应商结果"""
+        return self._scores.get(supplier_name)
+
+    def rank(self, supplier_name: str) -> Optional[int]:
+        """供应商当前总排名（从1开始）"""
+        if supplier_name not in self._scores:
+            return None
+        return bisect_left(self._leaderboard, self._leaderboard_key(supplier_name)) + 1
+
+    def rankings(self, limit: Optional[int] = None) -> List[Tuple[str, float, int]]:
+        """当前排行榜 [(供应商, 综合得分, 排名)]"""
+        entries = self._leaderboard if limit is None else self._leaderboard[:limit]
+        return [(supplier, -score, rank) for rank, (score, _, supplier) in enumerate(entries, 1)]
+
+    def _accumulate(self, supplier_name: str, evaluation: Dict):
+        """将一条评估计入累加量"""
+        eval_type = evaluation.get('evaluation_type')
+        if eval_type not in ('property', 'functional'):
+            return
+        accumulators = self._accumulators.setdefault(
+            supplier_name, {'property': _TypeAccumulator(), 'functional': _TypeAccumulator()}
+        )
+        accumulator = accumulators[eval_type]
+        scores = evaluation.get('scores') or {}
+
+        # 先算出这条评估的贡献再更新累加量，评分无法解析时累加量保持不变
+        if eval_type == 'property':
+            # 单条评估的维度均分（未作答维度为0）按项目权重加权累加
+            project_score = self.score_calculator.score_property_evaluation(
+                scores, evaluation.get('feedback') or {}, attributes=evaluation
+            )
+            weight = project_score['weight']
+            contributions = [(dim, float(project_score['dimension_scores'][dim]), weight)
+                             for dim in PROPERTY_DIMENSIONS]
+            samples = [float(project_score['adjusted_score'])]
+        else:
+            contributions = [(key.split('_')[0], float(score), 1.0)
+                             for key, score in scores.items() if _is_functional_item(key)]
+            samples = [value for _, value, _ in contributions]
+
+        accumulator.evaluation_count += 1
+        for dim, value, weight in contributions:
+            stats = accumulator.dimensions.get(dim)
+            if stats is None:
+                stats = accumulator.dimensions[dim] = RunningStats()
+            stats.add(value, weight)
+        for value in samples:
+            accumulator.samples.add(value)
+
+    def _refresh(self, supplier_name: str) -> Dict:
+        """由累加量重新计算供应商得分并更新排行榜（计算量只与维度数有关）"""
+        calculator = self.score_calculator
+        accumulators = self._accumulators.get(supplier_name)
+        if accumulators is None:
+            return self._scores.get(supplier_name)
+
+        dimension_scores = {}
+        for eval_type, accumulator in accumulators.items():
+            type_scores = {}
+            if accumulator.evaluation_count:
+                samples = accumulator.samples
+                sample_adjustment = calculator.sample_adjustment_from_summary(
+                    accumulator.evaluation_count, samples.count, samples.mean, samples.std
+                )
+                for dim, stats in accumulator.dimensions.items():
+                    if stats.weight_sum > 0:
+                        type_scores[dim] = stats.mean * sample_adjustment['factor']
+                type_scores['_sample_adjustment'] = sample_adjustment
+            dimension_scores[eval_type] = type_scores
+
+        property_count = accumulators['property'].evaluation_count
+        functional_count = accumulators['functional'].evaluation_count
+        dimension_scores['sample_info'] = {
+            'property_count': property_count,
+            'functional_count': functional_count,
+            'total_count': property_count + functional_count
+        }
+
+        total_score = calculator.calculate_weighted_score(dimension_scores)
+        score = {
+            'dimension_scores': dimension_scores,
+            'property_score': calculator.calculate_type_score(dimension_scores['property'], 'property'),
+            'functional_score': calculator.calculate_type_score(dimension_scores['functional'], 'functional'),
+            'total_score': total_score,
+            'level': calculator.get_score_level(total_score)
+        }
+
+        # 更新排行榜：移除旧位置，按新得分插入
+        if supplier_name in self._scores:
+            del self._leaderboard[bisect_left(self._leaderboard, self._leaderboard_key(supplier_name))]
+        else:
+            self._order[supplier_name] = len(self._order)
+        self._scores[supplier_name] = score
+        insort(self._leaderboard, self._leaderboard_key(supplier_name))
+        return score
+
+    def _leaderboard_key(self, supplier_name: str) -> Tuple[float, int, str]:
+        return -self._scores[supplier_name]['total_score'], self._order[supplier_name], supplier_name
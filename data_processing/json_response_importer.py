@@ -0,0 +1,272 @@
+"""问卷平台JSON答卷导入"""
+import json
+import os
+import pandas as pd
+from collections import Counter
+from concurrent.futures import Future
+from typing import Dict, Iterator, List, Optional
+from data_processing.excel_processor import ExcelProcessor
+from data_processing.excel_stream_reader import dedupe_header
+from data_processing.header_plan import compile_header_plan, detect_evaluation_type
+from data_processing.import_validator import ImportValidator
+from data_processing.questionnaire_schema import SHEET_SPECS
+from utils.config import Config
+
+# 答卷中可能出现的提交时间字段，映射到表头中的日期列
+SUBMIT_TIME_FIELDS = ('submit_time', 'submitted_at', 'created_at', 'end_time')
+
+# JSON 标量之后可能出现的字符
+_VALUE_END = frozenset(',]} \t\r\n')
+
+
+def iter_json_records(file_path: str, block_size: int = 1 << 16) -> Iterator[Dict]:
+    """增量解析答卷文件，逐条产出答卷对象
+
+    支持 JSONL（每行一条答卷）、顶层为数组的 JSON，以及顶层为对象、答卷位于 data 列表中的导出文件，
+    均按块读取，不会把整个文件载入内存。顶层对象逐个字段解析：data 字段为数组且之前没有出现
+    answers / answer 字段时视为导出包装，直接进入数组逐条产出其中的答卷；否则整个对象作为一条答卷。
+    """
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        stream = _JsonStream(f, block_size)
+        if stream.peek() == '[':
+            stream.advance()
+            for item in _iter_array(stream):
+                if isinstance(item, dict) and isinstance(item.get('data'), list) and not _has_answers(item):
+                    yield from (response for response in item['data'] if isinstance(response, dict))
+                elif isinstance(item, dict):
+                    yield item
+            return
+
+        while True:
+            char = stream.peek()
+            if not char:
+                return
+            if char == '{':
+                stream.advance()
+                yield from _iter_object(stream)
+            else:
+                # 忽略顶层的非对象值
+                stream.decode()
+
+
+class _JsonStream:
+    """按块读取的 JSON 文本流，缓冲区只保留未解析的内容
+
+    值不完整时读取量与已缓冲的未解析内容相当（几何级数增长），
+    单个值的重复解析次数只与其大小成对数关系。
+    """
+
+    def __init__(self, f, block_size: int):
+        self.f = f
+        self.block_size = block_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+
+    def peek(self, separators: str = '') -> str:
+        """跳过空白和 separators 中的分隔符，返回下一个字符（文件结束时返回空串）"""
+        while True:
+            buffer, pos = self.buffer, self.pos
+            while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] in separators):
+                pos += 1
+            self.pos = pos
+            if pos < len(buffer):
+                return buffer[pos]
+            if not self._fill(self.block_size):
+                return ''
+
+    def advance(self):
+        """跳过当前字符"""
+        self.pos += 1
+
+    def decode(self):
+        """解析下一个完整的 JSON 值"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill(max(self.block_size, len(self.buffer) - self.pos)):
+                    raise
+                continue
+            # 数字等标量之后必须是分隔符，否则可能在缓冲区末尾被截断，读入更多内容后重新解析
+            if not isinstance(value, (str, dict, list)) \
+                    and (end == len(self.buffer) or self.buffer[end] not in _VALUE_END) \
+                    and self._fill(self.block_size):
+                continue
+            self.pos = end
+            return value
+
+    def _fill(self, size: int) -> bool:
+        """丢弃已解析部分并读入更多内容，文件结束时返回 False"""
+        block = self.f.read(size)
+        if not block:
+            return False
+        self.buffer = self.buffer[self.pos:] + block
+        self.pos = 0
+        return True
+
+
+def _iter_array(stream: _JsonStream) -> Iterator:
+    """逐个产出数组元素（左方括号已读取）"""
+    while True:
+        char = stream.peek(',')
+        if char in (']', ''):
+            stream.advance()
+            return
+        yield stream.decode()
+
+
+def _iter_object(stream: _JsonStream) -> Iterator[Dict]:
+    """逐个字段解析顶层对象（左花括号已读取）：导出包装逐条产出 data 中的答卷，否则产出对象本身"""
+    fields = {}
+    unwrapped = False
+    while True:
+        char = stream.peek(',')
+        if char in ('}', ''):
+            stream.advance()
+            break
+        key = stream.decode()
+        if stream.peek() != ':':
+            raise json.JSONDecodeError("Expecting ':' delimiter", stream.buffer, stream.pos)
+        stream.advance()
+        if key == 'data' and stream.peek() == '[' and not _has_answers(fields):
+            stream.advance()
+            unwrapped = True
+            yield from (response for response in _iter_array(stream) if isinstance(response, dict))
+        else:
+            fields[key] = stream.decode()
+
+    if not unwrapped:
+        yield fields
+
+
+def _has_answers(response: Dict) -> bool:
+    return any(key in response for key in ('answers', 'answer'))
+
+
+class JsonResponseImporter:
+    """按问卷结构将平台导出的答卷直接批量写入评估记录表
+
+    问卷结构来自 QuestionnaireParser.parse_questionnaire：每道题的标题作为列名，
+    复用 Excel 导入的表头映射计划（评分题 -> dimN_M，开放题 -> 反馈字段）
+    和批量写库流程（含增量导入台账）。
+    """
+
+    def __init__(self, excel_processor: ExcelProcessor):
+        self.excel_processor = excel_processor
+
+    def import_responses(self, responses_path: str, structure: Dict,
+                         evaluation_type: Optional[str] = None) -> int:
+        """导入答卷文件，返回写入（新增+更新）条数"""
+        print(f"\n=== 导入问卷答卷: {responses_path} ===")
+
+        questions = structure.get('questions', [])
+        columns = dedupe_header([question['title'] for question in questions])
+        column_by_id = {str(question['id']): column for question, column in zip(questions, columns)}
+
+        evaluation_type = evaluation_type or detect_evaluation_type(columns)
+        if evaluation_type is None:
+            print("警告: 无法根据问卷题目识别问卷类型，跳过导入")
+            return 0
+
+        plan = compile_header_plan(columns, evaluation_type)
+        date_column = plan.fields.get('date')
+        if date_column is None and SHEET_SPECS[evaluation_type]['date_column']:
+            # 问卷中没有日期题时补充日期列，由答卷提交时间填充
+            date_column = SHEET_SPECS[evaluation_type]['date_column']
+            columns = columns + [date_column]
+            plan = compile_header_plan(columns, evaluation_type)
+        mapped = {column for column, _ in plan.score_columns}
+        unmapped = [
+            column for question, column in zip(questions, columns)
+            if question['type'] == 'score' and column not in mapped
+        ]
+        if unmapped:
+            print(f"警告: {len(unmapped)} 道评分题未能映射到评分项: {unmapped}")
+
+        source_file = os.path.abspath(responses_path)
+        fingerprint = None
+        if Config.INCREMENTAL_IMPORT:
+            fingerprint = self.excel_processor.changed_file_fingerprint(source_file)
+            if fingerprint is None:
+                print(f"文件未变化，跳过导入: {responses_path}")
+                return 0
+
+        # 答卷序号从1开始
+        validator = ImportValidator(source_file, evaluation_type, row_offset=1) \
+            if Config.VALIDATE_IMPORTS else None
+        total_rows = 0
+        occurrences = Counter()
+        pending = []
+        batch = []
+        for response in iter_json_records(responses_path):
+            batch.append(self._response_row(response, column_by_id, date_column))
+            if len(batch) >= Config.IMPORT_CHUNK_SIZE:
+                pending.append(self._submit_batch(batch, columns, evaluation_type, total_rows,
+                                                  validator, source_file, fingerprint, occurrences))
+                total_rows += len(batch)
+                batch = []
+
+        if batch:
+            pending.append(self._submit_batch(batch, columns, evaluation_type, total_rows,
+                                              validator, source_file, fingerprint, occurrences))
+            total_rows += len(batch)
+
+        counts = ExcelProcessor.collect_counts(pending)
+        if validator is not None:
+            validator.summary()
+        return self.excel_processor.finish_file(
+            source_file, evaluation_type, fingerprint, total_rows, counts
+        )
+
+    def _submit_batch(self, rows: List[Dict], columns: List[str], evaluation_type: str, start: int,
+                      validator: Optional[ImportValidator], source_file: str, fingerprint,
+                      occurrences: Counter) -> Future:
+        """将一批答卷转换为评估记录并提交写库（start 为该批首条答卷的序号，从0开始）"""
+        df = pd.DataFrame(rows, columns=columns, index=pd.RangeIndex(start, start + len(rows)))
+        if validator is not None:
+            df = validator.validate(df)
+        records = ExcelProcessor.build_evaluation_records(df, evaluation_type)
+        return self.excel_processor.submit_records(records, source_file, fingerprint, occurrences)
+
+    def _response_row(self, response: Dict, column_by_id: Dict[str, str],
+                      date_column: Optional[str]) -> Dict:
+        """将一条答卷转换为 {列名: 答案} 的行"""
+        answers = response.get('answers', response.get('answer', {}))
+        if isinstance(answers, dict):
+            pairs = answers.items()
+        else:
+            pairs = (
+                (item.get('id', item.get('question_id')),
+                 item.get('value', item.get('text', item.get('answer'))))
+                for item in answers if isinstance(item, dict)
+            )
+
+        row = {}
+        for question_id, value in pairs:
+            column = column_by_id.get(str(question_id))
+            if column is not None:
+                row[column] = self._answer_value(value)
+
+        # 表头中有日期列但答卷未作答时，使用答卷提交时间
+        if date_column and row.get(date_column) is None:
+            for field in SUBMIT_TIME_FIELDS:
+                if response.get(field):
+                    row[date_column] = response[field]
+                    break
+
+        return row
+
+    @staticmethod
+    def _answer_value(value):
+        """取出答案的值：Nps/填空为标量，级联选择取最后一级"""
+        if isinstance(value, dict):
+            value = value.get('value', value.get('text', value.get('label')))
+        if isinstance(value, list):
+            values = [JsonResponseImporter._answer_value(item) for item in value]
+            values = [item for item in values if item not in (None, '')]
+            value = values[-1] if values else None
+        if isinstance(value, str):
+            value = value.strip() or None
+        return value
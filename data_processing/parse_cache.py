@@ -0,0 +1,135 @@
+"""Excel解析结果缓存"""
+import glob
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+from utils.config import Config
+from utils.file_fingerprint import file_content_hash, file_fingerprint
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+
+class ParseCache:
+    """按文件指纹（路径、大小、修改时间、内容哈希）缓存 pd.read_excel 的解析结果
+
+    默认以 pickle 存储：pyarrow 不在项目依赖中，未安装时总是使用 pickle。
+    安装了 pyarrow 时先尝试 Parquet 列式存储，但同一列混有多种类型的表（例如手机号一部分读成数字、
+    一部分读成文本，或文本题中夹杂数字作答）无法写入 Parquet，仍退回 pickle；
+    问卷表通常属于这种情况，缓存不会为了写入 Parquet 而转换列类型，读出的数据与 read_excel 相同。
+    """
+
+    def __init__(self, cache_dir: str = None):
+        self.cache_dir = cache_dir or Config.PARSE_CACHE_DIR
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def read_excel(self, file_path: str) -> pd.DataFrame:
+        """读取Excel：命中缓存时直接加载，否则解析后写入缓存"""
+        df = self.load(file_path)
+        if df is not None:
+            return df
+
+        df = pd.read_excel(file_path)
+        try:
+            self.store(file_path, df)
+        except Exception as e:
+            print(f"警告: 写入解析缓存失败 {file_path}: {str(e)}")
+        return df
+
+    def load(self, file_path: str) -> Optional[pd.DataFrame]:
+        """加载缓存的DataFrame，缓存不存在或文件已变化时返回 None"""
+        meta = self._read_meta(file_path)
+        if meta is None:
+            return None
+
+        fingerprint = file_fingerprint(file_path, with_hash=False)
+        if (meta['size'], meta['mtime']) != (fingerprint['size'], fingerprint['mtime']):
+            # 修改时间变化时再比对内容哈希
+            fingerprint['content_hash'] = file_content_hash(file_path)
+            if meta['content_hash'] != fingerprint['content_hash']:
+                return None
+            self._write_meta(file_path, dict(meta, mtime=fingerprint['mtime']))
+
+        data_path = self._entry_path(file_path) + meta['format']
+        if not os.path.exists(data_path):
+            return None
+
+        try:
+            if meta['format'] == '.parquet':
+                df = pd.read_parquet(data_path)
+            else:
+                df = pd.read_pickle(data_path)
+        except Exception as e:
+            print(f"警告: 读取解析缓存失败 {file_path}: {str(e)}")
+            return None
+
+        # 与 read_excel 一致，空值统一为NaN
+        return df.where(df.notna(), np.nan)
+
+    def store(self, file_path: str, df: pd.DataFrame):
+        """写入缓存（先写临时文件再替换，避免并发进程读到半成品）"""
+        entry = self._entry_path(file_path)
+        data_format = '.pkl'
+        if HAS_PARQUET and all(isinstance(col, str) for col in df.columns):
+            try:
+                df.to_parquet(entry + '.parquet.tmp', index=False)
+                os.replace(entry + '.parquet.tmp', entry + '.parquet')
+                data_format = '.parquet'
+            except Exception:
+                # 混合类型的 object 列（如手机号）无法写入Parquet，退回pickle
+                self._remove(entry + '.parquet.tmp')
+
+        if data_format == '.pkl':
+            df.to_pickle(entry + '.pkl.tmp')
+            os.replace(entry + '.pkl.tmp', entry + '.pkl')
+
+        meta = file_fingerprint(file_path)
+        meta['format'] = data_format
+        self._write_meta(file_path, meta)
+
+    def invalidate(self, file_paths: List[str] = None) -> int:
+        """清除指定文件（默认全部）的缓存，返回清除的缓存条数"""
+        if file_paths:
+            entries = [self._entry_path(path) for path in file_paths]
+        else:
+            entries = [path[:-len('.json')] for path in glob.glob(os.path.join(self.cache_dir, '*.json'))]
+
+        removed = 0
+        for entry in entries:
+            if os.path.exists(entry + '.json'):
+                removed += 1
+            for suffix in ('.json', '.parquet', '.pkl'):
+                self._remove(entry + suffix)
+        return removed
+
+    def _entry_path(self, file_path: str) -> str:
+        """缓存条目路径（不含扩展名），按文件绝对路径哈希命名"""
+        key = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key)
+
+    def _read_meta(self, file_path: str) -> Optional[Dict]:
+        meta_path = self._entry_path(file_path) + '.json'
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, file_path: str, meta: Dict):
+        meta_path = self._entry_path(file_path) + '.json'
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    @staticmethod
+    def _remove(path: str):
+        if os.path.exists(path):
+            os.remove(path)
@@ -1,10 +1,26 @@
 """评分计算器"""
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from collections import defaultdict
 import math
+from data_processing.score_matrix import ScoreMatrix, segment_moments, segment_sums
+from data_processing.score_trace import ScoreTrace
+from database.evaluation_stats import SAMPLE_DIMENSION, feedback_adjustment, \
+    property_attributes, score_property_evaluation
 from utils.config import Config
 
+# 物管处维度
+PROPERTY_DIMENSIONS = [f'dim{dim_num}' for dim_num in range(1, 9)]
+
+
+def _is_functional_item(key: str) -> bool:
+    """职能部门评分项：dimN_M 形式（N 为一位数）"""
+    if '_' not in key:
+        return False
+    dim = key.split('_')[0]
+    return dim.startswith('dim') and len(dim) == 4
+
+
 class ScoreCalculator:
     def __init__(self):
         # 维度权重配置
@@ -23,21 +39,31 @@ class ScoreCalculator:
         # 新增：样本量调整参数
         self.sample_adjustment_config = Config.SAMPLE_ADJUSTMENT_CONFIG
 
-    def calculate_dimension_scores(self, evaluations: List[Dict]) -> Dict[str, Dict[str, float]]:
-        """计算各维度得分（考虑租摆服务特殊规则）"""
+    def calculate_dimension_scores(self, evaluations: List[Dict],
+                                   trace: Optional[ScoreTrace] = None) -> Dict[str, Dict[str, float]]:
+        """计算各维度得分（考虑租摆服务特殊规则）
+
+        提供 trace 时按逐条计算记录每条评估的计算过程（结果与矩阵计算一致）。
+        """
         # 按评估类型分组
         property_evals = [e for e in evaluations if e.get('evaluation_type') == 'property']
         functional_evals = [e for e in evaluations if e.get('evaluation_type') == 'functional']
 
-        print(f"\n=== 计算维度得分 ===")
-        print(f"物管处评估数: {len(property_evals)}")
-        print(f"职能部门评估数: {len(functional_evals)}")
+        if trace is not None:
+            trace.record('dimension_scores', source='evaluations',
+                         property_count=len(property_evals), functional_count=len(functional_evals))
 
         # 分别计算两种类型的维度得分
-        dimension_scores = {
-            'property': self._calculate_property_dimensions(property_evals),
-            'functional': self._calculate_functional_dimensions(functional_evals)
-        }
+        if Config.SCORING_ENGINE == 'LOOP' or trace is not None:
+            dimension_scores = {
+                'property': self._calculate_property_dimensions(property_evals, trace),
+                'functional': self._calculate_functional_dimensions(functional_evals, trace)
+            }
+        else:
+            dimension_scores = {
+                'property': self._calculate_property_dimensions_vectorized(property_evals),
+                'functional': self._calculate_functional_dimensions_vectorized(functional_evals)
+            }
 
         # 添加样本信息
         dimension_scores['sample_info'] = {
@@ -48,7 +74,260 @@ class ScoreCalculator:
 
         return dimension_scores
 
+    def score_all(self, evaluations_by_supplier: Dict[str, List[Dict]]) -> Dict[str, Dict]:
+        """一次计算全部供应商的得分
+
+        evaluations_by_supplier 为 {供应商名称: 评估记录列表}。每种评估类型把全部供应商的评估拼成一个矩阵，
+        样本量统计、维度加权平均、类型得分和综合得分都按供应商分组整体计算，不逐个供应商循环。
+        返回 {供应商名称: {'dimension_scores', 'property_score', 'functional_score', 'total_score', 'level'}}，
+        dimension_scores 的结构与 calculate_dimension_scores 相同，各项得分与逐个供应商计算的结果逐位相同。
+        """
+        suppliers = list(evaluations_by_supplier)
+        group_count = len(suppliers)
+
+        type_groups = {}
+        type_counts = {}
+        for eval_type in ('property', 'functional'):
+            evaluations, groups = [], []
+            for group, supplier in enumerate(suppliers):
+                for evaluation in evaluations_by_supplier[supplier]:
+                    if evaluation.get('evaluation_type') == eval_type:
+                        evaluations.append(evaluation)
+                        groups.append(group)
+            groups = np.array(groups, dtype=np.intp)
+            counts = np.bincount(groups, minlength=group_count)
+            score_groups = self._score_property_groups if eval_type == 'property' else self._score_functional_groups
+            type_counts[eval_type] = counts
+            type_groups[eval_type] = score_groups(evaluations, groups, counts)
+
+        # 类型得分（百分制）与综合得分
+        total_scores = np.zeros(group_count)
+        type_scores = {}
+        for eval_type, (dims, values, present, order, _) in type_groups.items():
+            weighted_sums, weight_sums = self._grouped_weighted_sums(eval_type, dims, values, present, order)
+            has_type = type_counts[eval_type] > 0
+
+            normalized = np.zeros(group_count)
+            np.divide(weighted_sums, weight_sums, out=normalized, where=weight_sums > 0)
+            type_scores[eval_type] = np.where(weight_sums > 0, (normalized / 5) * 100, 0.0)
+
+            # 与 calculate_weighted_score 一致：权重和偏离1时才归一化
+            renormalize = (weight_sums > 0) & (np.abs(weight_sums - 1.0) > 0.01)
+            weighted_scores = (np.where(renormalize, normalized, weighted_sums) / 5) * 100
+            total_scores = total_scores + np.where(has_type, weighted_scores * self.type_weights[eval_type], 0.0)
+
+        results = {}
+        for group, supplier in enumerate(suppliers):
+            dimension_scores = {}
+            for eval_type, (dims, values, present, order, sample_adjustments) in type_groups.items():
+                type_dimensions = {}
+                if sample_adjustments[group] is not None:
+                    for d in order[group]:
+                        if present[group, d]:
+                            type_dimensions[dims[d]] = values[group, d]
+                    type_dimensions['_sample_adjustment'] = sample_adjustments[group]
+                dimension_scores[eval_type] = type_dimensions
+
+            dimension_scores['sample_info'] = {
+                'property_count': int(type_counts['property'][group]),
+                'functional_count': int(type_counts['functional'][group]),
+                'total_count': len(evaluations_by_supplier[supplier])
+            }
+            results[supplier] = {
+                'dimension_scores': dimension_scores,
+                'property_score': type_scores['property'][group],
+                'functional_score': type_scores['functional'][group],
+                'total_score': total_scores[group],
+                'level': self.get_score_level(total_scores[group])
+            }
+        return results
+
+    def _score_property_groups(self, evaluations: List[Dict], groups: np.ndarray, counts: np.ndarray) -> Tuple:
+        """按供应商分组计算物管处维度得分
+
+        返回 (维度列表, 维度得分[组 × 维度], 是否有得分[组 × 维度], 各组的维度顺序[组 × 维度], 各组的样本量调整)，
+        没有物管处评估的组样本量调整为 None。
+        """
+        group_count = len(counts)
+        dims = PROPERTY_DIMENSIONS
+        order = np.tile(np.arange(len(dims)), (group_count, 1))
+        if not evaluations:
+            return (dims, np.zeros((group_count, len(dims))), np.zeros((group_count, len(dims)), dtype=bool),
+                    order, [None] * group_count)
+
+        project_weights, dimension_means, adjusted_scores = self._property_evaluation_arrays(evaluations)
+        weights = np.array(project_weights, dtype=float)
+
+        # 样本量调整（调整后得分按组的均值、标准差）
+        means, stds = segment_moments(adjusted_scores, counts)
+        sample_adjustments = [
+            self.sample_adjustment_from_summary(int(counts[g]), int(counts[g]), means[g], stds[g])
+            if counts[g] else None
+            for g in range(group_count)
+        ]
+        factors = np.array([adjustment['factor'] if adjustment else 1.0 for adjustment in sample_adjustments])
+
+        # 按项目权重加权平均：np.add.at 按评估顺序逐条累加，与逐条求和一致
+        weighted_sums = np.zeros((group_count, len(dims)))
+        np.add.at(weighted_sums, groups, dimension_means * weights[:, None])
+        total_weights = np.zeros(group_count)
+        np.add.at(total_weights, groups, weights)
+
+        present = (total_weights > 0)[:, None] & np.ones(len(dims), dtype=bool)
+        values = np.zeros((group_count, len(dims)))
+        np.divide(weighted_sums, total_weights[:, None], out=values, where=present)
+        values = values * factors[:, None]
+        return dims, values, present, order, sample_adjustments
+
+    def _score_functional_groups(self, evaluations: List[Dict], groups: np.ndarray, counts: np.ndarray) -> Tuple:
+        """按供应商分组计算职能部门维度得分（返回结构同 _score_property_groups）"""
+        group_count = len(counts)
+        if not evaluations:
+            return [], np.zeros((group_count, 0)), np.zeros((group_count, 0), dtype=bool), \
+                np.zeros((group_count, 0), dtype=np.intp), [None] * group_count
+
+        matrix = ScoreMatrix.from_evaluations(evaluations, _is_functional_item, strict=True)
+        entry_groups = groups[matrix.entry_rows]
+
+        # 样本量调整（全部评分项按组的均值、标准差）
+        value_counts = np.bincount(entry_groups, minlength=group_count)
+        means, stds = segment_moments(matrix.entry_values, value_counts)
+        sample_adjustments = [
+            self.sample_adjustment_from_summary(int(counts[g]), int(value_counts[g]), means[g], stds[g])
+            if counts[g] else None
+            for g in range(group_count)
+        ]
+        factors = np.array([adjustment['factor'] if adjustment else 1.0 for adjustment in sample_adjustments])
+
+        # 各维度按组求均值，并记录每组中维度首次出现的位置（决定维度顺序）
+        dims = list(dict.fromkeys(item.split('_')[0] for item in matrix.items))
+        values = np.zeros((group_count, len(dims)))
+        first_seen = np.full((group_count, len(dims)), np.inf)
+        for d, dim in enumerate(dims):
+            entries = np.flatnonzero(matrix.select(matrix.columns(f'{dim}_')))
+            dim_counts = np.bincount(entry_groups[entries], minlength=group_count)
+            sums = segment_sums(matrix.entry_values[entries], dim_counts)
+            np.divide(sums, dim_counts, out=values[:, d], where=dim_counts > 0)
+            has_dim = dim_counts > 0
+            first_seen[has_dim, d] = entries[(np.cumsum(dim_counts) - dim_counts)[has_dim]]
+
+        present = np.isfinite(first_seen)
+        order = np.argsort(first_seen, axis=1, kind='stable')
+        values = values * factors[:, None]
+        return dims, values, present, order, sample_adjustments
+
+    def sample_adjustment_from_summary(self, sample_size: int, value_count: int, mean: float, std: float) -> Dict:
+        """由评分个数、均值、样本标准差计算样本量调整（分组计算和增量计算使用，与 _calculate_sample_adjustment 一致）"""
+        if not self.sample_adjustment_config['enable'] or sample_size == 0 or not value_count:
+            return self._sample_adjustment_from_moments(sample_size, None, None)
+        return self._sample_adjustment_from_moments(
+            sample_size, float(mean), float(std) if sample_size > 1 else None
+        )
+
+    def _grouped_weighted_sums(self, eval_type: str, dims: List[str], values: np.ndarray,
+                               present: np.ndarray, order: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """按各组自己的维度顺序累加 维度得分 × 维度权重 及权重和（只计入配置了权重的维度）"""
+        dimension_weights = self.dimension_weights[eval_type]
+        weights = np.array([dimension_weights.get(dim, 0.0) for dim in dims], dtype=float)
+        weighted = np.array([dim in dimension_weights for dim in dims], dtype=bool)
+
+        rows = np.arange(len(values))
+        weighted_sums = np.zeros(len(values))
+        weight_sums = np.zeros(len(values))
+        for k in range(len(dims)):
+            d = order[:, k]
+            use = present[rows, d] & weighted[d]
+            weighted_sums = weighted_sums + np.where(use, values[rows, d] * weights[d], 0.0)
+            weight_sums = weight_sums + np.where(use, weights[d], 0.0)
+        return weighted_sums, weight_sums
+
+    def calculate_type_score(self, type_scores: Dict[str, float], eval_type: str) -> float:
+        """单一评估类型的百分制得分：按维度权重归一化的加权平均（没有可计分的维度时为0）"""
+        weighted_sum = 0
+        weight_sum = 0
+        for dim, score in type_scores.items():
+            if dim in self.dimension_weights[eval_type]:
+                dim_weight = self.dimension_weights[eval_type][dim]
+                weighted_sum += score * dim_weight
+                weight_sum += dim_weight
+
+        if weight_sum > 0:
+            return (weighted_sum / weight_sum / 5) * 100
+        return 0
+
+    def calculate_dimension_scores_from_stats(self, stats: List[Dict],
+                                              trace: Optional[ScoreTrace] = None) -> Dict[str, Dict[str, float]]:
+        """由维度汇总表计算各维度得分（结构与 calculate_dimension_scores 相同）
+
+        stats 为单个供应商的汇总行，每行包含 evaluation_type、dimension、n、
+        weight_sum、value_sum、value_sq_sum 字段；计算量只与维度数有关，与评估条数无关。
+        """
+        by_type = {'property': {}, 'functional': {}}
+        for row in stats:
+            if row['evaluation_type'] in by_type:
+                by_type[row['evaluation_type']][row['dimension']] = row
+
+        counts = {}
+        dimension_scores = {}
+        for eval_type, rows in by_type.items():
+            sample = rows.pop(SAMPLE_DIMENSION, None)
+            counts[eval_type] = int(sample['n']) if sample else 0
+            if not counts[eval_type]:
+                dimension_scores[eval_type] = {}
+                continue
+
+            sample_adjustment = self._sample_adjustment_from_statistics(
+                counts[eval_type], sample['weight_sum'], sample['value_sum'], sample['value_sq_sum']
+            )
+
+            type_scores = {}
+            for dim in sorted(rows, key=lambda d: int(d[3:]) if d[3:].isdigit() else 0):
+                row = rows[dim]
+                if row['weight_sum'] > 0:
+                    type_scores[dim] = row['value_sum'] / row['weight_sum'] * sample_adjustment['factor']
+            type_scores['_sample_adjustment'] = sample_adjustment
+            dimension_scores[eval_type] = type_scores
+
+        if trace is not None:
+            trace.record('dimension_scores', source='stats',
+                         property_count=counts['property'], functional_count=counts['functional'])
+
+        dimension_scores['sample_info'] = {
+            'property_count': counts['property'],
+            'functional_count': counts['functional'],
+            'total_count': counts['property'] + counts['functional']
+        }
+
+        return dimension_scores
+
     def _calculate_sample_adjustment(self, sample_size: int, scores: List[float]) -> Dict[str, float]:
+        if not self.sample_adjustment_config['enable'] or sample_size == 0 or not scores:
+            return self._sample_adjustment_from_moments(sample_size, None, None)
+
+        # 基本统计
+        mean_score = float(np.mean(scores))
+        std_dev = float(np.std(scores, ddof=1)) if sample_size > 1 else None
+        return self._sample_adjustment_from_moments(sample_size, mean_score, std_dev)
+
+    def _sample_adjustment_from_statistics(self, sample_size: int, count: float,
+                                           total: float, total_sq: float) -> Dict[str, float]:
+        """由评分的个数、和、平方和计算样本量调整（与逐条评分计算等价）"""
+        if not self.sample_adjustment_config['enable'] or sample_size == 0 or not count:
+            return self._sample_adjustment_from_moments(sample_size, None, None)
+
+        mean_score = total / count
+        std_dev = None
+        if sample_size > 1:
+            if count > 1:
+                variance = max(0.0, (total_sq - total * mean_score) / (count - 1))
+                std_dev = math.sqrt(variance)
+            else:
+                std_dev = float('nan')
+        return self._sample_adjustment_from_moments(sample_size, mean_score, std_dev)
+
+    def _sample_adjustment_from_moments(self, sample_size: int, mean_score: float,
+                                        std_dev: float) -> Dict[str, float]:
+        """根据样本数、均值、标准差计算样本量调整（mean_score 为 None 表示不调整）"""
         cfg = self.sample_adjustment_config
         info = {
             'sample_size': sample_size,
@@ -61,14 +340,11 @@ class ScoreCalculator:
             'eb_shrunk': None,
             'reliability_score': 1.0
         }
-        if not cfg['enable'] or sample_size == 0 or not scores:
+        if mean_score is None:
             return info
 
-        # 基本统计
-        mean_score = float(np.mean(scores))
         info['raw_mean'] = mean_score
         if sample_size > 1:
-            std_dev = float(np.std(scores, ddof=1))
             se = std_dev / math.sqrt(sample_size)
             info['std_dev'] = std_dev
             info['se'] = se
@@ -122,8 +398,34 @@ class ScoreCalculator:
         info['factor'] = max(0.5, min(1.5, info['factor']))
         return info
 
-    def _calculate_property_dimensions(self, evaluations: List[Dict]) -> Dict[str, float]:
-        cfg = self.sample_adjustment_config
+    def score_property_evaluation(self, scores: Dict, feedback: Dict, trace: Optional[ScoreTrace] = None,
+                                  attributes: Dict = None) -> Dict:
+        """计算单条物管处评估的维度得分、项目权重和调整后得分
+
+        attributes 为导入时写入的派生属性（见 evaluation_attributes），未提供时由评分和反馈解析。
+        """
+        project_score = score_property_evaluation(scores, feedback, attributes)
+
+        if trace is not None:
+            attributes = project_score['attributes']
+            trace.record('project_info', scale=attributes['project_scale'], scale_weight=project_score['scale_weight'],
+                         complexity=attributes['project_complexity'],
+                         complexity_weight=project_score['complexity_weight'],
+                         project_weight=project_score['weight'], has_rental=bool(attributes['has_rental']))
+            traced_dimensions = [
+                {'dimension': dim, 'score': score, 'count': project_score['dimension_counts'][dim]}
+                for dim, score in project_score['dimension_scores'].items() if project_score['dimension_counts'][dim]
+            ]
+            trace.record('evaluation_dimensions', skipped=project_score['skipped'], dimensions=traced_dimensions)
+            self._calculate_feedback_adjustment(attributes['positive_impact'], attributes['negative_impact'],
+                                                feedback, trace)
+            trace.record('evaluation_score', base_score=project_score['base_score'],
+                         adjustment=project_score['adjustment'], adjusted_score=project_score['adjusted_score'])
+
+        return project_score
+
+    def _calculate_property_dimensions(self, evaluations: List[Dict],
+                                       trace: Optional[ScoreTrace] = None) -> Dict[str, float]:
         """计算物管处维度得分（处理租摆服务特殊规则）"""
         if not evaluations:
             return {}
@@ -133,81 +435,15 @@ class ScoreCalculator:
         all_adjusted_scores = []  # 用于计算样本调整
 
         for eval_idx, eval in enumerate(evaluations):
-            scores = eval.get('scores', {})
-            feedback = eval.get('feedback', {})
-
-            print(f"\n  评估记录 {eval_idx + 1}:")
-            print(f"    评估人: {eval.get('evaluator_name')} - {eval.get('evaluator_dept')}")
+            if trace is not None:
+                trace.record('property_evaluation', index=eval_idx, evaluator_name=eval.get('evaluator_name'),
+                             evaluator_dept=eval.get('evaluator_dept'))
 
-            # 获取项目规模和复杂度
-            project_scale = self._extract_project_info(scores, 'scale')
-            project_complexity = self._extract_project_info(scores, 'complexity')
-            has_rental = self._extract_project_info(scores, 'rental')
-
-            # 计算项目权重
-            scale_weight = self.scale_weights.get(project_scale, 1)
-            complexity_weight = self.complexity_weights.get(project_complexity, 1)
-            project_weight = scale_weight * complexity_weight
-
-            print(f"    项目信息:")
-            print(f"      规模: {project_scale} (权重 {scale_weight})")
-            print(f"      复杂度: {project_complexity} (权重 {complexity_weight})")
-            print(f"      项目总权重: {project_weight}")
-            print(f"      包含租摆服务: {'是' if has_rental else '否'}")
-
-            # 计算各维度得分
-            dimension_scores = {}
-            for dim_num in range(1, 9):
-                dim = f'dim{dim_num}'
-                dim_scores = []
-
-                # 收集该维度的所有评分
-                for key, score in scores.items():
-                    if key.startswith(f'{dim}_'):
-                        # 特殊处理：dim1_3是租摆服务相关问题
-                        if key == 'dim1_3' and not has_rental:
-                            print(f"      跳过 {key} (无租摆服务)")
-                            continue
-
-                        try:
-                            score_value = float(score)
-                            dim_scores.append(score_value)
-                        except:
-                            continue
-
-                # 计算维度平均分
-                if dim_scores:
-                    dimension_scores[dim] = np.mean(dim_scores)
-                    print(f"      {dim}: {np.mean(dim_scores):.2f} (共{len(dim_scores)}项)")
-                else:
-                    dimension_scores[dim] = 0
-
-            # 计算基础分（加权平均）
-            base_score = sum(
-                dimension_scores.get(dim, 0) * self.dimension_weights['property'].get(dim, 0)
-                for dim in dimension_scores
+            project_score = self.score_property_evaluation(
+                eval.get('scores', {}), eval.get('feedback', {}), trace, property_attributes(eval)
             )
-
-            # 处理开放性反馈调整
-            print(f"    反馈调整:")
-            adjustment = self._calculate_feedback_adjustment(feedback)
-            adjusted_score = base_score + adjustment
-
-            # 限制在1-5分范围内
-            adjusted_score = max(1, min(5, adjusted_score))
-            all_adjusted_scores.append(adjusted_score)
-
-            print(f"    得分汇总:")
-            print(f"      基础分: {base_score:.3f}")
-            print(f"      调整分: {adjustment:+.3f}")
-            print(f"      最终分: {adjusted_score:.3f}")
-
-            project_scores.append({
-                'dimension_scores': dimension_scores,
-                'base_score': base_score,
-                'adjusted_score': adjusted_score,
-                'weight': project_weight
-            })
+            all_adjusted_scores.append(project_score['adjusted_score'])
+            project_scores.append(project_score)
 
         # 计算样本量调整
         sample_adjustment = self._calculate_sample_adjustment(
@@ -215,52 +451,7 @@ class ScoreCalculator:
             all_adjusted_scores
         )
 
-        print(f"\n  样本量分析:")
-        print(f"    样本数: {sample_adjustment['sample_size']}")
-        if sample_adjustment['method'] == 'ci':
-            sa = sample_adjustment
-            ci_lower = sa.get('ci_lower')
-            factor = sa.get('factor', 1.0)
-            # 给一个占位符，当 ci_lower=None 时显示为 “—” 或 “N/A”
-            ci_lower_str = f"{ci_lower:.2f}" if ci_lower is not None else "—"
-            factor_str = f"{factor:.3f}"
-            print(f"    方法=CI 下限, 下限分={ci_lower_str}, 调整系数={factor_str}")
-        elif sample_adjustment['method'] == 'eb':
-            print(
-                f"    方法=EB 收缩, 收缩后均值={sample_adjustment['eb_shrunk']:.2f}, 调整系数={sample_adjustment['factor']:.3f}")
-        else:
-            print(f"    方法=Linear 线性, 调整系数={sample_adjustment['factor']:.3f}")
-
-        method = sample_adjustment['method']
-        factor = sample_adjustment['factor']
-
-        if method == 'ci':
-            # CI 下限法
-            if factor < 1.0:
-                pct = (1 - factor) * 100
-                print(
-                    f"    说明: 基于{cfg['confidence_level'] * 100:.0f}%置信水平的CI下限低于均值，样本量不足，施加{pct:.1f}%惩罚")
-            else:
-                pct = (factor - 1) * 100
-                print(f"    说明: CI下限接近或高于均值，样本较可靠，给予{pct:.1f}%奖励")
-        elif method == 'eb':
-            # EB 收缩法
-            if factor < 1.0:
-                pct = (1 - factor) * 100
-                print(f"    说明: EB收缩后均值低于原均值，向全局先验收缩，施加{pct:.1f}%惩罚")
-            else:
-                pct = (factor - 1) * 100
-                print(f"    说明: EB收缩后均值高于原均值，向全局先验收缩，给予{pct:.1f}%奖励")
-        else:
-            # Linear 原逻辑
-            if factor < 1.0:
-                pct = (1 - factor) * 100
-                print(f"    说明: 样本量较少，评分可靠性降低，施加{pct:.1f}%惩罚")
-            elif factor > 1.0:
-                pct = (factor - 1) * 100
-                print(f"    说明: 样本量充足且评分一致，给予{pct:.1f}%奖励")
-            else:
-                print("    说明: 样本量与理想值匹配，无额外调整")
+        self._trace_sample_adjustment(trace, 'property', sample_adjustment)
 
         # 计算加权平均的维度得分
         if not project_scores:
@@ -269,9 +460,7 @@ class ScoreCalculator:
         # 按项目权重计算各维度的加权平均
         weighted_dimensions = {}
         total_weight = sum(p['weight'] for p in project_scores)
-
-        print(f"\n  物管处维度加权平均计算:")
-        print(f"    总权重: {total_weight}")
+        traced_dimensions = []
 
         for dim in ['dim1', 'dim2', 'dim3', 'dim4', 'dim5', 'dim6', 'dim7', 'dim8']:
             weighted_sum = sum(
@@ -283,18 +472,83 @@ class ScoreCalculator:
                 raw_score = weighted_sum / total_weight
                 adjusted_score = raw_score * sample_adjustment['factor']
                 weighted_dimensions[dim] = adjusted_score
+                if trace is not None:
+                    traced_dimensions.append({'dimension': dim, 'raw_score': raw_score, 'score': adjusted_score})
 
-                if abs(raw_score - adjusted_score) > 0.001:
-                    print(f"    {dim}: 原始={raw_score:.2f}, 调整后={adjusted_score:.2f}")
-                else:
-                    print(f"    {dim}: {adjusted_score:.2f}")
+        if trace is not None:
+            trace.record('property_dimensions', total_weight=total_weight, dimensions=traced_dimensions)
 
         # 添加样本调整信息
         weighted_dimensions['_sample_adjustment'] = sample_adjustment
 
         return weighted_dimensions
 
-    def _calculate_functional_dimensions(self, evaluations: List[Dict]) -> Dict[str, float]:
+    def _trace_sample_adjustment(self, trace: Optional[ScoreTrace], evaluation_type: str,
+                                 sample_adjustment: Dict):
+        """记录样本量调整"""
+        if trace is not None:
+            trace.record('sample_adjustment', evaluation_type=evaluation_type, sample_adjustment=sample_adjustment,
+                         confidence_level=self.sample_adjustment_config.get('confidence_level', 0.95))
+
+    def _calculate_property_dimensions_vectorized(self, evaluations: List[Dict]) -> Dict[str, float]:
+        """计算物管处维度得分（矩阵计算，结果与逐条计算一致）"""
+        if not evaluations:
+            return {}
+
+        project_weights, dimension_means, adjusted_scores = self._property_evaluation_arrays(evaluations)
+
+        sample_adjustment = self._calculate_sample_adjustment(len(evaluations), adjusted_scores.tolist())
+
+        # 按项目权重加权平均（按评估顺序累加）
+        weights = np.array(project_weights, dtype=float)
+        total_weight = sum(project_weights)
+        weighted_sums = np.cumsum(dimension_means * weights[:, None], axis=0)[-1]
+
+        weighted_dimensions = {}
+        if total_weight > 0:
+            for d, dim in enumerate(PROPERTY_DIMENSIONS):
+                weighted_dimensions[dim] = weighted_sums[d] / total_weight * sample_adjustment['factor']
+
+        weighted_dimensions['_sample_adjustment'] = sample_adjustment
+        return weighted_dimensions
+
+    def _property_evaluation_arrays(self, evaluations: List[Dict]) -> Tuple[List[float], np.ndarray, np.ndarray]:
+        """逐条物管处评估的项目权重、维度均分（评估 × 维度）和调整后得分"""
+        matrix = ScoreMatrix.from_evaluations(evaluations, lambda key: key.startswith('dim'))
+
+        # 项目信息、权重和反馈调整（每条评估一个值）
+        project_weights = []
+        has_rental = np.empty(len(evaluations), dtype=bool)
+        adjustments = np.empty(len(evaluations))
+        for i, evaluation in enumerate(evaluations):
+            attributes = property_attributes(evaluation)
+            scale_weight = self.scale_weights.get(attributes['project_scale'], 1)
+            complexity_weight = self.complexity_weights.get(attributes['project_complexity'], 1)
+            project_weights.append(scale_weight * complexity_weight)
+            has_rental[i] = bool(attributes['has_rental'])
+            adjustments[i] = self._calculate_feedback_adjustment(
+                attributes['positive_impact'], attributes['negative_impact']
+            )
+
+        # 评估 × 维度 的维度均分，dim1_3 在没有租摆服务的评估中不参与计算
+        dimension_means = np.empty((len(evaluations), len(PROPERTY_DIMENSIONS)))
+        for d, dim in enumerate(PROPERTY_DIMENSIONS):
+            columns = matrix.columns(f'{dim}_')
+            mask = matrix.mask[:, columns].copy()
+            for k, j in enumerate(columns):
+                if matrix.items[j] == 'dim1_3':
+                    mask[:, k] &= has_rental
+            dimension_means[:, d] = matrix.row_means(columns, mask)
+
+        # 基础分、调整后得分（限制在1-5分）
+        base_scores = np.zeros(len(evaluations))
+        for d, dim in enumerate(PROPERTY_DIMENSIONS):
+            base_scores += dimension_means[:, d] * self.dimension_weights['property'].get(dim, 0)
+        adjusted_scores = np.clip(base_scores + adjustments, 1, 5)
+        return project_weights, dimension_means, adjusted_scores
+
+    def _calculate_functional_dimensions(self, evaluations: List[Dict],
+                                         trace: Optional[ScoreTrace] = None) -> Dict[str, float]:
         """计算职能部门维度得分"""
         if not evaluations:
             return {}
@@ -321,10 +575,7 @@ class ScoreCalculator:
             all_scores
         )
 
-        print(f"\n  职能部门样本量分析:")
-        print(f"    样本数: {sample_adjustment['sample_size']}")
-        print(f"    可靠性: {sample_adjustment['reliability_score']:.3f}")
-        print(f"    调整系数: {sample_adjustment['factor']:.3f}")
+        self._trace_sample_adjustment(trace, 'functional', sample_adjustment)
 
         # 计算各维度平均分并应用调整
         avg_dimensions = {}
@@ -339,165 +590,70 @@ class ScoreCalculator:
 
         return avg_dimensions
 
-    # ... 其余方法保持不变 ...
-
-    def _extract_impact_level(self, case_text: str) -> str:
-        """从案例文本中提取影响程度等级"""
-        if not case_text:
-            return ''
-
-        # 案例格式: "类型,影响程度"
-        # 例如: "a) 专业技术类（如解决复杂植物问题）,a) 轻微正面影响"
-
-        # 简单方法：查找最后出现的 a) b) c) d)
-        case_lower = case_text.lower()
+    def _calculate_functional_dimensions_vectorized(self, evaluations: List[Dict]) -> Dict[str, float]:
+        """计算职能部门维度得分（矩阵计算，结果与逐条计算一致）"""
+        if not evaluations:
+            return {}
 
-        # 从后往前查找，找到第一个匹配的就返回
-        for i in range(len(case_lower) - 1, -1, -1):
-            if i > 0 and case_lower[i] == ')':
-                if case_lower[i - 1] in ['a', 'b', 'c', 'd']:
-                    return case_lower[i - 1]
+        matrix = ScoreMatrix.from_evaluations(evaluations, _is_functional_item, strict=True)
+        all_columns = list(range(len(matrix.items)))
 
-        return ''
+        sample_adjustment = self._calculate_sample_adjustment(
+            len(evaluations),
+            matrix.answered(all_columns).tolist()
+        )
 
-    def _extract_project_info(self, scores: Dict, info_type: str) -> any:
-        """从评分数据中提取项目信息"""
-        if info_type == 'scale':
-            # 查找项目规模
-            scale_fields = [
-                '您的项目整体绿化预算/规模属于：',
-                '项目规模'
-            ]
+        # 维度按评分项首次出现的顺序排列
+        avg_dimensions = {}
+        for dim in dict.fromkeys(item.split('_')[0] for item in matrix.items):
+            values = matrix.answered(matrix.columns(f'{dim}_'))
+            if len(values):
+                avg_dimensions[dim] = np.mean(values) * sample_adjustment['factor']
 
-            for field in scale_fields:
-                if field in scores:
-                    value = str(scores[field]).strip()
-                    # 处理可能的格式：A.小型, B.中型, C.大型 或直接 A, B, C
-                    if '.' in value:
-                        return value.split('.')[0].upper()
-                    elif value.upper() in ['A', 'B', 'C']:
-                        return value.upper()
-                    # 处理中文
-                    elif '小' in value:
-                        return 'A'
-                    elif '中' in value:
-                        return 'B'
-                    elif '大' in value:
-                        return 'C'
-
-            return 'B'  # 默认中型
-
-        elif info_type == 'complexity':
-            # 查找项目复杂度
-            complexity_fields = [
-                '您所负责项目的绿化复杂度属于：',
-                '项目复杂度'
-            ]
+        avg_dimensions['_sample_adjustment'] = sample_adjustment
+        return avg_dimensions
 
-            for field in complexity_fields:
-                if field in scores:
-                    value = str(scores[field]).strip()
-                    if '.' in value:
-                        return value.split('.')[0].upper()
-                    elif value.upper() in ['A', 'B', 'C']:
-                        return value.upper()
-                    # 处理中文
-                    elif '低' in value:
-                        return 'A'
-                    elif '中' in value:
-                        return 'B'
-                    elif '高' in value:
-                        return 'C'
-
-            return 'B'  # 默认中等复杂度
-
-        elif info_type == 'rental':
-            # 查找是否包含租摆服务
-            rental_fields = [
-                '贵项目是否包含绿化租摆服务？',
-                '是否包含租摆服务'
-            ]
+    # ... 其余方法保持不变 ...
 
-            for field in rental_fields:
-                if field in scores:
-                    value = str(scores[field]).strip().upper()
-                    # 处理可能的格式：A.是, B.否 或 A, B 或 是, 否
-                    if 'A' in value or '是' in value:
-                        return True
-                    elif 'B' in value or '否' in value:
-                        return False
-
-            # 如果dim1_3有非零评分，说明有租摆服务
-            if 'dim1_3' in scores:
-                try:
-                    score_value = float(scores.get('dim1_3', 0))
-                    return score_value > 0
-                except:
-                    pass
-
-            return False
-
-    def _calculate_feedback_adjustment(self, feedback: Dict) -> float:
-        """计算开放性反馈的加减分"""
-        adjustment = 0
-
-        # 处理正面案例
-        positive_case = feedback.get('positive_case', '')
-        if positive_case:
-            # 提取影响程度（查找最后一个逗号后的内容）
-            impact = self._extract_impact_level(positive_case)
-            if impact in self.positive_scores:
-                adjustment += self.positive_scores[impact]
-                print(f"      正面案例: {positive_case}")
-                print(f"      影响等级: {impact} -> +{self.positive_scores[impact]}")
-
-        # 处理负面案例
-        negative_case = feedback.get('negative_case', '')
-        if negative_case:
-            # 提取影响程度
-            impact = self._extract_impact_level(negative_case)
-            if impact in self.negative_scores:
-                adjustment += self.negative_scores[impact]
-                print(f"      负面案例: {negative_case}")
-                print(f"      影响等级: {impact} -> {self.negative_scores[impact]}")
-
-        # 限制总调整分数
-        adjustment = max(-0.5, min(0.5, adjustment))
+    def _calculate_feedback_adjustment(self, positive_impact: Optional[str], negative_impact: Optional[str],
+                                       feedback: Dict = None, trace: Optional[ScoreTrace] = None) -> float:
+        """按正负面案例的影响等级计算开放性反馈的加减分（feedback 只用于记录案例原文）"""
+        adjustment = feedback_adjustment(positive_impact, negative_impact)
+
+        if trace is not None:
+            cases = []
+            if positive_impact in self.positive_scores:
+                cases.append({'kind': 'positive', 'case': feedback.get('positive_case', ''), 'impact': positive_impact,
+                              'points': self.positive_scores[positive_impact]})
+            if negative_impact in self.negative_scores:
+                cases.append({'kind': 'negative', 'case': feedback.get('negative_case', ''), 'impact': negative_impact,
+                              'points': self.negative_scores[negative_impact]})
+            trace.record('feedback_adjustment', cases=cases, adjustment=adjustment)
 
         return adjustment
 
-    def calculate_weighted_score(self, dimension_scores: Dict[str, Dict[str, float]]) -> float:
+    def calculate_weighted_score(self, dimension_scores: Dict[str, Dict[str, float]],
+                                 trace: Optional[ScoreTrace] = None) -> float:
         """计算加权总分"""
         total_score = 0
 
-        print("\n=== 计算加权总分 ===")
-
-        # 提取样本信息
-        sample_info = dimension_scores.get('sample_info', {})
-        if sample_info:
-            print(f"样本统计:")
-            print(f"  物管处评估: {sample_info.get('property_count', 0)} 份")
-            print(f"  职能部门评估: {sample_info.get('functional_count', 0)} 份")
-            print(f"  总计: {sample_info.get('total_count', 0)} 份")
+        if trace is not None:
+            # 提取样本信息
+            trace.record('weighted_score', sample_info=dimension_scores.get('sample_info', {}))
 
         for eval_type in ['property', 'functional']:
             type_score = 0
             type_weight = self.type_weights[eval_type]
 
             if not dimension_scores.get(eval_type):
-                print(f"\n{eval_type} 无数据")
+                if trace is not None:
+                    trace.record('type_score', evaluation_type=eval_type, score=None)
                 continue
 
-            print(f"\n{eval_type} 类型计算:")
-
-            # 获取样本调整信息
-            sample_adjustment = dimension_scores[eval_type].get('_sample_adjustment', {})
-            if sample_adjustment:
-                print(f"  样本调整系数: {sample_adjustment.get('factor', 1.0):.3f}")
-
             # 计算该类型的加权平均分
             weighted_sum = 0
             weight_sum = 0
+            traced_dimensions = []
 
             for dim, score in dimension_scores[eval_type].items():
                 if dim.startswith('_'):  # 跳过元数据
@@ -507,11 +663,12 @@ class ScoreCalculator:
                     dim_weight = self.dimension_weights[eval_type][dim]
                     weighted_sum += score * dim_weight
                     weight_sum += dim_weight
-                    print(f"  {dim}: 分数={score:.2f}, 权重={dim_weight:.2f}, 贡献={score * dim_weight:.3f}")
+                    if trace is not None:
+                        traced_dimensions.append({'dimension': dim, 'score': score, 'weight': dim_weight})
 
             # 确保权重和为1
-            if weight_sum > 0 and abs(weight_sum - 1.0) > 0.01:
-                print(f"  权重和为 {weight_sum:.2f}, 进行归一化")
+            normalized = weight_sum > 0 and abs(weight_sum - 1.0) > 0.01
+            if normalized:
                 type_score = weighted_sum / weight_sum
             else:
                 type_score = weighted_sum
@@ -519,12 +676,18 @@ class ScoreCalculator:
             # 标准化到100分制
             type_score = (type_score / 5) * 100
 
-            print(f"  {eval_type} 最终得分: {type_score:.2f} (权重: {type_weight * 100}%)")
+            if trace is not None:
+                # 样本调整信息
+                sample_adjustment = dimension_scores[eval_type].get('_sample_adjustment', {})
+                trace.record('type_score', evaluation_type=eval_type, score=type_score, type_weight=type_weight,
+                             factor=sample_adjustment.get('factor', 1.0) if sample_adjustment else None,
+                             dimensions=traced_dimensions, weight_sum=weight_sum, normalized=normalized)
 
             # 加入总分
             total_score += type_score * type_weight
 
-        print(f"\n综合得分: {total_score:.2f}")
+        if trace is not None:
+            trace.record('total_score', score=total_score)
 
         return total_score
 
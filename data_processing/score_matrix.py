@@ -0,0 +1,156 @@
+"""评估 × 评分项矩阵"""
+import numpy as np
+from typing import Callable, Dict, List, Tuple
+from database.models import EvaluationRecord
+from database.score_codec import SCORE_LAYOUTS, decode_score_rows
+
+
+class ScoreMatrix:
+    """将一组评估记录的评分转换为 评估数 × 评分项 的 float 数组
+
+    values 中未作答（或无法转换为数值）的位置为 NaN，mask 标记实际作答的位置，
+    评分项按首次出现的顺序排列。另外按记录顺序保存全部作答（评估行、评分项列、分值），
+    求和与求均值按逐条计算时遍历评分字典的顺序进行，结果与逐条计算逐位相同。
+    """
+
+    def __init__(self, items: List[str], rows: np.ndarray, columns: np.ndarray, numbers: np.ndarray,
+                 evaluation_count: int):
+        self.items = items
+        self.entry_rows = rows
+        self.entry_columns = columns
+        self.entry_values = numbers
+        self.values = np.full((evaluation_count, len(items)), np.nan)
+        self.mask = np.zeros((evaluation_count, len(items)), dtype=bool)
+        self.values[rows, columns] = numbers
+        self.mask[rows, columns] = True
+
+    @classmethod
+    def from_evaluations(cls, evaluations: List[Dict], accept: Callable[[str], bool],
+                         strict: bool = False) -> 'ScoreMatrix':
+        """由评估记录构建矩阵
+
+        accept 决定评分项是否参与计算；strict=True 时评分无法转换为数值直接抛出异常
+        （职能部门逐条计算的行为），否则视为未作答（物管处逐条计算的行为）。
+        打包编码的评估记录不构造评分字典，按布局分组一次解码（见 decode_score_rows），
+        每条记录按布局顺序取作答，与 decode_scores 得到的字典顺序相同。
+        """
+        # 评分项先按遇到的顺序编号，最后按首次作答的顺序重排
+        index: Dict[str, int] = {}
+        rows, columns, numbers = [], [], []
+        packed_by_layout: Dict[int, Tuple[List[int], List[bytes]]] = {}
+        for row, evaluation in enumerate(evaluations):
+            packed = evaluation.packed_scores() if isinstance(evaluation, EvaluationRecord) else None
+            if packed is not None:
+                layout_rows, blobs = packed_by_layout.setdefault(packed[1], ([], []))
+                layout_rows.append(row)
+                blobs.append(packed)
+                continue
+
+            for key, score in evaluation.get('scores', {}).items():
+                if not accept(key):
+                    continue
+                try:
+                    number = float(score)
+                except (TypeError, ValueError):
+                    if strict:
+                        raise
+                    continue
+                rows.append(row)
+                columns.append(index.setdefault(key, len(index)))
+                numbers.append(number)
+
+        rows = [np.array(rows, dtype=np.intp)]
+        columns = [np.array(columns, dtype=np.intp)]
+        numbers = [np.array(numbers, dtype=float)]
+        for layout_id, (layout_rows, blobs) in packed_by_layout.items():
+            items = SCORE_LAYOUTS[layout_id]
+            item_columns = np.array([index.setdefault(item, len(index)) for item in items], dtype=np.intp)
+            values = decode_score_rows(blobs)
+            # 行优先展开：记录内按布局顺序
+            record, position = np.nonzero(~np.isnan(values) & np.array([accept(item) for item in items]))
+            rows.append(np.array(layout_rows, dtype=np.intp)[record])
+            columns.append(item_columns[position])
+            numbers.append(values[record, position])
+
+        # 按记录顺序排列（同一记录内保持原有顺序），评分项按首次作答的顺序编号
+        rows, columns, numbers = np.concatenate(rows), np.concatenate(columns), np.concatenate(numbers)
+        order = np.argsort(rows, kind='stable')
+        rows, columns, numbers = rows[order], columns[order], numbers[order]
+        answered, first = np.unique(columns, return_index=True)
+        answered = answered[np.argsort(first)]
+        renumber = np.zeros(len(index), dtype=np.intp)
+        renumber[answered] = np.arange(len(answered))
+        keys = list(index)
+        return cls([keys[i] for i in answered], rows, renumber[columns], numbers, len(evaluations))
+
+    def columns(self, prefix: str) -> List[int]:
+        """以 prefix 开头的评分项所在的列（按列顺序）"""
+        return [j for j, item in enumerate(self.items) if item.startswith(prefix)]
+
+    def row_means(self, columns: List[int], mask: np.ndarray = None) -> np.ndarray:
+        """每条评估在指定列上的作答均值（没有作答时为 0）
+
+        mask 形状为 评估数 × len(columns)，为 False 的位置不参与计算。
+        """
+        count = len(self.values)
+        selected = self.select(columns, mask)
+        rows = self.entry_rows[selected]
+        numbers = self.entry_values[selected]
+        counts = np.bincount(rows, minlength=count)
+
+        # 每条评估的作答按记录顺序排成一行（不足的位置补0），再逐列顺序累加
+        rank = np.arange(len(rows)) - (np.cumsum(counts) - counts)[rows]
+        grid = np.zeros((count, int(counts.max()) if len(rows) else 0))
+        grid[rows, rank] = numbers
+        totals = np.zeros(count)
+        for k in range(grid.shape[1]):
+            totals += grid[:, k]
+
+        means = np.zeros(count)
+        np.divide(totals, counts, out=means, where=counts > 0)
+        # numpy 对 8 个及以上元素分块求和，与顺序累加的舍入不同，这些行按 np.mean 重新计算
+        for i in np.flatnonzero(counts >= 8):
+            means[i] = np.mean(numbers[rows == i])
+        return means
+
+    def answered(self, columns: List[int]) -> np.ndarray:
+        """指定列上的全部作答，按记录顺序展开为一维数组"""
+        return self.entry_values[self.select(columns)]
+
+    def select(self, columns: List[int], mask: np.ndarray = None) -> np.ndarray:
+        """按记录顺序标记落在指定列上（且 mask 对应位置为 True）的作答"""
+        position = np.full(len(self.items), -1, dtype=np.intp)
+        position[columns] = np.arange(len(columns))
+        positions = position[self.entry_columns]
+        selected = positions >= 0
+        if mask is not None:
+            selected[selected] = mask[self.entry_rows[selected], positions[selected]]
+        return selected
+
+
+def segment_sums(values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """按组求和：values 按组连续排列，counts 为各组的元素个数
+
+    元素个数相同的组拼成一个二维数组按行求和，结果与对每组单独求和（np.mean、np.std 内部的求和）逐位相同。
+    """
+    sums = np.zeros(len(counts))
+    starts = np.cumsum(counts) - counts
+    for length in np.unique(counts[counts > 0]):
+        groups = np.flatnonzero(counts == length)
+        sums[groups] = values[starts[groups, None] + np.arange(length)].sum(axis=1)
+    return sums
+
+
+def segment_moments(values: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """按组计算均值和样本标准差（ddof=1），与 np.mean、np.std 逐位相同
+
+    没有元素的组均值为 NaN，元素少于2个的组标准差为 NaN。
+    """
+    means = np.full(len(counts), np.nan)
+    np.divide(segment_sums(values, counts), counts, out=means, where=counts > 0)
+
+    deviations = values - means[np.repeat(np.arange(len(counts)), counts)]
+    stds = np.full(len(counts), np.nan)
+    np.divide(segment_sums(deviations * deviations, counts), counts - 1, out=stds, where=counts > 1)
+    np.sqrt(stds, out=stds)
+    return means, stds
@@ -0,0 +1,195 @@
+"""评分过程记录"""
+import json
+from typing import Callable, Dict, List
+
+
+class ScoreTrace:
+    """评分过程的结构化记录
+
+    评分代码只记录事件名和原始数值（不格式化），需要时再渲染为文本或 JSON。
+    评分方法的 trace 参数为 None 时不记录任何内容，也不产生格式化开销。
+    """
+
+    def __init__(self, subject: str = None):
+        self.subject = subject
+        self.events: List[Dict] = []
+
+    def record(self, event: str, **fields):
+        """记录一个评分事件"""
+        fields['event'] = event
+        self.events.append(fields)
+
+    def to_dict(self) -> Dict:
+        return {'subject': self.subject, 'events': self.events}
+
+    def render_json(self, indent: int = 2) -> str:
+        """渲染为 JSON 文本"""
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=indent, default=_json_value)
+
+    def render_text(self) -> str:
+        """渲染为逐行说明文本"""
+        lines = []
+        for event in self.events:
+            lines.extend(_TEXT_RENDERERS[event['event']](event))
+        return '\n'.join(lines)
+
+
+def _json_value(value):
+    """numpy 标量转为 Python 数值"""
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"无法序列化的值: {value!r}")
+
+
+def _render_dimension_scores(event: Dict) -> List[str]:
+    title = "计算维度得分（维度汇总表）" if event['source'] == 'stats' else "计算维度得分"
+    return [
+        f"\n=== {title} ===",
+        f"物管处评估数: {event['property_count']}",
+        f"职能部门评估数: {event['functional_count']}"
+    ]
+
+
+def _render_property_evaluation(event: Dict) -> List[str]:
+    return [
+        f"\n  评估记录 {event['index'] + 1}:",
+        f"    评估人: {event['evaluator_name']} - {event['evaluator_dept']}"
+    ]
+
+
+def _render_project_info(event: Dict) -> List[str]:
+    return [
+        "    项目信息:",
+        f"      规模: {event['scale']} (权重 {event['scale_weight']})",
+        f"      复杂度: {event['complexity']} (权重 {event['complexity_weight']})",
+        f"      项目总权重: {event['project_weight']}",
+        f"      包含租摆服务: {'是' if event['has_rental'] else '否'}"
+    ]
+
+
+def _render_evaluation_dimensions(event: Dict) -> List[str]:
+    lines = [f"      跳过 {item} (无租摆服务)" for item in event['skipped']]
+    lines.extend(
+        f"      {dimension['dimension']}: {dimension['score']:.2f} (共{dimension['count']}项)"
+        for dimension in event['dimensions']
+    )
+    return lines
+
+
+def _render_feedback_adjustment(event: Dict) -> List[str]:
+    lines = ["    反馈调整:"]
+    for case in event['cases']:
+        label = "正面案例" if case['kind'] == 'positive' else "负面案例"
+        points = f"+{case['points']}" if case['kind'] == 'positive' else f"{case['points']}"
+        lines.append(f"      {label}: {case['case']}")
+        lines.append(f"      影响等级: {case['impact']} -> {points}")
+    return lines
+
+
+def _render_evaluation_score(event: Dict) -> List[str]:
+    return [
+        "    得分汇总:",
+        f"      基础分: {event['base_score']:.3f}",
+        f"      调整分: {event['adjustment']:+.3f}",
+        f"      最终分: {event['adjusted_score']:.3f}"
+    ]
+
+
+def _render_sample_adjustment(event: Dict) -> List[str]:
+    sample_adjustment = event['sample_adjustment']
+    factor = sample_adjustment['factor']
+    if event['evaluation_type'] == 'functional':
+        return [
+            "\n  职能部门样本量分析:",
+            f"    样本数: {sample_adjustment['sample_size']}",
+            f"    可靠性: {sample_adjustment['reliability_score']:.3f}",
+            f"    调整系数: {factor:.3f}"
+        ]
+
+    lines = ["\n  样本量分析:", f"    样本数: {sample_adjustment['sample_size']}"]
+    method = sample_adjustment['method']
+    if method == 'ci':
+        ci_lower = sample_adjustment.get('ci_lower')
+        # ci_lower 为 None 时显示为 “—”
+        ci_lower_str = f"{ci_lower:.2f}" if ci_lower is not None else "—"
+        lines.append(f"    方法=CI 下限, 下限分={ci_lower_str}, 调整系数={factor:.3f}")
+        if factor < 1.0:
+            lines.append(f"    说明: 基于{event['confidence_level'] * 100:.0f}%置信水平的CI下限低于均值，"
+                         f"样本量不足，施加{(1 - factor) * 100:.1f}%惩罚")
+        else:
+            lines.append(f"    说明: CI下限接近或高于均值，样本较可靠，给予{(factor - 1) * 100:.1f}%奖励")
+    elif method == 'eb':
+        lines.append(f"    方法=EB 收缩, 收缩后均值={sample_adjustment['eb_shrunk']:.2f}, 调整系数={factor:.3f}")
+        if factor < 1.0:
+            lines.append(f"    说明: EB收缩后均值低于原均值，向全局先验收缩，施加{(1 - factor) * 100:.1f}%惩罚")
+        else:
+            lines.append(f"    说明: EB收缩后均值高于原均值，向全局先验收缩，给予{(factor - 1) * 100:.1f}%奖励")
+    else:
+        lines.append(f"    方法=Linear 线性, 调整系数={factor:.3f}")
+        if factor < 1.0:
+            lines.append(f"    说明: 样本量较少，评分可靠性降低，施加{(1 - factor) * 100:.1f}%惩罚")
+        elif factor > 1.0:
+            lines.append(f"    说明: 样本量充足且评分一致，给予{(factor - 1) * 100:.1f}%奖励")
+        else:
+            lines.append("    说明: 样本量与理想值匹配，无额外调整")
+    return lines
+
+
+def _render_property_dimensions(event: Dict) -> List[str]:
+    lines = ["\n  物管处维度加权平均计算:", f"    总权重: {event['total_weight']}"]
+    for dimension in event['dimensions']:
+        raw_score, score = dimension['raw_score'], dimension['score']
+        if abs(raw_score - score) > 0.001:
+            lines.append(f"    {dimension['dimension']}: 原始={raw_score:.2f}, 调整后={score:.2f}")
+        else:
+            lines.append(f"    {dimension['dimension']}: {score:.2f}")
+    return lines
+
+
+def _render_weighted_score(event: Dict) -> List[str]:
+    lines = ["\n=== 计算加权总分 ==="]
+    sample_info = event['sample_info']
+    if sample_info:
+        lines.extend([
+            "样本统计:",
+            f"  物管处评估: {sample_info.get('property_count', 0)} 份",
+            f"  职能部门评估: {sample_info.get('functional_count', 0)} 份",
+            f"  总计: {sample_info.get('total_count', 0)} 份"
+        ])
+    return lines
+
+
+def _render_type_score(event: Dict) -> List[str]:
+    eval_type = event['evaluation_type']
+    if event['score'] is None:
+        return [f"\n{eval_type} 无数据"]
+
+    lines = [f"\n{eval_type} 类型计算:"]
+    if event['factor'] is not None:
+        lines.append(f"  样本调整系数: {event['factor']:.3f}")
+    for dimension in event['dimensions']:
+        score, weight = dimension['score'], dimension['weight']
+        lines.append(f"  {dimension['dimension']}: 分数={score:.2f}, 权重={weight:.2f}, 贡献={score * weight:.3f}")
+    if event['normalized']:
+        lines.append(f"  权重和为 {event['weight_sum']:.2f}, 进行归一化")
+    lines.append(f"  {eval_type} 最终得分: {event['score']:.2f} (权重: {event['type_weight'] * 100}%)")
+    return lines
+
+
+def _render_total_score(event: Dict) -> List[str]:
+    return [f"\n综合得分: {event['score']:.2f}"]
+
+
+_TEXT_RENDERERS: Dict[str, Callable[[Dict], List[str]]] = {
+    'dimension_scores': _render_dimension_scores,
+    'property_evaluation': _render_property_evaluation,
+    'project_info': _render_project_info,
+    'evaluation_dimensions': _render_evaluation_dimensions,
+    'feedback_adjustment': _render_feedback_adjustment,
+    'evaluation_score': _render_evaluation_score,
+    'sample_adjustment': _render_sample_adjustment,
+    'property_dimensions': _render_property_dimensions,
+    'weighted_score': _render_weighted_score,
+    'type_score': _render_type_score,
+    'total_score': _render_total_score
+}
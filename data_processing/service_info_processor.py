@@ -1,7 +1,10 @@
 """供应商服务情况处理器"""
 import pandas as pd
-from typing import Dict
+from typing import Dict, Iterator, Tuple
 from database.db_manager import DatabaseManager
+from data_processing.excel_stream_reader import iter_excel_chunks
+from data_processing.parse_cache import ParseCache
+from utils.config import Config
 
 class ServiceInfoProcessor:
     def __init__(self, db_manager: DatabaseManager):
@@ -13,55 +16,143 @@ class ServiceInfoProcessor:
         print(f"文件: {excel_path}")
 
         try:
-            # 读取Excel文件
-            df = pd.read_excel(excel_path)
-
-            # 打印列名以调试
-            print(f"Excel列名: {list(df.columns)}")
-
             # 统计信息
             success_count = 0
             failed_count = 0
 
-            for idx, row in df.iterrows():
-                try:
-                    # 提取数据
-                    supplier_name = str(row.get('外包公司名称', '')).strip()
-                    project_count = int(row.get('项目数量', 0))
-                    project_names = str(row.get('项目名称', '')).strip()
-
-                    # 处理项目占比
-                    project_ratio_str = str(row.get('项目占比', '0%'))
-                    # 移除百分号并转换为小数
-                    project_ratio = float(project_ratio_str.replace('%', '')) / 100
-
-                    remarks = str(row.get('备注', '')).strip() if pd.notna(row.get('备注')) else ''
-
-                    if not supplier_name:
-                        print(f"  行{idx+2}: 跳过（供应商名称为空）")
-                        continue
-
-                    # 更新数据库
-                    success = self.db_manager.update_supplier_service(
-                        supplier_name=supplier_name,
-                        project_count=project_count,
-                        project_names=project_names,
-                        project_ratio=project_ratio,
-                        remarks=remarks
-                    )
-
-                    if success:
-                        success_count += 1
-                        print(f"  行{idx+2}: 成功导入 {supplier_name} - {project_count}个项目 ({project_ratio*100:.2f}%)")
-                    else:
-                        failed_count += 1
-                        print(f"  行{idx+2}: 导入失败 {supplier_name}")
-
-                except Exception as e:
-                    failed_count += 1
-                    print(f"  行{idx+2}: 处理失败 - {str(e)}")
+            for df in self._iter_frames(excel_path):
+                success, failed = self._import_frame(df)
+                success_count += success
+                failed_count += failed
 
             print(f"\\n导入完成: 成功 {success_count} 条，失败 {failed_count} 条")
 
         except Exception as e:
             print(f"读取Excel文件失败: {str(e)}")
+
+    def _iter_frames(self, excel_path: str) -> Iterator[pd.DataFrame]:
+        """读取Excel：STREAM 模式分块流式读取，其余模式整表读取"""
+        if Config.IMPORT_MODE == 'STREAM':
+            for i, df in enumerate(iter_excel_chunks(excel_path, Config.IMPORT_CHUNK_SIZE)):
+                if i == 0:
+                    # 打印列名以调试
+                    print(f"Excel列名: {list(df.columns)}")
+                yield df
+        else:
+            df = ParseCache().read_excel(excel_path) if Config.PARSE_CACHE else pd.read_excel(excel_path)
+            # 打印列名以调试
+            print(f"Excel列名: {list(df.columns)}")
+            yield df
+
+    def _import_frame(self, df: pd.DataFrame) -> Tuple[int, int]:
+        """导入一个数据块，返回（成功条数，失败条数）"""
+        if Config.IMPORT_MODE == 'ROW':
+            return self._import_frame_rows(df)
+        return self._import_frame_bulk(df)
+
+    def _import_frame_bulk(self, df: pd.DataFrame) -> Tuple[int, int]:
+        """整块解析校验后一次性批量写入（单事务 upsert）"""
+        supplier_names = self._text_column(df, '外包公司名称')
+        project_names = self._text_column(df, '项目名称')
+        remarks = self._text_column(df, '备注')
+
+        # 项目数量：与逐行模式的 int() 一致，小数向零截断
+        if '项目数量' in df.columns:
+            project_counts = pd.to_numeric(df['项目数量'], errors='coerce')
+        else:
+            project_counts = pd.Series(0, index=df.index)
+
+        # 项目占比：移除百分号并转换为小数
+        if '项目占比' in df.columns:
+            ratio_text = df['项目占比'].astype(str).str.replace('%', '', regex=False).str.strip()
+            project_ratios = pd.to_numeric(ratio_text, errors='coerce') / 100
+        else:
+            project_ratios = pd.Series(0.0, index=df.index)
+
+        empty = supplier_names == ''
+        invalid = ~empty & (project_counts.isna() | project_ratios.isna())
+
+        for idx in df.index[empty]:
+            print(f"  行{idx+2}: 跳过（供应商名称为空）")
+        for idx in df.index[invalid]:
+            print(f"  行{idx+2}: 处理失败 - 项目数量或项目占比无效")
+
+        valid = ~empty & ~invalid
+        records = pd.DataFrame({
+            'supplier_name': supplier_names[valid],
+            'project_count': project_counts[valid].astype(int),
+            'project_names': project_names[valid],
+            'project_ratio': project_ratios[valid],
+            'remarks': remarks[valid]
+        }).to_dict('records')
+
+        try:
+            missing = set(self.db_manager.upsert_supplier_services(records))
+        except Exception as e:
+            print(f"  批量写入失败 - {str(e)}")
+            return 0, int(invalid.sum()) + len(records)
+
+        success_count = 0
+        for idx, record in zip(df.index[valid], records):
+            if record['supplier_name'] in missing:
+                print(f"  行{idx+2}: 导入失败 {record['supplier_name']}")
+                continue
+            success_count += 1
+            print(f"  行{idx+2}: 成功导入 {record['supplier_name']} - {record['project_count']}个项目 "
+                  f"({record['project_ratio']*100:.2f}%)")
+
+        failed_count = int(invalid.sum()) + len(records) - success_count
+        return success_count, failed_count
+
+    @staticmethod
+    def _text_column(df: pd.DataFrame, column: str) -> pd.Series:
+        """取文本列并去除首尾空白，空值或缺列时为空字符串"""
+        if column not in df.columns:
+            return pd.Series('', index=df.index)
+        values = df[column]
+        return values.where(values.notna(), '').astype(str).str.strip()
+
+    def _import_frame_rows(self, df: pd.DataFrame) -> Tuple[int, int]:
+        """逐行导入一个数据块，返回（成功条数，失败条数）"""
+        success_count = 0
+        failed_count = 0
+
+        for idx, row in df.iterrows():
+            try:
+                # 提取数据
+                supplier_name = str(row.get('外包公司名称', '')).strip()
+                project_count = int(row.get('项目数量', 0))
+                project_names = str(row.get('项目名称', '')).strip()
+
+                # 处理项目占比
+                project_ratio_str = str(row.get('项目占比', '0%'))
+                # 移除百分号并转换为小数
+                project_ratio = float(project_ratio_str.replace('%', '')) / 100
+
+                remarks = str(row.get('备注', '')).strip() if pd.notna(row.get('备注')) else ''
+
+                if not supplier_name:
+                    print(f"  行{idx+2}: 跳过（供应商名称为空）")
+                    continue
+
+                # 更新数据库
+                success = self.db_manager.update_supplier_service(
+                    supplier_name=supplier_name,
+                    project_count=project_count,
+                    project_names=project_names,
+                    project_ratio=project_ratio,
+                    remarks=remarks
+                )
+
+                if success:
+                    success_count += 1
+                    print(f"  行{idx+2}: 成功导入 {supplier_name} - {project_count}个项目 ({project_ratio*100:.2f}%)")
+                else:
+                    failed_count += 1
+                    print(f"  行{idx+2}: 导入失败 {supplier_name}")
+
+            except Exception as e:
+                failed_count += 1
+                print(f"  行{idx+2}: 处理失败 - {str(e)}")
+
+        return success_count, failed_count
@@ -1,21 +1,366 @@
 """数据库管理"""
+import os
 import sqlite3
 import json
-from typing import List, Dict, Optional, Tuple
+import logging
+import tempfile
+import threading
+from concurrent.futures import Future
+from itertools import groupby
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
 from datetime import datetime
-from .models import Supplier, Evaluation, EvaluationDimension, SupplierService
+from urllib.request import pathname2url
+from .evaluation_stats import EVALUATION_ATTRIBUTES, evaluation_attributes, evaluation_statistics
+from . import queries
+from .models import Supplier, Evaluation, EvaluationDimension, EvaluationRecord, SupplierService
+from .score_codec import serialize_scores
+from .supplier_directory import SupplierDirectory
+from .write_queue import WriteQueue
+from utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+# 结构迁移：(版本号, 语句列表)，按版本号递增排列，只追加不修改
+SCHEMA_MIGRATIONS = [
+    (1, [
+        # 每个供应商只保留一条服务情况（兼容旧数据库：先清理重复记录，保留最新一条）
+        '''
+        DELETE FROM supplier_services
+        WHERE id NOT IN (SELECT MAX(id) FROM supplier_services GROUP BY supplier_id)
+        ''',
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_supplier_services_supplier ON supplier_services (supplier_id)",
+        "CREATE INDEX IF NOT EXISTS idx_evaluations_supplier_type ON evaluations (supplier_id, evaluation_type)",
+        "CREATE INDEX IF NOT EXISTS idx_evaluations_date ON evaluations (evaluation_date)",
+        "CREATE INDEX IF NOT EXISTS idx_suppliers_area ON suppliers (service_area)"
+    ]),
+    (2, [
+        # 评分明细表：每条评估的每个评分项一行，供 SQL 端直接聚合
+        '''
+        CREATE TABLE IF NOT EXISTS evaluation_scores (
+            evaluation_id INTEGER NOT NULL,
+            dimension TEXT NOT NULL,
+            item TEXT NOT NULL,
+            value REAL NOT NULL,
+            PRIMARY KEY (evaluation_id, item),
+            FOREIGN KEY (evaluation_id) REFERENCES evaluations (id)
+        ) WITHOUT ROWID
+        ''',
+        # 回填已有评估记录
+        '''
+        INSERT OR IGNORE INTO evaluation_scores (evaluation_id, dimension, item, value)
+        SELECT e.id, substr(j.key, 1, instr(j.key, '_') - 1), j.key, j.value
+        FROM evaluations e, json_each(e.scores) j
+        WHERE j.key GLOB 'dim*_*' AND j.type IN ('integer', 'real')
+        ''',
+        # 每条评估的维度均值
+        '''
+        CREATE VIEW IF NOT EXISTS evaluation_dimension_means AS
+        SELECT e.id AS evaluation_id, e.supplier_id, e.evaluation_type, es.dimension,
+               AVG(es.value) AS mean_score, COUNT(*) AS item_count
+        FROM evaluation_scores es
+        JOIN evaluations e ON e.id = es.evaluation_id
+        GROUP BY e.id, es.dimension
+        ''',
+        # 供应商 × 评估类型 × 维度的均值与计数
+        # item_mean 为全部评分项的平均，evaluation_mean 为各条评估维度均值的平均
+        '''
+        CREATE VIEW IF NOT EXISTS supplier_dimension_means AS
+        SELECT s.id AS supplier_id, s.name AS supplier_name, s.service_area,
+               m.evaluation_type, m.dimension,
+               SUM(m.mean_score * m.item_count) / SUM(m.item_count) AS item_mean,
+               AVG(m.mean_score) AS evaluation_mean,
+               SUM(m.item_count) AS item_count,
+               COUNT(*) AS evaluation_count
+        FROM evaluation_dimension_means m
+        JOIN suppliers s ON s.id = m.supplier_id
+        GROUP BY s.id, m.evaluation_type, m.dimension
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_evaluation_scores_dimension ON evaluation_scores (dimension)"
+    ]),
+    (3, [
+        # 供应商 × 评估类型 × 维度的汇总统计，随评估记录的写入和删除在同一事务内增量维护
+        '''
+        CREATE TABLE IF NOT EXISTS supplier_dimension_stats (
+            supplier_id INTEGER NOT NULL,
+            evaluation_type TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            n INTEGER NOT NULL DEFAULT 0,
+            weight_sum REAL NOT NULL DEFAULT 0,
+            value_sum REAL NOT NULL DEFAULT 0,
+            value_sq_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (supplier_id, evaluation_type, dimension),
+            FOREIGN KEY (supplier_id) REFERENCES suppliers (id)
+        ) WITHOUT ROWID
+        '''
+        # 已有评估记录的回填在版本4按周期分区后进行
+    ]),
+    (4, [
+        # 评估周期
+        '''
+        CREATE TABLE IF NOT EXISTS cycles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            start_date TEXT,
+            end_date TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        "ALTER TABLE evaluations ADD COLUMN cycle_id INTEGER REFERENCES cycles (id)",
+        # 已有评估记录按评估日期的年份归入年度周期
+        '''
+        INSERT OR IGNORE INTO cycles (name, start_date, end_date)
+        SELECT year, year || '-01-01', year || '-12-31'
+        FROM (SELECT DISTINCT COALESCE(NULLIF(substr(evaluation_date, 1, 4), ''), strftime('%Y', 'now')) AS year
+              FROM evaluations)
+        ''',
+        '''
+        UPDATE evaluations SET cycle_id = (
+            SELECT c.id FROM cycles c
+            WHERE c.name = COALESCE(NULLIF(substr(evaluations.evaluation_date, 1, 4), ''), strftime('%Y', 'now'))
+        )
+        WHERE cycle_id IS NULL
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_evaluations_cycle_supplier_type
+        ON evaluations (cycle_id, supplier_id, evaluation_type)
+        ''',
+        # 维度汇总表按周期分区，由已有评估记录回填
+        "DROP TABLE IF EXISTS supplier_dimension_stats",
+        '''
+        CREATE TABLE supplier_dimension_stats (
+            cycle_id INTEGER,
+            supplier_id INTEGER NOT NULL,
+            evaluation_type TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            n INTEGER NOT NULL DEFAULT 0,
+            weight_sum REAL NOT NULL DEFAULT 0,
+            value_sum REAL NOT NULL DEFAULT 0,
+            value_sq_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (cycle_id, supplier_id, evaluation_type, dimension),
+            FOREIGN KEY (cycle_id) REFERENCES cycles (id),
+            FOREIGN KEY (supplier_id) REFERENCES suppliers (id)
+        ) WITHOUT ROWID
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_dimension_stats_supplier ON supplier_dimension_stats (supplier_id)",
+        lambda manager, cursor: manager.rebuild_dimension_stats(cursor),
+        # 维度均值视图增加周期
+        "DROP VIEW IF EXISTS evaluation_dimension_means",
+        '''
+        CREATE VIEW evaluation_dimension_means AS
+        SELECT e.id AS evaluation_id, e.cycle_id, e.supplier_id, e.evaluation_type, es.dimension,
+               AVG(es.value) AS mean_score, COUNT(*) AS item_count
+        FROM evaluation_scores es
+        JOIN evaluations e ON e.id = es.evaluation_id
+        GROUP BY e.id, es.dimension
+        ''',
+        '''
+        CREATE VIEW IF NOT EXISTS supplier_cycle_dimension_means AS
+        SELECT m.cycle_id, c.name AS cycle_name, s.id AS supplier_id, s.name AS supplier_name, s.service_area,
+               m.evaluation_type, m.dimension,
+               SUM(m.mean_score * m.item_count) / SUM(m.item_count) AS item_mean,
+               AVG(m.mean_score) AS evaluation_mean,
+               SUM(m.item_count) AS item_count,
+               COUNT(*) AS evaluation_count
+        FROM evaluation_dimension_means m
+        JOIN suppliers s ON s.id = m.supplier_id
+        LEFT JOIN cycles c ON c.id = m.cycle_id
+        GROUP BY m.cycle_id, s.id, m.evaluation_type, m.dimension
+        '''
+    ]),
+    (5, [
+        # 导入时解析的派生属性，评分时直接读取，不再解析评分和反馈文本
+        "ALTER TABLE evaluations ADD COLUMN project_scale TEXT",
+        "ALTER TABLE evaluations ADD COLUMN project_complexity TEXT",
+        "ALTER TABLE evaluations ADD COLUMN has_rental INTEGER",
+        "ALTER TABLE evaluations ADD COLUMN positive_impact TEXT",
+        "ALTER TABLE evaluations ADD COLUMN negative_impact TEXT",
+        lambda manager, cursor: manager.backfill_evaluation_attributes(cursor)
+    ]),
+    (6, [
+        # 供应商维度均值视图直接由评估记录和评分明细单层聚合：原视图建在按评估分组的视图之上，
+        # 按 supplier_id 过滤时条件无法下推，每次查询都扫描整个评估记录表
+        "DROP VIEW IF EXISTS supplier_dimension_means",
+        "DROP VIEW IF EXISTS supplier_cycle_dimension_means",
+        "DROP VIEW IF EXISTS evaluation_dimension_means",
+        '''
+        CREATE VIEW evaluation_dimension_means AS
+        SELECT e.id AS evaluation_id, e.cycle_id, e.supplier_id, e.evaluation_type, es.dimension,
+               AVG(es.value) AS mean_score, COUNT(*) AS item_count
+        FROM evaluation_scores es
+        JOIN evaluations e ON e.id = es.evaluation_id
+        GROUP BY e.supplier_id, e.evaluation_type, e.cycle_id, e.id, es.dimension
+        ''',
+        # evaluation_mean（各条评估维度均值的平均）按评分项所在评估的该维度作答数折算，不再嵌套聚合
+        '''
+        CREATE VIEW supplier_dimension_means AS
+        SELECT e.supplier_id, s.name AS supplier_name, s.service_area,
+               e.evaluation_type, es.dimension,
+               AVG(es.value) AS item_mean,
+               SUM(es.value / (SELECT COUNT(*) FROM evaluation_scores x
+                               WHERE x.evaluation_id = es.evaluation_id AND x.dimension = es.dimension))
+                   / COUNT(DISTINCT e.id) AS evaluation_mean,
+               COUNT(*) AS item_count,
+               COUNT(DISTINCT e.id) AS evaluation_count
+        FROM evaluations e
+        JOIN suppliers s ON s.id = e.supplier_id
+        JOIN evaluation_scores es ON es.evaluation_id = e.id
+        GROUP BY e.supplier_id, e.evaluation_type, es.dimension
+        ''',
+        '''
+        CREATE VIEW supplier_cycle_dimension_means AS
+        SELECT e.cycle_id, c.name AS cycle_name, e.supplier_id, s.name AS supplier_name, s.service_area,
+               e.evaluation_type, es.dimension,
+               AVG(es.value) AS item_mean,
+               SUM(es.value / (SELECT COUNT(*) FROM evaluation_scores x
+                               WHERE x.evaluation_id = es.evaluation_id AND x.dimension = es.dimension))
+                   / COUNT(DISTINCT e.id) AS evaluation_mean,
+               COUNT(*) AS item_count,
+               COUNT(DISTINCT e.id) AS evaluation_count
+        FROM evaluations e
+        JOIN suppliers s ON s.id = e.supplier_id
+        JOIN evaluation_scores es ON es.evaluation_id = e.id
+        LEFT JOIN cycles c ON c.id = e.cycle_id
+        GROUP BY e.cycle_id, e.supplier_id, e.evaluation_type, es.dimension
+        '''
+    ])
+]
+
 
 class DatabaseManager:
-    def __init__(self, db_path: str = 'supplier_evaluation.db'):
+    def __init__(self, db_path: str = 'supplier_evaluation.db', read_only: bool = False):
         self.db_path = db_path
-        self.init_database()
+        # 只读模式以 immutable=1 打开（用于快照文件）：不加锁、不检查其他连接的修改，也不执行结构迁移
+        self.read_only = read_only
+        # 快照管理器关闭时删除快照文件
+        self._remove_on_close = False
+        self.supplier_directory = SupplierDirectory()
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._write_queue: Optional[WriteQueue] = None
+        self._write_queue_pid = None
+        if not read_only:
+            self.init_database()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def _get_connection(self):
-        """获取数据库连接并设置日期时间处理"""
-        conn = sqlite3.connect(self.db_path, detect_types=sqlite3.PARSE_DECLTYPES|sqlite3.PARSE_COLNAMES)
+        """获取当前线程的数据库连接（每个线程复用一个长连接）
+
+        `with conn:` 只负责提交或回滚事务，不会关闭连接；连接在 close() 时统一关闭。
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        # check_same_thread=False 仅为允许 close() 在其他线程关闭连接，每个连接仍只由所属线程使用
+        if self.read_only:
+            uri = f"file:{pathname2url(os.path.abspath(self.db_path))}?mode=ro&immutable=1"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, timeout=Config.SQLITE_BUSY_TIMEOUT, check_same_thread=False)
         conn.row_factory = sqlite3.Row
+        if not self.read_only:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA cache_size = -{int(Config.SQLITE_CACHE_SIZE_KB)}")
+        conn.execute(f"PRAGMA mmap_size = {int(Config.SQLITE_MMAP_SIZE)}")
+
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        with self._connections_lock:
+            self._connections.append(conn)
         return conn
 
+    def close(self):
+        """等待写入队列写完后关闭所有线程的数据库连接"""
+        with self._connections_lock:
+            write_queue, self._write_queue = self._write_queue, None
+        if write_queue is not None and self._write_queue_pid == os.getpid():
+            write_queue.close()
+
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+        if self._remove_on_close and os.path.exists(self.db_path):
+            os.remove(self.db_path)
+            self._remove_on_close = False
+
+    def open_snapshot(self, snapshot_dir: Optional[str] = None) -> 'DatabaseManager':
+        """用 SQLite 在线备份 API 把当前数据库复制为快照文件，返回以只读、immutable 方式打开快照的管理器
+
+        备份在一个读事务内完成，得到的是某一时刻的一致数据；WAL 模式下备份不阻塞写入，
+        之后的读取全部落在快照上，与正在进行的导入互不影响。快照管理器关闭时删除快照文件。
+        """
+        snapshot_dir = snapshot_dir or Config.SNAPSHOT_DIR
+        if snapshot_dir:
+            os.makedirs(snapshot_dir, exist_ok=True)
+        fd, snapshot_path = tempfile.mkstemp(prefix='snapshot_', suffix='.db', dir=snapshot_dir)
+        os.close(fd)
+
+        try:
+            target = sqlite3.connect(snapshot_path)
+            try:
+                self._get_connection().backup(target)
+                # 快照文件不使用 WAL，immutable 打开时无需 -wal/-shm 文件
+                target.execute("PRAGMA journal_mode = DELETE")
+            finally:
+                target.close()
+        except Exception:
+            os.remove(snapshot_path)
+            raise
+
+        snapshot = DatabaseManager(snapshot_path, read_only=True)
+        snapshot._remove_on_close = True
+        return snapshot
+
+    def submit_write(self, job: Callable) -> Future:
+        """提交写操作 job(cursor)，返回 Future（结果为 job 的返回值）
+
+        启用 WRITE_QUEUE 时由专用写线程执行，排队中的写操作合并为一个事务提交；
+        否则在当前线程以单独的事务立即执行。job 不应自行提交事务。
+        """
+        if self.read_only:
+            raise sqlite3.OperationalError(f"数据库以只读方式打开，不能写入: {self.db_path}")
+        if Config.WRITE_QUEUE:
+            return self._get_write_queue().submit(job)
+
+        future = Future()
+        conn = self._get_connection()
+        try:
+            with conn:
+                # 立即获取写锁，被占用时按 busy timeout 等待
+                conn.execute("BEGIN IMMEDIATE")
+                result = job(conn.cursor())
+        except Exception as e:
+            self.supplier_directory.invalidate()
+            future.set_exception(e)
+            return future
+
+        # 事务已提交，供应商目录的变化此时才对其他线程可见
+        self.supplier_directory.publish()
+        future.set_result(result)
+        return future
+
+    def _write(self, job: Callable):
+        """执行写操作并等待事务提交，返回 job 的返回值"""
+        return self.submit_write(job).result()
+
+    def _get_write_queue(self) -> WriteQueue:
+        """获取写入队列（首次使用时启动写线程，fork 出的子进程中重新创建）"""
+        with self._connections_lock:
+            if self._write_queue is None or self._write_queue_pid != os.getpid():
+                self._write_queue = WriteQueue(self)
+                self._write_queue_pid = os.getpid()
+            return self._write_queue
+
     def init_database(self):
         """初始化数据库表"""
         with self._get_connection() as conn:
@@ -78,58 +423,132 @@ class DatabaseManager:
                 )
             ''')
 
+            # 导入台账：已导入文件指纹
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS import_files (
+                    file_path TEXT PRIMARY KEY,
+                    evaluation_type TEXT,
+                    file_size INTEGER,
+                    file_mtime REAL,
+                    content_hash TEXT,
+                    row_count INTEGER DEFAULT 0,
+                    imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            # 导入台账：每条源数据行的内容哈希及对应评估记录
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS import_ledger (
+                    source_file TEXT NOT NULL,
+                    row_key TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    evaluation_id INTEGER NOT NULL,
+                    imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (source_file, row_key),
+                    FOREIGN KEY (evaluation_id) REFERENCES evaluations (id)
+                )
+            ''')
+
+            self._migrate(cursor)
             conn.commit()
 
-    def update_supplier_service(self, supplier_name: str, project_count: int,
-                               project_names: str, project_ratio: float, remarks: str = "") -> bool:
-        """更新供应商服务情况"""
+    def _migrate(self, cursor):
+        """按 PRAGMA user_version 依次执行尚未应用的结构迁移
+
+        每个版本的语句、回填和版本号更新在同一个显式事务内执行（sqlite3 不会为 DDL 自动开启事务，
+        否则 ALTER TABLE 等语句各自立即提交）：迁移失败时整体回滚，版本号不变，下次启动重新执行该版本。
+        """
+        conn = cursor.connection
+        conn.commit()
+        cursor.execute("PRAGMA user_version")
+        version = cursor.fetchone()[0]
+        for target, statements in SCHEMA_MIGRATIONS:
+            if target <= version:
+                continue
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                for statement in statements:
+                    if callable(statement):
+                        statement(self, cursor)
+                    else:
+                        cursor.execute(statement)
+                # PRAGMA 不支持参数绑定
+                cursor.execute(f"PRAGMA user_version = {int(target)}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            print(f"数据库结构已升级到版本 {target}")
+
+    def explain_queries(self) -> List[Tuple[str, List[str]]]:
+        """对系统执行的每条查询输出 EXPLAIN QUERY PLAN，返回 [(查询名称, 执行计划)]"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
+            plans = []
+            for label, sql, params in queries.QUERY_CATALOG:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                plans.append((label, [row['detail'] for row in cursor.fetchall()]))
+            return plans
 
-            # 获取供应商ID
-            cursor.execute("SELECT id FROM suppliers WHERE name = ?", (supplier_name,))
-            result = cursor.fetchone()
-
-            if not result:
-                print(f"警告: 未找到供应商 {supplier_name}")
-                return False
-
-            supplier_id = result['id']
-
-            # 检查是否已有记录
-            cursor.execute("SELECT id FROM supplier_services WHERE supplier_id = ?", (supplier_id,))
-            existing = cursor.fetchone()
-
-            if existing:
-                # 更新现有记录
-                cursor.execute('''
-                    UPDATE supplier_services
-                    SET project_count = ?, project_names = ?, project_ratio = ?,
-                        remarks = ?, updated_at = CURRENT_TIMESTAMP
-                    WHERE supplier_id = ?
-                ''', (project_count, project_names, project_ratio, remarks, supplier_id))
-            else:
-                # 插入新记录
-                cursor.execute('''
-                    INSERT INTO supplier_services
-                    (supplier_id, project_count, project_names, project_ratio, remarks)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (supplier_id, project_count, project_names, project_ratio, remarks))
-
-            conn.commit()
-            return True
+    def update_supplier_service(self, supplier_name: str, project_count: int,
+                               project_names: str, project_ratio: float, remarks: str = "") -> bool:
+        """更新供应商服务情况"""
+        missing = self.upsert_supplier_services([{
+            'supplier_name': supplier_name,
+            'project_count': project_count,
+            'project_names': project_names,
+            'project_ratio': project_ratio,
+            'remarks': remarks
+        }])
+        return not missing
+
+    def upsert_supplier_services(self, records: List[Dict]) -> List[str]:
+        """批量写入供应商服务情况（单事务 INSERT ... ON CONFLICT DO UPDATE）
+
+        records 中每条记录包含 supplier_name、project_count、project_names、
+        project_ratio、remarks 字段。返回未找到的供应商名称列表（这些记录不写入）。
+        """
+        if not records:
+            return []
+
+        def job(cursor):
+            rows = []
+            missing = []
+            for record in records:
+                supplier_id = self.supplier_directory.get_id(cursor, record['supplier_name'])
+                if supplier_id is None:
+                    print(f"警告: 未找到供应商 {record['supplier_name']}")
+                    missing.append(record['supplier_name'])
+                    continue
+                rows.append((
+                    supplier_id,
+                    record['project_count'],
+                    record['project_names'],
+                    record['project_ratio'],
+                    record.get('remarks', '')
+                ))
+
+            cursor.executemany('''
+                INSERT INTO supplier_services
+                (supplier_id, project_count, project_names, project_ratio, remarks)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (supplier_id) DO UPDATE SET
+                    project_count = excluded.project_count,
+                    project_names = excluded.project_names,
+                    project_ratio = excluded.project_ratio,
+                    remarks = excluded.remarks,
+                    updated_at = CURRENT_TIMESTAMP
+            ''', rows)
+            return missing
+
+        return self._write(job)
 
     def get_supplier_service_info(self, supplier_name: str) -> Optional[Dict]:
         """获取供应商服务情况"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
 
-            cursor.execute('''
-                SELECT ss.*
-                FROM supplier_services ss
-                JOIN suppliers s ON ss.supplier_id = s.id
-                WHERE s.name = ?
-            ''', (supplier_name,))
+            cursor.execute(queries.SUPPLIER_SERVICE_BY_NAME, (supplier_name,))
 
             result = cursor.fetchone()
             if result:
@@ -141,12 +560,7 @@ class DatabaseManager:
         with self._get_connection() as conn:
             cursor = conn.cursor()
 
-            cursor.execute('''
-                SELECT s.name, s.service_area, ss.*
-                FROM suppliers s
-                LEFT JOIN supplier_services ss ON s.id = ss.supplier_id
-                ORDER BY s.name
-            ''')
+            cursor.execute(queries.ALL_SUPPLIER_SERVICES)
 
             results = []
             for row in cursor.fetchall():
@@ -154,26 +568,53 @@ class DatabaseManager:
 
             return results
 
-    def get_all_suppliers(self) -> List[Tuple[str, str]]:
-        """获取所有供应商名称和服务地区"""
+    def get_all_suppliers(self, cycle: Optional[str] = None) -> List[Tuple[str, str]]:
+        """获取所有供应商名称和服务地区（指定周期时只返回该周期有评估记录的供应商）"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT name, service_area FROM suppliers")
+            if cycle is None:
+                cursor.execute(queries.ALL_SUPPLIERS)
+            else:
+                cursor.execute(queries.ALL_SUPPLIERS_IN_CYCLE, (self._cycle_id(cursor, cycle),))
             return [(row['name'], row['service_area']) for row in cursor.fetchall()]
 
-    def get_suppliers_by_area(self, service_area: str) -> List[str]:
-        """根据服务地区获取供应商"""
+    def get_suppliers_by_area(self, service_area: str, cycle: Optional[str] = None) -> List[str]:
+        """根据服务地区获取供应商（指定周期时只返回该周期有评估记录的供应商）"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT name FROM suppliers WHERE service_area = ?", (service_area,))
+            if cycle is None:
+                cursor.execute(queries.SUPPLIERS_BY_AREA, (service_area,))
+            else:
+                cursor.execute(queries.SUPPLIERS_BY_AREA_IN_CYCLE, (service_area, self._cycle_id(cursor, cycle)))
             return [row['name'] for row in cursor.fetchall()]
-    def get_supplier_evaluations(self, supplier_name: str) -> List[Dict]:
-        """获取供应商的所有评估记录"""
+
+    def get_cycles(self) -> List[Dict]:
+        """获取全部评估周期"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(queries.CYCLES)
+            return [dict(row) for row in cursor.fetchall()]
+
+    def create_cycle(self, name: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> int:
+        """新建（或更新起止日期）评估周期，返回周期ID"""
+        def job(cursor):
+            cursor.execute('''
+                INSERT INTO cycles (name, start_date, end_date) VALUES (?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET
+                    start_date = COALESCE(excluded.start_date, start_date),
+                    end_date = COALESCE(excluded.end_date, end_date)
+            ''', (name, start_date, end_date))
+            return self._cycle_id(cursor, name)
+
+        return self._write(job)
+
+    def get_supplier_evaluations(self, supplier_name: str, cycle: Optional[str] = None) -> List[EvaluationRecord]:
+        """获取供应商的所有评估记录（指定周期时只返回该周期的记录）"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
 
             # 先查询供应商ID
-            cursor.execute("SELECT id, service_area FROM suppliers WHERE name = ?", (supplier_name,))
+            cursor.execute(queries.SUPPLIER_BY_NAME, (supplier_name,))
             supplier_row = cursor.fetchone()
 
             if not supplier_row:
@@ -181,109 +622,398 @@ class DatabaseManager:
                 return []
 
             supplier_id = supplier_row['id']
-            service_area = supplier_row['service_area']
 
             # 查询所有评估记录
-            cursor.execute('''
-                SELECT e.*, s.name as supplier_name, s.service_area
-                FROM evaluations e
-                JOIN suppliers s ON e.supplier_id = s.id
-                WHERE s.id = ?
-            ''', (supplier_id,))
+            if cycle is None:
+                cursor.execute(queries.SUPPLIER_EVALUATIONS, (supplier_id,))
+            else:
+                cursor.execute(queries.SUPPLIER_EVALUATIONS_IN_CYCLE, (supplier_id, self._cycle_id(cursor, cycle)))
 
-            results = []
             rows = cursor.fetchall()
 
-            print(f"\n从数据库获取供应商 {supplier_name} 的评估记录:")
-            print(f"  供应商ID: {supplier_id}")
-            print(f"  找到 {len(rows)} 条评估记录")
+            logger.debug("\n从数据库获取供应商 %s 的评估记录:", supplier_name)
+            logger.debug("  供应商ID: %s", supplier_id)
+            logger.debug("  找到 %d 条评估记录", len(rows))
 
-            for i, row in enumerate(rows):
-                record = dict(row)
+            return [self._decode_evaluation(row, i) for i, row in enumerate(rows)]
 
-                # 解析JSON字段
-                try:
-                    record['scores'] = json.loads(record['scores']) if record['scores'] else {}
-                    record['feedback'] = json.loads(record['feedback']) if record['feedback'] else {}
-                except json.JSONDecodeError as e:
-                    print(f"  警告: 解析第{i + 1}条记录的JSON数据失败: {e}")
-                    record['scores'] = {}
-                    record['feedback'] = {}
+    def iter_supplier_evaluations(self, supplier_names: Optional[List[str]] = None,
+                                  cycle: Optional[str] = None,
+                                  with_scores: bool = True) -> Iterator[Tuple[str, List[EvaluationRecord]]]:
+        """单条有序查询读取全部（或指定）供应商的评估记录，按供应商分组逐个产出
 
-                # 调试输出
-                print(f"  记录{i + 1}: 类型={record.get('evaluation_type')}, "
-                      f"评估人={record.get('evaluator_name')}, "
-                      f"部门={record.get('evaluator_dept')}, "
-                      f"评分项数={len(record.get('scores', {}))}")
+        产出 (供应商名称, 评估记录列表)，供应商按ID顺序排列，没有评估记录的供应商不产出；
+        指定周期时只读取该周期的记录。with_scores=False 时不读取评分字段（记录的 scores 为空字典），
+        用于得分另有来源、只需要反馈等其余字段的场景。
+        """
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
 
-                results.append(record)
+            params = []
+            if cycle is not None:
+                params.append(self._cycle_id(cursor, cycle))
+            if supplier_names is not None:
+                params.append(json.dumps(list(supplier_names), ensure_ascii=False))
 
-            return results
+            cursor.execute(queries.grouped_evaluations(
+                with_scores=with_scores, by_cycle=cycle is not None, by_supplier_names=supplier_names is not None
+            ), params)
+
+            for _, rows in groupby(cursor, key=lambda row: row['supplier_id']):
+                evaluations = [self._decode_evaluation(row, i) for i, row in enumerate(rows)]
+                supplier_name = evaluations[0]['supplier_name']
+                logger.debug("\n从数据库获取供应商 %s 的评估记录: %d 条", supplier_name, len(evaluations))
+                yield supplier_name, evaluations
+
+    @staticmethod
+    def _decode_evaluation(row, index: int) -> EvaluationRecord:
+        """将评估记录行包装为 EvaluationRecord（scores / feedback 首次访问时才解码）"""
+        record = EvaluationRecord(row)
+
+        # 调试输出
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"  记录{index + 1}: 类型={record.get('evaluation_type')}, "
+                         f"评估人={record.get('evaluator_name')}, "
+                         f"部门={record.get('evaluator_dept')}, "
+                         f"评分项数={len(record.get('scores', {}))}")
+
+        return record
 
     def insert_supplier(self, name: str, service_area: str = '市内') -> int:
         """插入供应商，返回ID（如果已存在则返回现有ID）"""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
+        # 已知供应商且服务地区未变化时直接命中缓存，无需访问数据库
+        supplier_id = self.supplier_directory.lookup(name, service_area)
+        if supplier_id is not None:
+            return supplier_id
 
-            # 先查询是否已存在
-            cursor.execute("SELECT id FROM suppliers WHERE name = ?", (name,))
-            result = cursor.fetchone()
-
-            if result:
-                # 供应商已存在，更新服务地区（如果需要）并返回现有ID
-                supplier_id = result['id']
-                cursor.execute(
-                    "UPDATE suppliers SET service_area = ? WHERE id = ?",
-                    (service_area, supplier_id)
-                )
-                print(f"  供应商已存在: {name} (ID: {supplier_id})")
-                return supplier_id
-            else:
-                # 供应商不存在，插入新记录
-                cursor.execute(
-                    "INSERT INTO suppliers (name, service_area) VALUES (?, ?)",
-                    (name, service_area)
-                )
-                supplier_id = cursor.lastrowid
-                print(f"  新增供应商: {name} (ID: {supplier_id})")
-                return supplier_id
+        return self._write(lambda cursor: self.supplier_directory.resolve_many(cursor, {name: service_area})[name])
 
     def update_supplier_service_area(self, supplier_name: str, service_area: str):
         """更新供应商服务地区"""
+        self._write(lambda cursor: cursor.execute(
+            "UPDATE suppliers SET service_area = ? WHERE name = ?",
+            (service_area, supplier_name)
+        ))
+        self.supplier_directory.set_area(supplier_name, service_area)
+    def insert_evaluation(self, evaluation: Evaluation) -> int:
+        """插入评估记录"""
+        record = {
+            'evaluator_name': evaluation.evaluator_name,
+            'evaluator_dept': evaluation.evaluator_dept,
+            'evaluator_phone': evaluation.evaluator_phone,
+            'evaluation_type': evaluation.evaluation_type,
+            'evaluation_date': evaluation.evaluation_date,
+            'scores': evaluation.scores,
+            'feedback': evaluation.feedback
+        }
+        return self._write(lambda cursor: self._insert_evaluations(cursor, [record], [evaluation.supplier_id])[0])
+
+    def store_evaluations_async(self, records: List[Dict], source_file: Optional[str] = None) -> Future:
+        """提交一批评估记录的写入，返回结果为 {'inserted', 'updated', 'skipped'} 计数的 Future
+
+        records 中每条记录包含 supplier_name、service_area、evaluator_name、
+        evaluator_dept、evaluator_phone、evaluation_type、evaluation_date、
+        scores、feedback 字段，供应商ID在写入事务内解析。
+        提供 source_file 时按导入台账增量写入：记录需额外包含 row_key（文件内的源数据行标识）
+        和 content_hash（内容哈希），台账中不存在的行新增，哈希变化的行替换原评估记录，
+        未变化的行跳过；台账按源文件隔离，不同文件中的相同评估人互不影响。
+        未提供 source_file 时直接批量插入。
+        启用写入队列时调用方可以继续解析下一批数据，由写线程在后台写库。
+        """
+        if source_file is None:
+            return self.submit_write(
+                lambda cursor: {'inserted': len(self._insert_evaluation_rows(cursor, records)) if records else 0}
+            )
+        return self.submit_write(lambda cursor: self._merge_evaluation_rows(cursor, records, source_file))
+
+    def _merge_evaluation_rows(self, cursor, records: List[Dict], source_file: str) -> Dict[str, int]:
+        """在给定游标上按导入台账增量写入评估记录（不提交事务）"""
+        result = {'inserted': 0, 'updated': 0, 'skipped': 0}
+        if not records:
+            return result
+
+        # 查询已入账的行
+        ledger = {}
+        row_keys = [record['row_key'] for record in records]
+        for start in range(0, len(row_keys), queries.IN_BATCH_SIZE):
+            batch = row_keys[start:start + queries.IN_BATCH_SIZE]
+            cursor.execute(queries.ledger_rows(len(batch)), [source_file] + batch)
+            for row in cursor.fetchall():
+                ledger[row['row_key']] = (row['content_hash'], row['evaluation_id'])
+
+        pending = []
+        replaced_ids = []
+        for record in records:
+            existing = ledger.get(record['row_key'])
+            if existing is None:
+                result['inserted'] += 1
+            elif existing[0] != record['content_hash']:
+                replaced_ids.append(existing[1])
+                result['updated'] += 1
+            else:
+                result['skipped'] += 1
+                continue
+            pending.append(record)
+
+        if replaced_ids:
+            self._delete_evaluation_rows(cursor, replaced_ids)
+
+        if pending:
+            evaluation_ids = self._insert_evaluation_rows(cursor, pending)
+            cursor.executemany('''
+                INSERT OR REPLACE INTO import_ledger
+                (source_file, row_key, content_hash, evaluation_id)
+                VALUES (?, ?, ?, ?)
+            ''', [
+                (source_file, record['row_key'], record['content_hash'], evaluation_id)
+                for record, evaluation_id in zip(pending, evaluation_ids)
+            ])
+
+        return result
+
+    def get_imported_file(self, file_path: str) -> Optional[Dict]:
+        """获取已导入文件的指纹记录"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                "UPDATE suppliers SET service_area = ? WHERE name = ?",
-                (service_area, supplier_name)
+            cursor.execute(queries.IMPORTED_FILE, (file_path,))
+            result = cursor.fetchone()
+            return dict(result) if result else None
+
+    def record_imported_file(self, file_path: str, evaluation_type: str,
+                             fingerprint: Dict, row_count: int):
+        """记录已导入文件的指纹"""
+        self._write(lambda cursor: cursor.execute('''
+            INSERT OR REPLACE INTO import_files
+            (file_path, evaluation_type, file_size, file_mtime, content_hash, row_count)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (file_path, evaluation_type, fingerprint['size'], fingerprint['mtime'],
+              fingerprint['content_hash'], row_count)))
+
+    def _insert_evaluation_rows(self, cursor, records: List[Dict]) -> List[int]:
+        """在给定游标上批量插入评估记录（不提交事务），返回新记录ID列表"""
+        # 每个供应商只解析一次（以最后出现的服务地区为准）
+        supplier_ids = self.supplier_directory.resolve_many(
+            cursor, {record['supplier_name']: record['service_area'] for record in records}
+        )
+        return self._insert_evaluations(cursor, records, [supplier_ids[record['supplier_name']] for record in records])
+
+    def _insert_evaluations(self, cursor, records: List[Dict], supplier_ids: List[int]) -> List[int]:
+        """在给定游标上插入评估记录及其评分明细、维度汇总（不提交事务），返回按记录顺序排列的新记录ID"""
+        dates = [self._format_evaluation_date(record['evaluation_date']) for record in records]
+        cycle_names = [self._cycle_name(date) for date in dates]
+        cycle_ids = self._resolve_cycle_ids(cursor, cycle_names)
+        record_cycle_ids = [cycle_ids[name] for name in cycle_names]
+        # 派生属性在写库时解析一次
+        record_attributes = [
+            evaluation_attributes(record['evaluation_type'], record['scores'] or {}, record['feedback'] or {})
+            for record in records
+        ]
+
+        # 写操作总在持有写锁的事务中执行（BEGIN IMMEDIATE），先预留一段连续ID再用 executemany 一次写入
+        first_id = self._reserve_evaluation_ids(cursor)
+        evaluation_ids = list(range(first_id, first_id + len(records)))
+        cursor.executemany(f'''
+            INSERT INTO evaluations
+            (id, supplier_id, evaluator_name, evaluator_dept, evaluator_phone,
+             evaluation_type, evaluation_date, scores, feedback, cycle_id, {', '.join(EVALUATION_ATTRIBUTES)})
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (
+                evaluation_id,
+                supplier_id,
+                record['evaluator_name'],
+                record['evaluator_dept'],
+                record['evaluator_phone'],
+                record['evaluation_type'],
+                date,
+                serialize_scores(record['scores'], record['evaluation_type']),
+                json.dumps(record['feedback'], ensure_ascii=False) if record['feedback'] else '{}',
+                cycle_id,
+                *(attributes[name] for name in EVALUATION_ATTRIBUTES)
             )
-            conn.commit()
-    def insert_evaluation(self, evaluation: Evaluation) -> int:
-        """插入评估记录"""
+            for evaluation_id, record, supplier_id, date, cycle_id, attributes
+            in zip(evaluation_ids, records, supplier_ids, dates, record_cycle_ids, record_attributes)
+        ])
+
+        self._insert_score_rows(cursor, evaluation_ids, [record['scores'] or {} for record in records])
+        self._apply_dimension_stats(cursor, [
+            (cycle_id, supplier_id, record['evaluation_type'],
+             record['scores'] or {}, record['feedback'] or {}, attributes)
+            for record, supplier_id, cycle_id, attributes
+            in zip(records, supplier_ids, record_cycle_ids, record_attributes)
+        ])
+        return evaluation_ids
+
+    @staticmethod
+    def _reserve_evaluation_ids(cursor) -> int:
+        """返回下一个可用的评估记录ID（调用方须持有写锁，同一事务内随后插入的记录按顺序占用）
+
+        evaluations.id 为 AUTOINCREMENT，沿用 sqlite_sequence 中的计数，已删除记录的ID不会被复用。
+        """
+        cursor.execute(queries.NEXT_EVALUATION_ID)
+        return cursor.fetchone()[0]
+
+    def _insert_score_rows(self, cursor, evaluation_ids: List[int], scores_list: List[Dict]):
+        """在给定游标上写入评分明细（不提交事务）"""
+        rows = []
+        for evaluation_id, scores in zip(evaluation_ids, scores_list):
+            for item, value in scores.items():
+                if not item.startswith('dim') or '_' not in item:
+                    continue
+                try:
+                    rows.append((evaluation_id, item.split('_')[0], item, float(value)))
+                except (TypeError, ValueError):
+                    continue
+
+        cursor.executemany(
+            "INSERT OR REPLACE INTO evaluation_scores (evaluation_id, dimension, item, value) VALUES (?, ?, ?, ?)",
+            rows
+        )
+
+    def _delete_evaluation_rows(self, cursor, evaluation_ids: List[int]):
+        """在给定游标上删除评估记录及其评分明细，并扣减维度汇总（不提交事务）"""
+        removed = []
+        for start in range(0, len(evaluation_ids), queries.IN_BATCH_SIZE):
+            batch = evaluation_ids[start:start + queries.IN_BATCH_SIZE]
+            cursor.execute(queries.evaluations_by_ids(len(batch)), batch)
+            for row in cursor.fetchall():
+                record = EvaluationRecord(row)
+                removed.append((row['cycle_id'], row['supplier_id'], row['evaluation_type'],
+                                record['scores'], record['feedback'], record))
+        self._apply_dimension_stats(cursor, removed, sign=-1)
+
+        params = [(evaluation_id,) for evaluation_id in evaluation_ids]
+        cursor.executemany("DELETE FROM evaluation_scores WHERE evaluation_id = ?", params)
+        cursor.executemany("DELETE FROM evaluations WHERE id = ?", params)
+
+    def _apply_dimension_stats(self, cursor, evaluations: List[Tuple[int, int, str, Dict, Dict, Dict]],
+                               sign: int = 1):
+        """在给定游标上累加（sign=1）或扣减（sign=-1）评估对维度汇总表的贡献（不提交事务）
+
+        evaluations 为 [(周期ID, 供应商ID, 评估类型, 评分, 反馈, 派生属性)]，先在内存中按维度合并，再批量写入；
+        派生属性为包含 EVALUATION_ATTRIBUTES 的映射（评估记录行或 evaluation_attributes 的结果），
+        其中没有已解析的属性时由评分和反馈解析。
+        """
+        deltas = {}
+        for cycle_id, supplier_id, evaluation_type, scores, feedback, attributes in evaluations:
+            for dim, n, weight_sum, value_sum, value_sq_sum in evaluation_statistics(
+                    evaluation_type, scores, feedback, attributes):
+                key = (cycle_id, supplier_id, evaluation_type, dim)
+                total = deltas.setdefault(key, [0, 0.0, 0.0, 0.0])
+                total[0] += n
+                total[1] += weight_sum
+                total[2] += value_sum
+                total[3] += value_sq_sum
+
+        if not deltas:
+            return
+
+        cursor.executemany('''
+            INSERT INTO supplier_dimension_stats
+            (cycle_id, supplier_id, evaluation_type, dimension, n, weight_sum, value_sum, value_sq_sum)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (cycle_id, supplier_id, evaluation_type, dimension) DO UPDATE SET
+                n = n + excluded.n,
+                weight_sum = weight_sum + excluded.weight_sum,
+                value_sum = value_sum + excluded.value_sum,
+                value_sq_sum = value_sq_sum + excluded.value_sq_sum
+        ''', [
+            (cycle_id, supplier_id, evaluation_type, dim,
+             sign * n, sign * weight_sum, sign * value_sum, sign * value_sq_sum)
+            for (cycle_id, supplier_id, evaluation_type, dim), (n, weight_sum, value_sum, value_sq_sum)
+            in deltas.items()
+        ])
+
+        if sign < 0:
+            cursor.execute("DELETE FROM supplier_dimension_stats WHERE n <= 0")
+
+    def rebuild_dimension_stats(self, cursor=None):
+        """由全部评估记录重建维度汇总表（修改评分权重等配置后需要执行）"""
+        if cursor is None:
+            self._write(self.rebuild_dimension_stats)
+            return
+
+        cursor.execute("DELETE FROM supplier_dimension_stats")
+        cursor.execute(queries.ALL_EVALUATIONS)
+        while True:
+            rows = cursor.fetchmany(5000)
+            if not rows:
+                break
+            batch = []
+            for row in rows:
+                record = EvaluationRecord(row)
+                batch.append((row['cycle_id'], row['supplier_id'], row['evaluation_type'],
+                              record['scores'], record['feedback'], record))
+            # 汇总写入使用独立游标，避免打断正在读取的查询
+            self._apply_dimension_stats(cursor.connection.cursor(), batch)
+
+    def backfill_evaluation_attributes(self, cursor=None):
+        """由评分和反馈重新解析全部评估记录的派生属性（修改项目信息或案例的解析规则后需要执行）"""
+        if cursor is None:
+            self._write(self.backfill_evaluation_attributes)
+            return
+
+        assignments = ', '.join(f"{name} = ?" for name in EVALUATION_ATTRIBUTES)
+        last_id = 0
+        while True:
+            # 按ID分页读取，更新不影响后续分页
+            cursor.execute(queries.EVALUATION_ATTRIBUTE_PAGE, (last_id,))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            updates = []
+            for row in rows:
+                record = EvaluationRecord(row)
+                attributes = evaluation_attributes(row['evaluation_type'], record['scores'], record['feedback'])
+                updates.append((*(attributes[name] for name in EVALUATION_ATTRIBUTES), row['id']))
+            cursor.executemany(f"UPDATE evaluations SET {assignments} WHERE id = ?", updates)
+            last_id = rows[-1]['id']
+
+    def get_all_dimension_stats(self, cycle: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """读取维度汇总表，返回 {供应商名称: 汇总行列表}（未指定周期时合并全部周期）"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-
-            # 处理日期时间
-            eval_date = evaluation.evaluation_date
-            if isinstance(eval_date, datetime):
-                eval_date_str = eval_date.strftime('%Y-%m-%d %H:%M:%S')
+            if cycle is None:
+                cursor.execute(queries.DIMENSION_STATS)
             else:
-                eval_date_str = str(eval_date) if eval_date else datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-            cursor.execute('''
-                INSERT INTO evaluations
-                (supplier_id, evaluator_name, evaluator_dept, evaluator_phone,
-                 evaluation_type, evaluation_date, scores, feedback)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                evaluation.supplier_id,
-                evaluation.evaluator_name,
-                evaluation.evaluator_dept,
-                evaluation.evaluator_phone,
-                evaluation.evaluation_type,
-                eval_date_str,
-                json.dumps(evaluation.scores, ensure_ascii=False) if evaluation.scores else '{}',
-                json.dumps(evaluation.feedback, ensure_ascii=False) if evaluation.feedback else '{}'
-            ))
-            return cursor.lastrowid
-
-
+                cursor.execute(queries.DIMENSION_STATS_IN_CYCLE, (self._cycle_id(cursor, cycle),))
+            stats = {}
+            for row in cursor.fetchall():
+                stats.setdefault(row['supplier_name'], []).append(dict(row))
+            return stats
+
+    @staticmethod
+    def _cycle_name(evaluation_date: str) -> str:
+        """评估记录所属周期：配置了 EVALUATION_CYCLE 时使用配置，否则为评估日期所在年份"""
+        if Config.EVALUATION_CYCLE:
+            return Config.EVALUATION_CYCLE
+        year = (evaluation_date or '')[:4]
+        return year if year.isdigit() else datetime.now().strftime('%Y')
+
+    def _resolve_cycle_ids(self, cursor, cycle_names: List[str]) -> Dict[str, int]:
+        """在给定游标上解析周期ID，不存在的周期自动新建（不提交事务）"""
+        ids = {}
+        for name in set(cycle_names):
+            # 年度周期补充起止日期
+            start_date, end_date = (f"{name}-01-01", f"{name}-12-31") if name.isdigit() and len(name) == 4 \
+                else (None, None)
+            cursor.execute(
+                "INSERT OR IGNORE INTO cycles (name, start_date, end_date) VALUES (?, ?, ?)",
+                (name, start_date, end_date)
+            )
+            ids[name] = self._cycle_id(cursor, name)
+        return ids
+
+    @staticmethod
+    def _cycle_id(cursor, cycle: str) -> int:
+        """按名称查询周期ID，周期不存在时返回 -1（查询结果为空）"""
+        cursor.execute(queries.CYCLE_ID, (cycle,))
+        row = cursor.fetchone()
+        return row['id'] if row else -1
+
+    @staticmethod
+    def _format_evaluation_date(eval_date) -> str:
+        """将评估日期统一格式化为字符串"""
+        if isinstance(eval_date, datetime):
+            return eval_date.strftime('%Y-%m-%d %H:%M:%S')
+        return str(eval_date) if eval_date else datetime.now().strftime('%Y-%m-%d %H:%M:%S')
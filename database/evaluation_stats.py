@@ -0,0 +1,235 @@
+"""评估记录写库时的派生数据"""
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from utils.config import Config
+
+# 导入时由评分和反馈文本解析、存入评估记录表的派生属性
+EVALUATION_ATTRIBUTES = ('project_scale', 'project_complexity', 'has_rental', 'positive_impact', 'negative_impact')
+# 维度汇总表中记录样本量调整输入的伪维度
+SAMPLE_DIMENSION = '_sample'
+
+
+def evaluation_attributes(evaluation_type: str, scores: Dict, feedback: Dict) -> Dict:
+    """解析评估的派生属性（项目规模、复杂度、是否包含租摆服务、正负面案例影响等级）
+
+    只有物管处评估用到这些属性，职能部门评估全部为 None；没有案例（或无法识别等级）时影响等级为 None。
+    """
+    if evaluation_type != 'property':
+        return dict.fromkeys(EVALUATION_ATTRIBUTES)
+    return {
+        'project_scale': extract_project_info(scores, 'scale'),
+        'project_complexity': extract_project_info(scores, 'complexity'),
+        'has_rental': extract_project_info(scores, 'rental'),
+        'positive_impact': extract_impact_level(feedback.get('positive_case', '')) or None,
+        'negative_impact': extract_impact_level(feedback.get('negative_case', '')) or None
+    }
+
+
+def property_attributes(evaluation: Dict) -> Dict:
+    """物管处评估的派生属性：读取导入时写入的列，没有时（内存中的记录）由评分和反馈解析"""
+    if evaluation.get('project_scale') is not None:
+        return evaluation
+    return evaluation_attributes('property', evaluation.get('scores', {}), evaluation.get('feedback', {}))
+
+
+def feedback_adjustment(positive_impact: Optional[str], negative_impact: Optional[str]) -> float:
+    """按正负面案例的影响等级计算开放性反馈的加减分（限制在 ±0.5 以内）"""
+    adjustment = 0
+    if positive_impact in Config.POSITIVE_SCORES:
+        adjustment += Config.POSITIVE_SCORES[positive_impact]
+    if negative_impact in Config.NEGATIVE_SCORES:
+        adjustment += Config.NEGATIVE_SCORES[negative_impact]
+    return max(-0.5, min(0.5, adjustment))
+
+
+def score_property_evaluation(scores: Dict, feedback: Dict, attributes: Dict = None) -> Dict:
+    """计算单条物管处评估的维度得分、项目权重和调整后得分
+
+    attributes 为导入时写入的派生属性（见 evaluation_attributes），未提供时由评分和反馈解析。
+    除得分外还返回计算依据（派生属性、项目权重的组成、每个维度的作答数、因无租摆服务跳过的评分项），
+    供评分过程记录使用。
+    """
+    if attributes is None or attributes.get('project_scale') is None:
+        attributes = evaluation_attributes('property', scores, feedback)
+
+    # 计算项目权重
+    has_rental = bool(attributes['has_rental'])
+    scale_weight = Config.SCALE_WEIGHTS.get(attributes['project_scale'], 1)
+    complexity_weight = Config.COMPLEXITY_WEIGHTS.get(attributes['project_complexity'], 1)
+
+    # 计算各维度得分（未作答的维度计0分）
+    dimension_scores = {}
+    dimension_counts = {}
+    skipped = []
+    for dim_num in range(1, 9):
+        dim = f'dim{dim_num}'
+        dim_scores = []
+        for key, score in scores.items():
+            if key.startswith(f'{dim}_'):
+                # 特殊处理：dim1_3是租摆服务相关问题
+                if key == 'dim1_3' and not has_rental:
+                    skipped.append(key)
+                    continue
+                try:
+                    dim_scores.append(float(score))
+                except (TypeError, ValueError):
+                    continue
+
+        dimension_counts[dim] = len(dim_scores)
+        dimension_scores[dim] = np.mean(dim_scores) if dim_scores else 0
+
+    # 基础分（加权平均）与反馈调整，调整后得分限制在1-5分
+    base_score = sum(
+        dimension_scores.get(dim, 0) * Config.DIMENSION_WEIGHTS['property'].get(dim, 0)
+        for dim in dimension_scores
+    )
+    adjustment = feedback_adjustment(attributes['positive_impact'], attributes['negative_impact'])
+    adjusted_score = max(1, min(5, base_score + adjustment))
+
+    return {
+        'dimension_scores': dimension_scores,
+        'base_score': base_score,
+        'adjustment': adjustment,
+        'adjusted_score': adjusted_score,
+        'weight': scale_weight * complexity_weight,
+        'attributes': attributes,
+        'scale_weight': scale_weight,
+        'complexity_weight': complexity_weight,
+        'dimension_counts': dimension_counts,
+        'skipped': skipped
+    }
+
+
+def evaluation_statistics(evaluation_type: str, scores: Dict, feedback: Dict,
+                          attributes: Dict = None) -> List[Tuple[str, int, float, float, float]]:
+    """单条评估对维度汇总表的贡献：[(维度, n, weight_sum, value_sum, value_sq_sum)]
+
+    物管处：每个维度按项目权重加权（n 为评估数，未作答维度计0分，与逐条计算一致），
+            样本伪维度记录调整后得分的个数、和、平方和；
+    职能部门：每个维度为全部评分项（n 与 weight_sum 均为评分项数），
+            样本伪维度 n 为评估数，其余为全部评分项的个数、和、平方和。
+    """
+    if evaluation_type == 'property':
+        project_score = score_property_evaluation(scores, feedback, attributes)
+        weight = project_score['weight']
+        rows = [
+            (dim, 1, weight, value * weight, value * value * weight)
+            for dim, value in ((dim, float(value)) for dim, value in project_score['dimension_scores'].items())
+        ]
+        adjusted = float(project_score['adjusted_score'])
+        rows.append((SAMPLE_DIMENSION, 1, 1.0, adjusted, adjusted * adjusted))
+        return rows
+
+    dimension_values = defaultdict(list)
+    for key, score in scores.items():
+        if '_' in key:
+            dim = key.split('_')[0]
+            if dim.startswith('dim') and len(dim) == 4:
+                dimension_values[dim].append(float(score))
+
+    rows = [
+        (dim, len(values), float(len(values)), sum(values), sum(v * v for v in values))
+        for dim, values in dimension_values.items()
+    ]
+    all_values = [v for values in dimension_values.values() for v in values]
+    rows.append((SAMPLE_DIMENSION, 1, float(len(all_values)), sum(all_values), sum(v * v for v in all_values)))
+    return rows
+
+
+def extract_impact_level(case_text: str) -> str:
+    """从案例文本中提取影响程度等级"""
+    if not case_text:
+        return ''
+
+    # 案例格式: "类型,影响程度"
+    # 例如: "a) 专业技术类（如解决复杂植物问题）,a) 轻微正面影响"
+
+    # 简单方法：查找最后出现的 a) b) c) d)
+    case_lower = case_text.lower()
+
+    # 从后往前查找，找到第一个匹配的就返回
+    for i in range(len(case_lower) - 1, -1, -1):
+        if i > 0 and case_lower[i] == ')':
+            if case_lower[i - 1] in ['a', 'b', 'c', 'd']:
+                return case_lower[i - 1]
+
+    return ''
+
+
+def extract_project_info(scores: Dict, info_type: str) -> any:
+    """从评分数据中提取项目信息"""
+    if info_type == 'scale':
+        # 查找项目规模
+        scale_fields = [
+            '您的项目整体绿化预算/规模属于：',
+            '项目规模'
+        ]
+
+        for field in scale_fields:
+            if field in scores:
+                value = str(scores[field]).strip()
+                # 处理可能的格式：A.小型, B.中型, C.大型 或直接 A, B, C
+                if '.' in value:
+                    return value.split('.')[0].upper()
+                elif value.upper() in ['A', 'B', 'C']:
+                    return value.upper()
+                # 处理中文
+                elif '小' in value:
+                    return 'A'
+                elif '中' in value:
+                    return 'B'
+                elif '大' in value:
+                    return 'C'
+
+        return 'B'  # 默认中型
+
+    elif info_type == 'complexity':
+        # 查找项目复杂度
+        complexity_fields = [
+            '您所负责项目的绿化复杂度属于：',
+            '项目复杂度'
+        ]
+
+        for field in complexity_fields:
+            if field in scores:
+                value = str(scores[field]).strip()
+                if '.' in value:
+                    return value.split('.')[0].upper()
+                elif value.upper() in ['A', 'B', 'C']:
+                    return value.upper()
+                # 处理中文
+                elif '低' in value:
+                    return 'A'
+                elif '中' in value:
+                    return 'B'
+                elif '高' in value:
+                    return 'C'
+
+        return 'B'  # 默认中等复杂度
+
+    elif info_type == 'rental':
+        # 查找是否包含租摆服务
+        rental_fields = [
+            '贵项目是否包含绿化租摆服务？',
+            '是否包含租摆服务'
+        ]
+
+        for field in rental_fields:
+            if field in scores:
+                value = str(scores[field]).strip().upper()
+                # 处理可能的格式：A.是, B.否 或 A, B 或 是, 否
+                if 'A' in value or '是' in value:
+                    return True
+                elif 'B' in value or '否' in value:
+                    return False
+
+        # 如果dim1_3有非零评分，说明有租摆服务
+        if 'dim1_3' in scores:
+            try:
+                score_value = float(scores.get('dim1_3', 0))
+                return score_value > 0
+            except:
+                pass
+
+        return False
@@ -1,7 +1,10 @@
 """数据模型定义"""
+import json
+from collections.abc import Mapping
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional, List, Dict
+from .score_codec import decode_scores
 
 @dataclass
 class Supplier:
@@ -42,3 +45,59 @@ class SupplierService:
     project_names: str = ""  # 项目名称列表，逗号分隔
     project_ratio: float = 0.0  # 项目占比
     remarks: str = ""  # 备注
+
+class EvaluationRecord(Mapping):
+    """数据库读出的评估记录（只读映射，用法与 dict 相同）
+
+    包装 sqlite3.Row，scores / feedback 在首次访问时才解码并缓存，
+    只用到评分的计算不会为反馈字段付出解码开销。
+    """
+    __slots__ = ('_row', '_scores', '_feedback')
+
+    def __init__(self, row):
+        self._row = row
+        self._scores = None
+        self._feedback = None
+
+    def __getitem__(self, key):
+        if key == 'scores':
+            if self._scores is None:
+                self._scores = self._decode('scores')
+            return self._scores
+        if key == 'feedback':
+            if self._feedback is None:
+                self._feedback = self._decode('feedback')
+            return self._feedback
+        try:
+            return self._row[key]
+        except IndexError:
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        return iter(self._row.keys())
+
+    def __len__(self):
+        return len(self._row)
+
+    def __contains__(self, key):
+        return key in self._row.keys()
+
+    def __repr__(self):
+        return f"EvaluationRecord(id={self._row['id']!r}, type={self._row['evaluation_type']!r})"
+
+    def packed_scores(self) -> Optional[bytes]:
+        """打包编码的评分原值（见 score_codec），评分为 JSON 文本或未读取时返回 None"""
+        value = self._row['scores']
+        return value if isinstance(value, bytes) else None
+
+    def to_dict(self) -> Dict:
+        """转换为普通字典（会解码 scores / feedback）"""
+        return {key: self[key] for key in self}
+
+    def _decode(self, field: str) -> Dict:
+        value = self._row[field]
+        try:
+            return decode_scores(value) if field == 'scores' else (json.loads(value) if value else {})
+        except (ValueError, KeyError, IndexError) as e:
+            print(f"  警告: 解析评估记录{self._row['id']}的{field}失败: {e}")
+            return {}
@@ -0,0 +1,200 @@
+"""系统执行的查询语句
+
+调用处与 QUERY_CATALOG（explain 命令检查执行计划的查询清单）共用这里的语句，
+修改查询时清单随之更新。含 IN 列表或可选条件的语句由函数生成。
+"""
+from itertools import product
+from typing import List, Sequence, Tuple
+
+from .evaluation_stats import EVALUATION_ATTRIBUTES
+
+# evaluations 表的全部列（按迁移后的结构）
+EVALUATION_COLUMNS = (
+    'id', 'supplier_id', 'evaluator_name', 'evaluator_dept', 'evaluator_phone',
+    'evaluation_type', 'evaluation_date', 'scores', 'feedback', 'cycle_id', *EVALUATION_ATTRIBUTES
+)
+
+# 每条 IN 列表查询的最多参数个数
+IN_BATCH_SIZE = 500
+
+
+def _placeholders(count: int) -> str:
+    return ','.join('?' * count)
+
+
+# 供应商
+SUPPLIER_DIRECTORY = "SELECT id, name, service_area FROM suppliers"
+SUPPLIER_BY_NAME = "SELECT id, service_area FROM suppliers WHERE name = ?"
+ALL_SUPPLIERS = "SELECT name, service_area FROM suppliers"
+ALL_SUPPLIERS_IN_CYCLE = '''
+    SELECT s.name, s.service_area
+    FROM suppliers s
+    WHERE EXISTS (SELECT 1 FROM evaluations e WHERE e.cycle_id = ? AND e.supplier_id = s.id)
+    ORDER BY s.id
+'''
+SUPPLIERS_BY_AREA = "SELECT name FROM suppliers WHERE service_area = ?"
+SUPPLIERS_BY_AREA_IN_CYCLE = '''
+    SELECT s.name
+    FROM suppliers s
+    WHERE s.service_area = ?
+      AND EXISTS (SELECT 1 FROM evaluations e WHERE e.cycle_id = ? AND e.supplier_id = s.id)
+    ORDER BY s.id
+'''
+
+
+def suppliers_by_names(count: int) -> str:
+    """按名称批量查供应商（count 个名称参数）"""
+    return f"SELECT id, name, service_area FROM suppliers WHERE name IN ({_placeholders(count)})"
+
+
+# 供应商服务情况
+SUPPLIER_SERVICE_BY_NAME = '''
+    SELECT ss.*
+    FROM supplier_services ss
+    JOIN suppliers s ON ss.supplier_id = s.id
+    WHERE s.name = ?
+'''
+ALL_SUPPLIER_SERVICES = '''
+    SELECT s.name, s.service_area, ss.*
+    FROM suppliers s
+    LEFT JOIN supplier_services ss ON s.id = ss.supplier_id
+    ORDER BY s.name
+'''
+
+# 评估周期
+CYCLES = "SELECT id, name, start_date, end_date FROM cycles ORDER BY id"
+CYCLE_ID = "SELECT id FROM cycles WHERE name = ?"
+
+# 评估记录
+SUPPLIER_EVALUATIONS = '''
+    SELECT e.*, s.name as supplier_name, s.service_area
+    FROM evaluations e
+    JOIN suppliers s ON e.supplier_id = s.id
+    WHERE s.id = ?
+    ORDER BY e.id
+'''
+SUPPLIER_EVALUATIONS_IN_CYCLE = '''
+    SELECT e.*, s.name as supplier_name, s.service_area
+    FROM evaluations e
+    JOIN suppliers s ON e.supplier_id = s.id
+    WHERE s.id = ? AND e.cycle_id = ?
+    ORDER BY e.id
+'''
+EVALUATIONS_BY_SUPPLIER_AND_TYPE = '''
+    SELECT e.*, s.name as supplier_name
+    FROM evaluations e
+    JOIN suppliers s ON e.supplier_id = s.id
+    ORDER BY s.name, e.evaluation_type
+'''
+EVALUATIONS_BY_SUPPLIER_NAME = '''
+    SELECT * FROM evaluations e
+    JOIN suppliers s ON e.supplier_id = s.id
+    WHERE s.name = ?
+'''
+ALL_EVALUATIONS = "SELECT * FROM evaluations ORDER BY id"
+EVALUATION_ATTRIBUTE_PAGE = \
+    "SELECT id, evaluation_type, scores, feedback FROM evaluations WHERE id > ? ORDER BY id LIMIT 5000"
+NEXT_EVALUATION_ID = '''
+    SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'evaluations'), 0),
+               COALESCE((SELECT MAX(id) FROM evaluations), 0)) + 1
+'''
+
+
+def grouped_evaluations(with_scores: bool = True, by_cycle: bool = False, by_supplier_names: bool = False) -> str:
+    """按供应商分组读取评估记录（可选按周期ID、按供应商名称 JSON 数组过滤）
+
+    with_scores=False 时不读取评分字段（scores 列为 NULL）。
+    """
+    if with_scores:
+        columns = "e.*"
+    else:
+        columns = ', '.join('NULL AS scores' if name == 'scores' else f"e.{name}" for name in EVALUATION_COLUMNS)
+
+    conditions = []
+    if by_cycle:
+        conditions.append("e.cycle_id = ?")
+    if by_supplier_names:
+        conditions.append("s.name IN (SELECT value FROM json_each(?))")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    return f'''
+        SELECT {columns}, s.name as supplier_name, s.service_area
+        FROM evaluations e
+        JOIN suppliers s ON e.supplier_id = s.id
+        {where}
+        ORDER BY e.supplier_id, e.id
+    '''
+
+
+def evaluations_by_ids(count: int) -> str:
+    """按ID批量读取评估记录（count 个ID参数）"""
+    return f"SELECT * FROM evaluations WHERE id IN ({_placeholders(count)})"
+
+
+# 维度汇总表
+DIMENSION_STATS = '''
+    SELECT s.name AS supplier_name, st.supplier_id, st.evaluation_type, st.dimension,
+           SUM(st.n) AS n, SUM(st.weight_sum) AS weight_sum,
+           SUM(st.value_sum) AS value_sum, SUM(st.value_sq_sum) AS value_sq_sum
+    FROM supplier_dimension_stats st
+    JOIN suppliers s ON s.id = st.supplier_id
+    GROUP BY st.supplier_id, st.evaluation_type, st.dimension
+    ORDER BY st.supplier_id
+'''
+DIMENSION_STATS_IN_CYCLE = '''
+    SELECT s.name AS supplier_name, st.*
+    FROM supplier_dimension_stats st
+    JOIN suppliers s ON s.id = st.supplier_id
+    WHERE st.cycle_id = ?
+    ORDER BY st.supplier_id
+'''
+
+# 维度均值视图（供临时分析查询使用）
+SUPPLIER_DIMENSION_MEANS = "SELECT * FROM supplier_dimension_means WHERE supplier_id = ?"
+SUPPLIER_CYCLE_DIMENSION_MEANS = "SELECT * FROM supplier_cycle_dimension_means WHERE cycle_id = ? AND supplier_id = ?"
+
+# 导入台账
+IMPORTED_FILE = "SELECT * FROM import_files WHERE file_path = ?"
+
+
+def ledger_rows(count: int) -> str:
+    """按源文件和行标识批量查询导入台账（文件路径 + count 个行标识参数）"""
+    return (f"SELECT row_key, content_hash, evaluation_id FROM import_ledger "
+            f"WHERE source_file = ? AND row_key IN ({_placeholders(count)})")
+
+
+# 系统执行的全部查询：(名称, 语句, 示例参数)，IN 列表按单个参数展开
+QUERY_CATALOG: List[Tuple[str, str, Sequence]] = [
+    ('供应商目录加载', SUPPLIER_DIRECTORY, ()),
+    ('按名称查供应商', SUPPLIER_BY_NAME, ('',)),
+    ('按名称批量查供应商', suppliers_by_names(1), ('',)),
+    ('全部供应商', ALL_SUPPLIERS, ()),
+    ('周期内供应商', ALL_SUPPLIERS_IN_CYCLE, (0,)),
+    ('按地区查供应商', SUPPLIERS_BY_AREA, ('市内',)),
+    ('周期内按地区查供应商', SUPPLIERS_BY_AREA_IN_CYCLE, ('市内', 0)),
+    ('供应商服务情况', SUPPLIER_SERVICE_BY_NAME, ('',)),
+    ('全部供应商服务情况', ALL_SUPPLIER_SERVICES, ()),
+    ('评估周期', CYCLES, ()),
+    ('按名称查周期', CYCLE_ID, ('',)),
+    ('供应商评估记录', SUPPLIER_EVALUATIONS, (0,)),
+    ('周期内供应商评估记录', SUPPLIER_EVALUATIONS_IN_CYCLE, (0, 0)),
+    *(
+        (f"{'周期内' if by_cycle else ''}{'指定供应商' if by_supplier_names else '全部'}评估记录"
+         f"（按供应商分组{'' if with_scores else '，不含评分'}）",
+         grouped_evaluations(with_scores, by_cycle, by_supplier_names),
+         (0,) * by_cycle + ('[]',) * by_supplier_names)
+        for by_cycle, by_supplier_names, with_scores in product((False, True), repeat=3)
+    ),
+    ('全部评估记录（按供应商、类型排序）', EVALUATIONS_BY_SUPPLIER_AND_TYPE, ()),
+    ('按名称查评估记录', EVALUATIONS_BY_SUPPLIER_NAME, ('',)),
+    ('按ID批量读取评估记录', evaluations_by_ids(1), (0,)),
+    ('重建维度汇总表', ALL_EVALUATIONS, ()),
+    ('回填派生属性（分页）', EVALUATION_ATTRIBUTE_PAGE, (0,)),
+    ('预留评估记录ID', NEXT_EVALUATION_ID, ()),
+    ('维度汇总表（全部周期）', DIMENSION_STATS, ()),
+    ('维度汇总表（单个周期）', DIMENSION_STATS_IN_CYCLE, (0,)),
+    ('供应商维度均值视图', SUPPLIER_DIMENSION_MEANS, (0,)),
+    ('供应商周期维度均值视图', SUPPLIER_CYCLE_DIMENSION_MEANS, (0, 0)),
+    ('导入台账', ledger_rows(1), ('', '')),
+    ('已导入文件', IMPORTED_FILE, ('',)),
+]
@@ -0,0 +1,89 @@
+"""评分紧凑编码"""
+import json
+import numpy as np
+from typing import Dict, List, Optional, Union
+from data_processing.questionnaire_schema import FUNCTIONAL_SCORE_COLUMNS, PROPERTY_SCORE_COLUMNS
+from utils.config import Config
+
+# 编码格式版本（blob 第1字节）
+FORMAT_VERSION = 1
+# 缺失值标记
+MISSING = 255
+
+# 评分项布局（blob 第2字节为布局编号），只追加不修改，已写入的数据依赖既有编号
+SCORE_LAYOUTS = {
+    1: tuple(PROPERTY_SCORE_COLUMNS),
+    2: tuple(FUNCTIONAL_SCORE_COLUMNS)
+}
+LAYOUT_BY_TYPE = {
+    'property': 1,
+    'functional': 2
+}
+_ITEM_INDEX = {
+    layout_id: {item: i for i, item in enumerate(items)}
+    for layout_id, items in SCORE_LAYOUTS.items()
+}
+
+
+def encode_scores(scores: Dict[str, float], evaluation_type: str) -> Optional[bytes]:
+    """按问卷布局将评分打包为 uint8 数组
+
+    blob = [格式版本, 布局编号, 各评分项的值...]，未作答为 255。
+    评分项不在布局内或值不是 0-254 的整数时返回 None，由调用方退回 JSON 文本。
+    """
+    layout_id = LAYOUT_BY_TYPE.get(evaluation_type)
+    if layout_id is None:
+        return None
+
+    index = _ITEM_INDEX[layout_id]
+    values = np.full(len(index), MISSING, dtype=np.uint8)
+    for item, value in scores.items():
+        position = index.get(item)
+        if position is None:
+            return None
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+        if not number.is_integer() or not 0 <= number < MISSING:
+            return None
+        values[position] = int(number)
+
+    return bytes((FORMAT_VERSION, layout_id)) + values.tobytes()
+
+
+def decode_score_row(data: bytes) -> np.ndarray:
+    """将打包的评分解码为按布局排列的 float 数组（缺失为 NaN）"""
+    return decode_score_rows([data])[0]
+
+
+def decode_score_rows(blobs: List[bytes]) -> np.ndarray:
+    """将同一布局的多条打包评分一次解码为 记录数 × 评分项 的 float 数组（缺失为 NaN）"""
+    data = np.frombuffer(b''.join(blobs), dtype=np.uint8).reshape(len(blobs), -1)
+    versions = np.unique(data[:, 0])
+    if (versions != FORMAT_VERSION).any():
+        raise ValueError(f"不支持的评分编码版本: {versions[versions != FORMAT_VERSION][0]}")
+    values = data[:, 2:].astype(float)
+    values[values == MISSING] = np.nan
+    return values
+
+
+def decode_scores(value: Union[bytes, str, None]) -> Dict[str, float]:
+    """解码评分字段：打包的 blob 或 JSON 文本均可"""
+    if not value:
+        return {}
+    if isinstance(value, str):
+        return json.loads(value)
+
+    items = SCORE_LAYOUTS[value[1]]
+    row = decode_score_row(value)
+    return {item: score for item, score in zip(items, row.tolist()) if score == score}
+
+
+def serialize_scores(scores: Dict[str, float], evaluation_type: str) -> Union[bytes, str]:
+    """按 Config.SCORE_ENCODING 序列化评分，无法打包时退回 JSON 文本"""
+    if Config.SCORE_ENCODING == 'PACKED' and scores:
+        packed = encode_scores(scores, evaluation_type)
+        if packed is not None:
+            return packed
+    return json.dumps(scores, ensure_ascii=False) if scores else '{}'
@@ -0,0 +1,152 @@
+"""供应商目录缓存"""
+import threading
+from typing import Dict, Optional
+
+from . import queries
+
+
+class SupplierDirectory:
+    """进程内供应商目录：名称 -> ID / 服务地区
+
+    首次使用时用一条查询预加载全部供应商，之后按名称 O(1) 解析ID；
+    未出现过的供应商批量新增，服务地区只在确有变化时才写库。
+    所有写操作都在调用方的事务内完成：事务内解析到的变化先暂存在当前线程，
+    调用方提交事务后执行 publish() 才对其他线程的 lookup() 可见，事务失败时执行 invalidate()。
+    """
+
+    def __init__(self):
+        # 已提交的目录，由 _lock 保护
+        self._ids: Dict[str, int] = {}
+        self._areas: Dict[str, str] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        # 各写线程未提交事务内的变化
+        self._local = threading.local()
+
+    def load(self, cursor):
+        """一次性加载全部供应商（暂存，提交后整体替换已提交的目录）"""
+        cursor.execute(queries.SUPPLIER_DIRECTORY)
+        pending = self._pending()
+        pending['ids'] = {}
+        pending['areas'] = {}
+        for row in cursor.fetchall():
+            pending['ids'][row['name']] = row['id']
+            pending['areas'][row['name']] = row['service_area']
+        pending['reload'] = True
+
+    def publish(self):
+        """调用方事务提交后发布当前线程暂存的变化"""
+        pending = self._pending()
+        with self._lock:
+            if pending['reload']:
+                self._ids = {}
+                self._areas = {}
+                self._loaded = True
+            self._ids.update(pending['ids'])
+            self._areas.update(pending['areas'])
+        self._local.pending = None
+
+    def invalidate(self):
+        """清空缓存（含当前线程暂存的变化），下次使用时重新加载"""
+        self._local.pending = None
+        with self._lock:
+            self._ids = {}
+            self._areas = {}
+            self._loaded = False
+
+    def lookup(self, name: str, service_area: Optional[str] = None) -> Optional[int]:
+        """仅查已提交的缓存：供应商已知（且服务地区一致）时返回ID，否则返回 None"""
+        with self._lock:
+            supplier_id = self._ids.get(name)
+            area = self._areas.get(name)
+        if supplier_id is None:
+            return None
+        if service_area is not None and area != service_area:
+            return None
+        return supplier_id
+
+    def get_id(self, cursor, name: str) -> Optional[int]:
+        """按名称获取供应商ID（不新增）"""
+        if not self._is_loaded():
+            self.load(cursor)
+        supplier_id = self._id(name)
+        if supplier_id is None:
+            # 缓存未命中时回查一次，兼容其他进程新增的供应商
+            cursor.execute(queries.SUPPLIER_BY_NAME, (name,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            supplier_id = self._stage(name, row['id'], row['service_area'])
+        return supplier_id
+
+    def resolve_many(self, cursor, service_areas: Dict[str, str]) -> Dict[str, int]:
+        """批量解析供应商ID（不提交事务）
+
+        service_areas 为 {供应商名称: 服务地区}；未知供应商批量新增，
+        服务地区与缓存不一致的供应商批量更新。返回 {供应商名称: ID}。
+        """
+        if not self._is_loaded():
+            self.load(cursor)
+
+        unseen = [(name, area) for name, area in service_areas.items() if self._id(name) is None]
+        if unseen:
+            cursor.executemany(
+                "INSERT OR IGNORE INTO suppliers (name, service_area) VALUES (?, ?)",
+                unseen
+            )
+            names = [name for name, _ in unseen]
+            for start in range(0, len(names), queries.IN_BATCH_SIZE):
+                batch = names[start:start + queries.IN_BATCH_SIZE]
+                cursor.execute(queries.suppliers_by_names(len(batch)), batch)
+                for row in cursor.fetchall():
+                    self._stage(row['name'], row['id'], row['service_area'])
+            print(f"  新增供应商: {', '.join(names)}")
+
+        ids = {name: self._id(name) for name in service_areas}
+        changed = [(area, ids[name]) for name, area in service_areas.items() if self._area(name) != area]
+        if changed:
+            cursor.executemany("UPDATE suppliers SET service_area = ? WHERE id = ?", changed)
+            for name, area in service_areas.items():
+                self._stage(name, ids[name], area)
+
+        return ids
+
+    def set_area(self, name: str, service_area: str):
+        """同步缓存中的服务地区（供应商地区在外部被更新并提交后调用）"""
+        with self._lock:
+            if name in self._ids:
+                self._areas[name] = service_area
+
+    def _pending(self) -> Dict:
+        pending = getattr(self._local, 'pending', None)
+        if pending is None:
+            pending = self._local.pending = {'ids': {}, 'areas': {}, 'reload': False}
+        return pending
+
+    def _stage(self, name: str, supplier_id: int, service_area: str) -> int:
+        pending = self._pending()
+        pending['ids'][name] = supplier_id
+        pending['areas'][name] = service_area
+        return supplier_id
+
+    def _is_loaded(self) -> bool:
+        return self._pending()['reload'] or self._loaded
+
+    def _id(self, name: str) -> Optional[int]:
+        """写线程视角的ID：当前事务内暂存的优先，其次为已提交的"""
+        pending = self._pending()
+        if name in pending['ids']:
+            return pending['ids'][name]
+        if pending['reload']:
+            return None
+        with self._lock:
+            return self._ids.get(name)
+
+    def _area(self, name: str) -> Optional[str]:
+        pending = self._pending()
+        if name in pending['areas']:
+            return pending['areas'][name]
+        if pending['reload']:
+            return None
+        with self._lock:
+            return self._areas.get(name)
@@ -0,0 +1,118 @@
+"""单写线程写入队列"""
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, List, Tuple
+from utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+# 停止写线程的哨兵
+_STOP = object()
+
+
+class WriteQueue:
+    """专用写线程：按提交顺序执行写操作，把排队中的多个写操作合并为一个事务提交
+
+    写操作为 job(cursor)，在写线程自己的连接上执行（不提交事务）；事务以 BEGIN IMMEDIATE
+    开始，写锁被其他进程占用时按 SQLITE_BUSY_TIMEOUT 等待。组内每个写操作用 SAVEPOINT 隔离，
+    单个写操作失败只回滚它自己，异常交给对应的 Future，同组其他写操作照常提交。
+    Future 在事务提交后才完成，调用方拿到结果时数据已对其他连接可见。
+    """
+
+    def __init__(self, db_manager, batch_size: int = None, batch_delay: float = None,
+                 max_pending: int = None):
+        self.db_manager = db_manager
+        self.batch_size = batch_size or Config.WRITE_BATCH_SIZE
+        self.batch_delay = Config.WRITE_BATCH_DELAY if batch_delay is None else batch_delay
+        # 队列有上限：写库跟不上时提交方等待，避免排队的数据块占满内存
+        self._queue = queue.Queue(maxsize=max_pending or Config.WRITE_QUEUE_MAX_PENDING)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, job: Callable) -> Future:
+        """提交写操作，返回在事务提交后完成的 Future"""
+        if self._closed:
+            raise RuntimeError("写入队列已关闭")
+        if threading.current_thread() is self._thread:
+            # 写操作内部再提交写操作会永远等不到自己所在的事务提交
+            raise RuntimeError("不能在写线程内提交写操作")
+        future = Future()
+        self._queue.put((job, future))
+        return future
+
+    def close(self):
+        """处理完已排队的写操作后停止写线程"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+
+            # 合并已排队（以及 batch_delay 内到达）的写操作
+            group = [item]
+            stop = False
+            while len(group) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=self.batch_delay) if self.batch_delay > 0 \
+                        else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                group.append(item)
+
+            self._commit_group(group)
+            if stop:
+                return
+
+    def _commit_group(self, group: List[Tuple[Callable, Future]]):
+        """在一个事务内执行一组写操作，提交后再完成各自的 Future"""
+        conn = self.db_manager._get_connection()
+        cursor = conn.cursor()
+        outcomes = []
+        failed = False
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            for job, future in group:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                cursor.execute("SAVEPOINT write_job")
+                try:
+                    outcomes.append((future, job(cursor), None))
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO write_job")
+                    outcomes.append((future, None, e))
+                    failed = True
+                cursor.execute("RELEASE write_job")
+            conn.commit()
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            self.db_manager.supplier_directory.invalidate()
+            for _, future in group:
+                if future.running():
+                    future.set_exception(e)
+            return
+
+        if failed:
+            # 回滚的写操作暂存的供应商目录变化无法与同组其他写操作区分，整体清空
+            self.db_manager.supplier_directory.invalidate()
+        else:
+            self.db_manager.supplier_directory.publish()
+        logger.debug("写线程提交事务: %d 个写操作", len(outcomes))
+
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
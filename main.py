@@ -1,14 +1,23 @@
 """主程序入口"""
+import argparse
+import logging
 import os
 import json
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from collections import defaultdict
 from data_processing.service_info_processor import ServiceInfoProcessor
+from database import queries
 from database.db_manager import DatabaseManager
+from database.score_codec import decode_scores
 from data_processing.questionnaire_parser import QuestionnaireParser
 from data_processing.excel_processor import ExcelProcessor
+from data_processing.incremental_scorer import IncrementalScorer
+from data_processing.directory_importer import DirectoryImporter
+from data_processing.json_response_importer import JsonResponseImporter
+from data_processing.parse_cache import ParseCache
 from data_processing.score_calculator import ScoreCalculator
+from data_processing.score_trace import ScoreTrace
 from visualization.radar_chart import RadarChartGenerator
 from visualization.word_cloud import WordCloudGenerator
 from visualization.report_generator import ReportGenerator
@@ -25,6 +34,8 @@ class SupplierEvaluationSystem:
         self.wordcloud_generator = WordCloudGenerator()
         self.report_generator = ReportGenerator()
         self.service_info_processor = ServiceInfoProcessor(self.db_manager)
+        self.directory_importer = DirectoryImporter(self.excel_processor)
+        self.json_response_importer = JsonResponseImporter(self.excel_processor)
 
     def load_questionnaires(self, property_json_path: str, functional_json_path: str):
         """加载问卷JSON文件"""
@@ -58,12 +69,37 @@ class SupplierEvaluationSystem:
 
         print("数据导入完成")
 
-    def analyze_supplier(self, supplier_name: str, service_area: str = None) -> Dict:
-        """分析单个供应商"""
+    def import_data_directory(self, data_dir: str):
+        """按目录导入全部评估工作簿"""
+        print("正在按目录导入Excel数据...")
+        self.directory_importer.import_directory(data_dir)
+        print("数据导入完成")
+
+    def import_json_responses(self, questionnaire_json_path: str, responses_path: str):
+        """按问卷结构导入JSON/JSONL答卷"""
+        print("正在导入问卷答卷...")
+
+        with open(questionnaire_json_path, 'r', encoding='utf-8') as f:
+            questionnaire = json.load(f)
+
+        structure = self.questionnaire_parser.parse_questionnaire(questionnaire)
+        self.json_response_importer.import_responses(responses_path, structure)
+        print("数据导入完成")
+
+    def analyze_supplier(self, supplier_name: str, service_area: str = None,
+                         evaluations: List[Dict] = None, dimension_stats: List[Dict] = None,
+                         supplier_score: Dict = None) -> Dict:
+        """分析单个供应商
+
+        evaluations 为已加载的评估记录，未提供时从数据库读取；
+        提供 dimension_stats（维度汇总行）时维度得分直接由汇总表计算；
+        提供 supplier_score（score_all 返回的该供应商得分）时直接使用，不再单独计算。
+        """
         print(f"\n正在分析供应商: {supplier_name}")
 
         # 获取评估数据
-        evaluations = self.db_manager.get_supplier_evaluations(supplier_name)
+        if evaluations is None:
+            evaluations = self.db_manager.get_supplier_evaluations(supplier_name, cycle=Config.REPORT_CYCLE)
 
         if not evaluations:
             print(f"警告: 未找到供应商 {supplier_name} 的评估数据")
@@ -73,48 +109,36 @@ class SupplierEvaluationSystem:
         if not service_area and evaluations:
             service_area = evaluations[0].get('service_area', '未知')
 
-        # 计算维度得分
-        dimension_scores = self.score_calculator.calculate_dimension_scores(evaluations)
+        # 需要记录评分过程时单独计算（批量计算的结果不含逐条评估的过程）
+        trace = self._score_trace(supplier_name)
+        if supplier_score is not None and trace is None:
+            # 批量计算（score_all）的结果
+            dimension_scores = supplier_score['dimension_scores']
+            total_score = supplier_score['total_score']
+            property_score = supplier_score['property_score']
+            functional_score = supplier_score['functional_score']
+        else:
+            # 计算维度得分
+            if dimension_stats is not None:
+                dimension_scores = self.score_calculator.calculate_dimension_scores_from_stats(dimension_stats, trace)
+            else:
+                dimension_scores = self.score_calculator.calculate_dimension_scores(evaluations, trace)
 
-        # 计算综合得分
-        total_score = self.score_calculator.calculate_weighted_score(dimension_scores)
+            # 计算综合得分
+            total_score = self.score_calculator.calculate_weighted_score(dimension_scores, trace)
 
-        # 分别计算物管处和职能部门得分
-        property_score = 0
-        functional_score = 0
+            # 分别计算物管处和职能部门得分
+            property_score = self.score_calculator.calculate_type_score(dimension_scores['property'], 'property')
+            functional_score = self.score_calculator.calculate_type_score(dimension_scores['functional'], 'functional')
 
         if dimension_scores['property']:
-            # 计算物管处的加权平均分
-            weighted_sum = 0
-            weight_sum = 0
-
-            for dim, score in dimension_scores['property'].items():
-                if dim in self.config.DIMENSION_WEIGHTS['property']:
-                    dim_weight = self.config.DIMENSION_WEIGHTS['property'][dim]
-                    weighted_sum += score * dim_weight
-                    weight_sum += dim_weight
-
-            if weight_sum > 0:
-                property_score = (weighted_sum / weight_sum / 5) * 100
-
             print(f"物管处得分: {property_score:.2f}")
-
         if dimension_scores['functional']:
-            # 计算职能部门的加权平均分
-            weighted_sum = 0
-            weight_sum = 0
-
-            for dim, score in dimension_scores['functional'].items():
-                if dim in self.config.DIMENSION_WEIGHTS['functional']:
-                    dim_weight = self.config.DIMENSION_WEIGHTS['functional'][dim]
-                    weighted_sum += score * dim_weight
-                    weight_sum += dim_weight
-
-            if weight_sum > 0:
-                functional_score = (weighted_sum / weight_sum / 5) * 100
-
             print(f"职能部门得分: {functional_score:.2f}")
 
+        if trace is not None:
+            self._output_score_trace(trace)
+
         # 收集反馈信息
         positive_feedbacks = []
         negative_feedbacks = []
@@ -159,13 +183,31 @@ class SupplierEvaluationSystem:
             'negative_feedbacks': negative_feedbacks,
             'radar_chart_path': radar_path,
             'wordcloud_path': wordcloud_path,
-            'evaluation_count': len(evaluations)
+            'evaluation_count': len(evaluations),
+            'score_trace': trace
         }
 
         print(f"供应商 {supplier_name}({service_area}) 分析完成，综合得分: {total_score:.2f}")
 
         return analysis_result
 
+    def _score_trace(self, supplier_name: str) -> Optional[ScoreTrace]:
+        """按 SCORE_TRACE 配置为需要记录评分过程的供应商创建记录"""
+        targets = Config.SCORE_TRACE
+        if targets is None or (targets != 'ALL' and supplier_name not in targets):
+            return None
+        return ScoreTrace(supplier_name)
+
+    def _output_score_trace(self, trace: ScoreTrace):
+        """按 SCORE_TRACE_FORMAT 输出评分过程"""
+        if Config.SCORE_TRACE_FORMAT == 'JSON':
+            trace_path = os.path.join(self.config.SCORE_TRACE_DIR, f'{trace.subject}_评分过程.json')
+            with open(trace_path, 'w', encoding='utf-8') as f:
+                f.write(trace.render_json())
+            print(f"评分过程已保存: {trace_path}")
+        else:
+            print(trace.render_text())
+
     def import_service_info(self, excel_path: str):
         """导入供应商服务情况"""
         if os.path.exists(excel_path):
@@ -175,10 +217,24 @@ class SupplierEvaluationSystem:
 
     def generate_all_reports(self):
         """生成所有供应商报告"""
+        if not Config.REPORT_SNAPSHOT:
+            return self._generate_all_reports(self.db_manager)
+
+        # 整个生成过程读取同一份快照，排名与各供应商报告基于一致的数据
+        with self.db_manager.open_snapshot() as snapshot:
+            return self._generate_all_reports(snapshot)
+
+    def _generate_all_reports(self, db_manager: DatabaseManager):
+        """基于给定数据库（快照或在用数据库）生成所有供应商报告"""
         print("\n开始生成供应商评估报告...")
 
+        # 报告周期（None 表示全部历史记录）
+        cycle = Config.REPORT_CYCLE
+        if cycle is not None:
+            print(f"评估周期: {cycle}")
+
         # 获取所有供应商
-        suppliers_with_area = self.db_manager.get_all_suppliers()
+        suppliers_with_area = db_manager.get_all_suppliers(cycle=cycle)
 
         if not suppliers_with_area:
             print("错误: 数据库中没有供应商数据")
@@ -188,8 +244,25 @@ class SupplierEvaluationSystem:
         all_results = {}
         results_by_area = defaultdict(dict)
 
-        for supplier_name, service_area in suppliers_with_area:
-            result = self.analyze_supplier(supplier_name, service_area)
+        # 维度得分来源为汇总表时一次读取全部供应商的汇总行
+        all_stats = None
+        if Config.DIMENSION_SCORE_SOURCE == 'STATS':
+            all_stats = db_manager.get_all_dimension_stats(cycle=cycle)
+
+        # 一次查询读取全部评估记录，按供应商分组（得分来自汇总表时不读取评分字段，只读取报告用到的反馈等字段）
+        evaluations_by_supplier = dict(db_manager.iter_supplier_evaluations(cycle=cycle, with_scores=all_stats is None))
+
+        # 矩阵计算时一次算出全部供应商的得分
+        all_scores = None
+        if all_stats is None and Config.SCORING_ENGINE != 'LOOP':
+            all_scores = self.score_calculator.score_all(evaluations_by_supplier)
+
+        for supplier_name, evaluations in evaluations_by_supplier.items():
+            service_area = evaluations[0]['service_area']
+            dimension_stats = all_stats.get(supplier_name, []) if all_stats is not None else None
+            supplier_score = all_scores[supplier_name] if all_scores is not None else None
+            result = self.analyze_supplier(supplier_name, service_area, evaluations, dimension_stats,
+                                           supplier_score)
             if result:
                 all_results[supplier_name] = result
                 results_by_area[service_area][supplier_name] = result
@@ -268,7 +341,7 @@ class SupplierEvaluationSystem:
                 rankings_by_area_with_info,
                 total_rankings_with_area,
                 summary_path,
-                db_manager=self.db_manager  # 传递数据库管理器
+                db_manager=db_manager  # 传递数据库管理器
             )
             print(f"\n已生成汇总报告: {summary_path}")
         else:
@@ -306,7 +379,9 @@ class SupplierEvaluationSystem:
             property_excel = os.path.join(self.config.DATA_DIR, 'property_evaluation.xlsx')
             functional_excel = os.path.join(self.config.DATA_DIR, 'functional_evaluation.xlsx')
 
-            if os.path.exists(property_excel) or os.path.exists(functional_excel):
+            if Config.DIRECTORY_IMPORT:
+                self.import_data_directory(self.config.DATA_DIR)
+            elif os.path.exists(property_excel) or os.path.exists(functional_excel):
                 self.import_excel_data(property_excel, functional_excel)
             service_info_excel = os.path.join(self.config.DATA_DIR, '绿化外包供应商服务情况一览表.xlsx')
             if os.path.exists(service_info_excel):
@@ -325,6 +400,29 @@ class SupplierEvaluationSystem:
         print(f"报告输出目录: {self.config.REPORTS_DIR}")
         print(f"图表输出目录: {self.config.CHARTS_DIR}")
 
+    def explain_queries(self):
+        """输出每条查询的执行计划，标记全表扫描"""
+        print("\n=== 查询执行计划 ===")
+        full_scans = 0
+        for label, plan in self.db_manager.explain_queries():
+            print(f"\n{label}:")
+            # 视图/子查询以协程方式展开时，SCAN 的是其已过滤的结果，不算全表扫描
+            coroutines = {detail.split()[-1] for detail in plan if detail.startswith('CO-ROUTINE')}
+            for detail in plan:
+                # SCAN 且未使用索引即为全表扫描
+                is_full_scan = detail.startswith('SCAN') and 'USING' not in detail \
+                    and detail.split()[1] not in coroutines
+                full_scans += is_full_scan
+                print(f"  {detail}{'  <-- 全表扫描' if is_full_scan else ''}")
+        print(f"\n共 {full_scans} 处全表扫描")
+
+    def print_rankings(self, limit: Optional[int] = None):
+        """输出当前供应商排行榜（由增量评分器按评估记录累加计算，REPORT_CYCLE 指定评估周期）"""
+        scorer = IncrementalScorer(self.score_calculator).load(self.db_manager, cycle=Config.REPORT_CYCLE)
+        print("\n=== 供应商排行榜 ===")
+        for supplier, score, rank in scorer.rankings(limit):
+            print(f"  {rank:>3}. {supplier}  {score:.2f}  {self.score_calculator.get_score_level(score)}")
+
     def test_database_content(self):
         """测试数据库内容"""
         print("\n=== 测试数据库内容 ===")
@@ -334,12 +432,7 @@ class SupplierEvaluationSystem:
             cursor = conn.cursor()
 
             # 查询所有评估记录
-            cursor.execute('''
-                SELECT e.*, s.name as supplier_name
-                FROM evaluations e
-                JOIN suppliers s ON e.supplier_id = s.id
-                ORDER BY s.name, e.evaluation_type
-            ''')
+            cursor.execute(queries.EVALUATIONS_BY_SUPPLIER_AND_TYPE)
 
             all_records = cursor.fetchall()
             print(f"\n数据库中总评估记录数: {len(all_records)}")
@@ -366,11 +459,7 @@ class SupplierEvaluationSystem:
                 test_supplier = list(supplier_stats.keys())[0]
                 print(f"\n查看 {test_supplier} 的详细评估数据:")
 
-                cursor.execute('''
-                    SELECT * FROM evaluations e
-                    JOIN suppliers s ON e.supplier_id = s.id
-                    WHERE s.name = ?
-                ''', (test_supplier,))
+                cursor.execute(queries.EVALUATIONS_BY_SUPPLIER_NAME, (test_supplier,))
 
                 for i, record in enumerate(cursor.fetchall()):
                     print(f"\n  记录 {i+1}:")
@@ -380,7 +469,7 @@ class SupplierEvaluationSystem:
 
                     # 解析scores
                     try:
-                        scores = json.loads(record['scores'])
+                        scores = decode_scores(record['scores'])
                         print(f"    评分数: {len(scores)}")
                         if scores:
                             print(f"    评分示例: {list(scores.items())[:3]}")
@@ -390,13 +479,57 @@ class SupplierEvaluationSystem:
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description=Config.REPORT_TITLE)
+    subparsers = parser.add_subparsers(dest='command')
+    cache_parser = subparsers.add_parser('invalidate-cache', help='清除Excel解析缓存')
+    cache_parser.add_argument('files', nargs='*', help='要清除缓存的Excel文件（默认清除全部）')
+    subparsers.add_parser('explain-queries', help='输出系统查询的执行计划')
+    subparsers.add_parser('rebuild-stats', help='由评估记录重建维度汇总表')
+    rankings_parser = subparsers.add_parser('rankings', help='输出当前供应商排行榜')
+    rankings_parser.add_argument('--limit', type=int, default=None, help='只输出前N名')
+    json_parser = subparsers.add_parser('import-json', help='按问卷结构导入JSON/JSONL答卷')
+    json_parser.add_argument('questionnaire', help='问卷结构JSON文件')
+    json_parser.add_argument('responses', help='答卷JSON/JSONL文件')
+    args = parser.parse_args()
+    logging.basicConfig(level=Config.LOG_LEVEL, format='%(message)s')
+
+    system = None
     try:
+        if args.command == 'invalidate-cache':
+            removed = ParseCache().invalidate(args.files)
+            print(f"已清除 {removed} 条解析缓存")
+            return
+
+        if args.command == 'import-json':
+            system = SupplierEvaluationSystem()
+            system.import_json_responses(args.questionnaire, args.responses)
+            return
+
+        if args.command == 'rebuild-stats':
+            system = SupplierEvaluationSystem()
+            system.db_manager.rebuild_dimension_stats()
+            print("维度汇总表重建完成")
+            return
+
+        if args.command == 'rankings':
+            system = SupplierEvaluationSystem()
+            system.print_rankings(args.limit)
+            return
+
+        if args.command == 'explain-queries':
+            system = SupplierEvaluationSystem()
+            system.explain_queries()
+            return
+
         system = SupplierEvaluationSystem()
         system.run()
     except Exception as e:
         print(f"\n错误: {str(e)}")
         import traceback
         traceback.print_exc()
+    finally:
+        if system is not None:
+            system.db_manager.close()
 
 if __name__ == "__main__":
     main()
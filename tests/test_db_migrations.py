@@ -0,0 +1,63 @@
+"""数据库结构迁移测试"""
+import sqlite3
+
+import pytest
+
+from database import db_manager as db_module
+from database.db_manager import DatabaseManager, SCHEMA_MIGRATIONS
+
+
+def _columns(path):
+    with sqlite3.connect(path) as conn:
+        return {row[1] for row in conn.execute("PRAGMA table_info(evaluations)")}
+
+
+def _user_version(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def test_failed_migration_rolls_back_and_retries(tmp_path, monkeypatch):
+    path = str(tmp_path / 'evaluations.db')
+
+    # 升级到版本4的旧数据库
+    monkeypatch.setattr(db_module, 'SCHEMA_MIGRATIONS', SCHEMA_MIGRATIONS[:4])
+    DatabaseManager(path).close()
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO suppliers (name) VALUES ('供应商A')")
+        conn.execute('''
+            INSERT INTO evaluations (supplier_id, evaluator_name, evaluation_type, scores, feedback)
+            VALUES (1, '评估人', 'property', '{"项目规模": "C.大型", "dim1_1": 4}', '{}')
+        ''')
+    assert _user_version(path) == 4
+
+    # 版本5的回填失败：已添加的列随事务回滚，版本号不变
+    monkeypatch.setattr(db_module, 'SCHEMA_MIGRATIONS', SCHEMA_MIGRATIONS)
+
+    def fail_backfill(self, cursor=None):
+        raise sqlite3.OperationalError('backfill failed')
+
+    monkeypatch.setattr(DatabaseManager, 'backfill_evaluation_attributes', fail_backfill)
+    with pytest.raises(sqlite3.OperationalError, match='backfill failed'):
+        DatabaseManager(path)
+    assert _user_version(path) == 4
+    assert 'project_scale' not in _columns(path)
+
+    # 重新启动时重新执行版本5
+    monkeypatch.undo()
+    DatabaseManager(path).close()
+    assert _user_version(path) == SCHEMA_MIGRATIONS[-1][0]
+    assert 'project_scale' in _columns(path)
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT project_scale FROM evaluations").fetchone()[0] == 'C'
+
+
+def test_supplier_view_filter_uses_supplier_index(tmp_path):
+    path = str(tmp_path / 'evaluations.db')
+    DatabaseManager(path).close()
+    with sqlite3.connect(path) as conn:
+        plan = [row[3] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM supplier_dimension_means WHERE supplier_id = ?", (1,)
+        )]
+    assert any(detail.startswith('SEARCH e USING') and 'idx_evaluations_supplier_type' in detail
+               for detail in plan), plan
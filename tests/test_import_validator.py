@@ -0,0 +1,64 @@
+"""导入校验与隔离测试"""
+import pandas as pd
+import pytest
+
+from data_processing.import_validator import ImportValidator
+from data_processing.questionnaire_schema import PROPERTY_SCORE_COLUMNS
+from utils.config import Config
+
+SCORE_COLUMN = PROPERTY_SCORE_COLUMNS['dim1_1']
+
+
+@pytest.fixture
+def validator(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'QUARANTINE_DIR', str(tmp_path))
+    monkeypatch.setattr(Config, 'REJECT_DUPLICATE_RESPONSES', True)
+    return ImportValidator('survey.xlsx', 'property')
+
+
+def _frame(rows):
+    return pd.DataFrame(rows, columns=['绿化外包供应商', '手机号码', SCORE_COLUMN])
+
+
+def test_rejected_row_does_not_claim_duplicate_key(validator):
+    df = _frame([
+        ['供应商A', '13800000000', 9],
+        ['供应商A', '13800000000', 4],
+    ])
+
+    passed = validator.validate(df)
+
+    assert passed.index.tolist() == [1]
+    assert validator.rejected_count == 1
+    quarantined = pd.read_csv(validator.quarantine_path, encoding='utf-8-sig')
+    assert quarantined['源文件行号'].tolist() == [2]
+    assert '重复作答' not in quarantined['拒绝原因'][0]
+
+
+def test_duplicates_rejected_across_chunks(validator):
+    first = validator.validate(_frame([['供应商A', '13800000000', 4], ['供应商A', '13800000000', 5]]))
+    second = validator.validate(_frame([['供应商A', '13800000000', 3], ['供应商B', '13800000000', 3]]))
+
+    assert first.index.tolist() == [0]
+    assert second['绿化外包供应商'].tolist() == ['供应商B']
+    assert validator.rejected_count == 2
+
+
+def test_repeat_evaluations_kept_by_default(validator, monkeypatch):
+    monkeypatch.setattr(Config, 'REJECT_DUPLICATE_RESPONSES', False)
+
+    passed = validator.validate(_frame([['供应商A', '13800000000', 4], ['供应商A', '13800000000', 5]]))
+
+    assert len(passed) == 2
+    assert validator.quarantine_path is None
+
+
+def test_same_named_sources_get_separate_quarantine_files(validator):
+    other = ImportValidator('other/survey.xlsx', 'property')
+
+    validator.validate(_frame([['', '13800000000', 4]]))
+    other.validate(_frame([['', '13900000000', 4], ['', '13700000000', 5]]))
+
+    assert validator.quarantine_path != other.quarantine_path
+    assert len(pd.read_csv(validator.quarantine_path, encoding='utf-8-sig')) == 1
+    assert len(pd.read_csv(other.quarantine_path, encoding='utf-8-sig')) == 2
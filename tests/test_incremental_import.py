@@ -0,0 +1,71 @@
+"""增量导入测试：源数据行标识稳定，未变化的文件不重复解析"""
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from data_processing import directory_importer, excel_processor
+from data_processing.directory_importer import DirectoryImporter
+from data_processing.excel_processor import ExcelProcessor
+from data_processing.questionnaire_schema import PROPERTY_SCORE_COLUMNS
+from database.db_manager import DatabaseManager
+from utils.config import Config
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'QUARANTINE_DIR', str(tmp_path / 'quarantine'))
+    monkeypatch.setattr(Config, 'PARSE_CACHE', False)
+    monkeypatch.setattr(Config, 'INCREMENTAL_IMPORT', True)
+    db_manager = DatabaseManager(str(tmp_path / 'evaluations.db'))
+    db_manager.init_database()
+    yield ExcelProcessor(db_manager)
+    db_manager.close()
+
+
+def _write_workbook(path, rows):
+    pd.DataFrame(rows, columns=['绿化外包供应商', '姓名', '手机号码', PROPERTY_SCORE_COLUMNS['dim1_1']]) \
+        .to_excel(path, index=False)
+    # 确保重写后的文件指纹（修改时间）变化
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 1))
+
+
+def _evaluation_count(processor):
+    with sqlite3.connect(processor.db_manager.db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+
+
+@pytest.mark.parametrize('import_mode', ['BULK', 'STREAM'])
+def test_blank_phone_does_not_change_existing_row_keys(processor, tmp_path, monkeypatch, import_mode):
+    monkeypatch.setattr(Config, 'IMPORT_MODE', import_mode)
+    path = str(tmp_path / 'property.xlsx')
+    rows = [['供应商A', f'评估人{i}', 13800000000 + i, 4] for i in range(20)]
+
+    _write_workbook(path, rows)
+    assert processor.bulk_import_excel(path, 'property') == 20
+
+    # 追加一行空手机号：手机号列被读成 float64
+    _write_workbook(path, rows + [['供应商A', '评估人X', None, 5]])
+    assert processor.bulk_import_excel(path, 'property') == 1
+    assert _evaluation_count(processor) == 21
+
+    with sqlite3.connect(processor.db_manager.db_path) as conn:
+        phones = {row[0] for row in conn.execute("SELECT evaluator_phone FROM evaluations")}
+    assert '13800000000' in phones and '' in phones
+
+
+def test_unrecognised_workbook_not_parsed_again(processor, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'IMPORT_MODE', 'BULK')
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    pd.DataFrame([['供应商A', 3]], columns=['供应商名称', '项目数量']).to_excel(data_dir / 'service_info.xlsx', index=False)
+    importer = DirectoryImporter(processor)
+    assert importer.import_directory(str(data_dir), max_workers=1) == 0
+
+    calls = []
+    monkeypatch.setattr(directory_importer, 'parse_workbook', calls.append)
+    monkeypatch.setattr(excel_processor, 'file_content_hash', calls.append)
+    assert importer.import_directory(str(data_dir), max_workers=1) == 0
+    assert calls == []
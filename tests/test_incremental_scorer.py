@@ -0,0 +1,80 @@
+"""增量评分测试：逐条加入评估后的得分与排名和整体计算一致"""
+import random
+
+import pytest
+
+from data_processing.incremental_scorer import IncrementalScorer
+from data_processing.score_calculator import ScoreCalculator
+from test_score_calculator import random_evaluations
+
+
+def _assert_scores_close(actual, expected):
+    assert actual['total_score'] == pytest.approx(expected['total_score'], rel=1e-9)
+    assert actual['property_score'] == pytest.approx(expected['property_score'], rel=1e-9)
+    assert actual['functional_score'] == pytest.approx(expected['functional_score'], rel=1e-9)
+    assert actual['level'] == expected['level']
+    for eval_type in ('property', 'functional'):
+        actual_dimensions = dict(actual['dimension_scores'][eval_type])
+        expected_dimensions = dict(expected['dimension_scores'][eval_type])
+        actual_adjustment = actual_dimensions.pop('_sample_adjustment', None)
+        expected_adjustment = expected_dimensions.pop('_sample_adjustment', None)
+        assert actual_dimensions == pytest.approx(expected_dimensions, rel=1e-9)
+        assert (actual_adjustment is None) == (expected_adjustment is None)
+        if expected_adjustment is not None:
+            assert actual_adjustment['factor'] == pytest.approx(expected_adjustment['factor'], rel=1e-9)
+            assert actual_adjustment['sample_size'] == expected_adjustment['sample_size']
+    assert actual['dimension_scores']['sample_info'] == expected['dimension_scores']['sample_info']
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_one_at_a_time_matches_score_all(seed):
+    rng = random.Random(seed)
+    calculator = ScoreCalculator()
+    evaluations_by_supplier = {
+        f'供应商{i}': random_evaluations(rng, rng.randint(0, 12), rng.randint(0, 12)) for i in range(10)
+    }
+    evaluations_by_supplier = {supplier: evaluations for supplier, evaluations in evaluations_by_supplier.items()
+                               if evaluations}
+    # 评估按随机顺序到达，不同供应商交错
+    arrivals = [(supplier, evaluation) for supplier, evaluations in evaluations_by_supplier.items()
+                for evaluation in evaluations]
+    rng.shuffle(arrivals)
+
+    scorer = IncrementalScorer(calculator)
+    seen = {}
+    for supplier, evaluation in arrivals:
+        seen.setdefault(supplier, []).append(evaluation)
+        updated = scorer.add_evaluation(supplier, evaluation)
+        _assert_scores_close(updated, calculator.score_all({supplier: seen[supplier]})[supplier])
+
+    expected = calculator.score_all(seen)
+    for supplier, score in expected.items():
+        _assert_scores_close(scorer.supplier_score(supplier), score)
+
+    # seen 按供应商首次出现的顺序排列，同分时的先后与排行榜一致
+    expected_rankings = calculator.rank_suppliers({supplier: score['total_score'] for supplier, score in expected.items()})
+    rankings = scorer.rankings()
+    assert [(supplier, rank) for supplier, _, rank in rankings] == \
+           [(supplier, rank) for supplier, _, rank in expected_rankings]
+    for supplier, _, rank in expected_rankings:
+        assert scorer.rank(supplier) == rank
+    assert scorer.rankings(limit=3) == rankings[:3]
+
+
+def test_add_records_refreshes_each_supplier_once():
+    rng = random.Random(0)
+    calculator = ScoreCalculator()
+    evaluations = random_evaluations(rng, 6, 6)
+    records = [dict(evaluation, supplier_name='供应商A' if i % 2 else '供应商B')
+               for i, evaluation in enumerate(evaluations)]
+
+    scorer = IncrementalScorer(calculator)
+    scorer.add_records(records)
+
+    expected = calculator.score_all({
+        '供应商B': evaluations[0::2],
+        '供应商A': evaluations[1::2]
+    })
+    for supplier, score in expected.items():
+        _assert_scores_close(scorer.supplier_score(supplier), score)
+    assert scorer.rank('不存在') is None
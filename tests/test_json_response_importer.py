@@ -0,0 +1,52 @@
+"""问卷平台JSON答卷增量解析测试"""
+import itertools
+import json
+
+from data_processing.json_response_importer import iter_json_records
+
+
+def _responses(count):
+    return [
+        {'id': i, 'answers': {'q1': i % 10, 'q2': '意见' * (i % 7)}, 'submit_time': '2024-05-01', 'score': 1234.5678}
+        for i in range(count)
+    ]
+
+
+def _write(tmp_path, text):
+    path = tmp_path / 'responses.json'
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_wrapper_larger_than_block_size(tmp_path):
+    responses = _responses(500)
+    text = json.dumps({'code': 0, 'data': responses, 'msg': 'ok'}, ensure_ascii=False, indent=2)
+    path = _write(tmp_path, text)
+    assert len(text) > 100 * 256
+
+    assert list(iter_json_records(path, block_size=256)) == responses
+
+
+def test_wrapper_elements_stream_before_object_ends(tmp_path):
+    responses = _responses(500)
+    text = json.dumps({'total': 500, 'data': responses}, ensure_ascii=False)
+    # 截断文件：包装对象无法整体解析，但前面的答卷应已逐条产出
+    path = _write(tmp_path, text[:len(text) // 2])
+
+    assert list(itertools.islice(iter_json_records(path, block_size=256), 10)) == responses[:10]
+
+
+def test_jsonl_and_array(tmp_path):
+    responses = _responses(50)
+    jsonl = _write(tmp_path, '\n'.join(json.dumps(response, ensure_ascii=False) for response in responses))
+    assert list(iter_json_records(jsonl, block_size=16)) == responses
+
+    array = _write(tmp_path, json.dumps(responses, ensure_ascii=False))
+    assert list(iter_json_records(array, block_size=16)) == responses
+
+
+def test_object_with_answers_is_single_response(tmp_path):
+    response = {'answers': {'q1': 5}, 'data': [1, 2, 3]}
+    path = _write(tmp_path, json.dumps(response))
+
+    assert list(iter_json_records(path, block_size=4)) == [response]
@@ -0,0 +1,72 @@
+"""查询清单测试：系统实际执行的查询都在 QUERY_CATALOG 中"""
+import re
+
+from database.db_manager import DatabaseManager
+from database.queries import QUERY_CATALOG
+
+
+def _normalize(sql):
+    """去掉字面值和空白差异，IN 列表按单个参数比较"""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r"\b\d+(?:\.\d+)?\b", '?', sql)
+    sql = re.sub(r"\?(?:\s*,\s*\?)+", '?', sql)
+    return ' '.join(sql.split())
+
+
+def _record(supplier, evaluator, value):
+    return {
+        'supplier_name': supplier,
+        'service_area': '市内',
+        'evaluator_name': evaluator,
+        'evaluator_dept': '部门',
+        'evaluator_phone': '13800000000',
+        'evaluation_type': 'property',
+        'evaluation_date': '2024-05-01 00:00:00',
+        'scores': {'dim1_1': value},
+        'feedback': {'positive_description': '好'},
+        'row_key': f"{supplier}|{evaluator}#1",
+        'content_hash': str(value)
+    }
+
+
+def test_executed_queries_are_catalogued(tmp_path, monkeypatch):
+    statements = []
+    original = DatabaseManager._get_connection
+
+    def traced_connection(self):
+        conn = original(self)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(DatabaseManager, '_get_connection', traced_connection)
+    manager = DatabaseManager(str(tmp_path / 'evaluations.db'))
+    try:
+        source_file = str(tmp_path / 'evaluations.xlsx')
+        manager.store_evaluations_async([_record('供应商A', '张三', 4), _record('供应商B', '李四', 5)],
+                                        source_file).result()
+        # 内容变化的行替换原评估记录
+        manager.store_evaluations_async([_record('供应商A', '张三', 3)], source_file).result()
+        manager.store_evaluations_async([_record('供应商C', '王五', 4)]).result()
+        manager.upsert_supplier_services([{'supplier_name': '供应商A', 'project_count': 1,
+                                           'project_names': '项目', 'project_ratio': 0.5, 'remarks': ''}])
+        manager.get_imported_file(source_file)
+
+        for cycle in (None, '2024'):
+            manager.get_all_suppliers(cycle)
+            manager.get_suppliers_by_area('市内', cycle)
+            manager.get_supplier_evaluations('供应商A', cycle)
+            manager.get_all_dimension_stats(cycle)
+            for with_scores in (True, False):
+                for names in (None, ['供应商A']):
+                    list(manager.iter_supplier_evaluations(names, cycle=cycle, with_scores=with_scores))
+        manager.get_cycles()
+        manager.get_supplier_service_info('供应商A')
+        manager.get_all_supplier_services()
+        manager.rebuild_dimension_stats()
+        manager.backfill_evaluation_attributes()
+    finally:
+        manager.close()
+
+    catalogued = {_normalize(sql) for _, sql, _ in QUERY_CATALOG}
+    executed = {_normalize(sql) for sql in statements if sql.lstrip().upper().startswith('SELECT')}
+    assert executed - catalogued == set()
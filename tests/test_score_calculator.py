@@ -0,0 +1,138 @@
+"""评分计算器测试：矩阵计算、一次性批量计算与逐条计算的结果一致"""
+import random
+
+import pytest
+
+from data_processing.score_calculator import ScoreCalculator
+from database.db_manager import DatabaseManager
+from database.evaluation_stats import evaluation_attributes
+from database.score_codec import LAYOUT_BY_TYPE, SCORE_LAYOUTS
+from utils.config import Config
+
+SCALE_ANSWERS = ['A.小型', 'B.中型', 'C.大型', '大型项目', 'c', '其他']
+COMPLEXITY_ANSWERS = ['A.低', 'B.中', 'C.高', '高复杂度', 'b', '']
+RENTAL_ANSWERS = ['A.是', 'B.否', '是', '否']
+CASES = ['', 'b) 服务响应类,a) 轻微影响', 'a) 专业技术类（如解决复杂植物问题）,c) 显著影响', '无', 'd) 严重影响']
+
+
+def _random_score(rng):
+    roll = rng.random()
+    if roll < 0.05:
+        return None
+    if roll < 0.08:
+        return '未作答'
+    return rng.choice([1, 2, 3, 4, 5, 3.5, '4'])
+
+
+def _property_evaluation(rng):
+    scores = {}
+    for dim_num in range(1, 9):
+        for item in range(1, rng.randint(1, 10) + 1):
+            if rng.random() < 0.9:
+                scores[f'dim{dim_num}_{item}'] = _random_score(rng)
+    if rng.random() < 0.8:
+        scores['您的项目整体绿化预算/规模属于：'] = rng.choice(SCALE_ANSWERS)
+    if rng.random() < 0.8:
+        scores['您所负责项目的绿化复杂度属于：'] = rng.choice(COMPLEXITY_ANSWERS)
+    if rng.random() < 0.7:
+        scores['贵项目是否包含绿化租摆服务？'] = rng.choice(RENTAL_ANSWERS)
+    feedback = {'positive_case': rng.choice(CASES), 'negative_case': rng.choice(CASES)}
+
+    evaluation = {'evaluation_type': 'property', 'evaluator_name': '评估人', 'scores': scores, 'feedback': feedback}
+    if rng.random() < 0.5:
+        # 从数据库读出的记录带有导入时写入的派生属性
+        evaluation.update(evaluation_attributes('property', scores, feedback))
+    return evaluation
+
+
+def _functional_evaluation(rng):
+    scores = {}
+    for dim_num in rng.sample(range(1, 9), rng.randint(1, 8)):
+        for item in range(1, rng.randint(1, 10) + 1):
+            scores[f'dim{dim_num}_{item}'] = rng.choice([1, 2, 3, 4, 5, 2.5])
+    return {'evaluation_type': 'functional', 'evaluator_name': '评估人', 'scores': scores, 'feedback': {}}
+
+
+def random_evaluations(rng, property_count, functional_count):
+    evaluations = [_property_evaluation(rng) for _ in range(property_count)]
+    evaluations += [_functional_evaluation(rng) for _ in range(functional_count)]
+    rng.shuffle(evaluations)
+    return evaluations
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_vector_engine_matches_loop(seed, monkeypatch):
+    rng = random.Random(seed)
+    calculator = ScoreCalculator()
+    evaluations = random_evaluations(rng, rng.randint(0, 40), rng.randint(0, 40))
+
+    monkeypatch.setattr(Config, 'SCORING_ENGINE', 'LOOP')
+    expected = calculator.calculate_dimension_scores(evaluations)
+    monkeypatch.setattr(Config, 'SCORING_ENGINE', 'VECTOR')
+    actual = calculator.calculate_dimension_scores(evaluations)
+
+    assert actual == expected
+    assert list(actual['property']) == list(expected['property'])
+    assert list(actual['functional']) == list(expected['functional'])
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_score_all_matches_per_supplier_scoring(seed):
+    rng = random.Random(seed)
+    calculator = ScoreCalculator()
+    evaluations_by_supplier = {
+        f'供应商{i}': random_evaluations(rng, rng.randint(1, 15), rng.randint(1, 15)) for i in range(8)
+    }
+    # 只有一种评估类型、只有一条评估的供应商
+    evaluations_by_supplier['只有物管处'] = random_evaluations(rng, 5, 0)
+    evaluations_by_supplier['只有职能部门'] = random_evaluations(rng, 0, 5)
+    evaluations_by_supplier['单条物管处'] = random_evaluations(rng, 1, 0)
+    evaluations_by_supplier['单条职能部门'] = random_evaluations(rng, 0, 1)
+
+    results = calculator.score_all(evaluations_by_supplier)
+
+    assert list(results) == list(evaluations_by_supplier)
+    for supplier, evaluations in evaluations_by_supplier.items():
+        dimension_scores = calculator.calculate_dimension_scores(evaluations)
+        total_score = calculator.calculate_weighted_score(dimension_scores)
+        result = results[supplier]
+
+        assert result['dimension_scores'] == dimension_scores
+        assert result['total_score'] == total_score
+        assert result['property_score'] == calculator.calculate_type_score(dimension_scores['property'], 'property')
+        assert result['functional_score'] == calculator.calculate_type_score(
+            dimension_scores['functional'], 'functional')
+        assert result['level'] == calculator.get_score_level(total_score)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_packed_records_score_like_decoded_dicts(seed, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'SCORE_ENCODING', 'PACKED')
+    rng = random.Random(seed)
+    records = []
+    for _ in range(30):
+        evaluation_type = rng.choice(['property', 'functional'])
+        items = SCORE_LAYOUTS[LAYOUT_BY_TYPE[evaluation_type]]
+        scores = {item: rng.randint(1, 5) for item in items if rng.random() < 0.8}
+        if rng.random() < 0.3:
+            # 非整数评分无法打包，退回 JSON 文本
+            scores[rng.choice(items)] = 2.5
+        records.append({
+            'supplier_name': f'供应商{rng.randint(1, 3)}', 'service_area': '市内',
+            'evaluator_name': '评估人', 'evaluator_dept': '部门', 'evaluator_phone': '',
+            'evaluation_type': evaluation_type, 'evaluation_date': '2024-05-01 00:00:00',
+            'scores': scores,
+            'feedback': {'positive_case': rng.choice(CASES)}
+        })
+    manager = DatabaseManager(str(tmp_path / 'evaluations.db'))
+    try:
+        manager.store_evaluations_async(records).result()
+        packed = dict(manager.iter_supplier_evaluations())
+    finally:
+        manager.close()
+
+    encodings = {evaluation.packed_scores() is None for evaluations in packed.values() for evaluation in evaluations}
+    assert encodings == {True, False}
+    decoded = {supplier: [evaluation.to_dict() for evaluation in evaluations] for supplier, evaluations in packed.items()}
+    calculator = ScoreCalculator()
+    assert calculator.score_all(packed) == calculator.score_all(decoded)
@@ -0,0 +1,66 @@
+"""供应商目录缓存测试：未提交事务内的变化对其他线程不可见"""
+import sqlite3
+import threading
+
+import pytest
+
+from database.supplier_directory import SupplierDirectory
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:', isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE suppliers (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE, service_area TEXT)")
+    conn.execute("INSERT INTO suppliers (name, service_area) VALUES ('供应商A', '市内')")
+    yield conn
+    conn.close()
+
+
+def _lookup_from_other_thread(directory, name, service_area=None):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(directory.lookup(name, service_area)))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_new_supplier_visible_only_after_publish(conn):
+    directory = SupplierDirectory()
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    ids = directory.resolve_many(cursor, {'供应商A': '市内', '供应商B': '市外'})
+
+    # 事务内的写操作能看到新增的供应商，其他线程看不到
+    assert directory.resolve_many(cursor, {'供应商B': '市外'}) == {'供应商B': ids['供应商B']}
+    assert _lookup_from_other_thread(directory, '供应商B') is None
+    assert _lookup_from_other_thread(directory, '供应商A') is None
+
+    conn.commit()
+    directory.publish()
+    assert _lookup_from_other_thread(directory, '供应商A', '市内') == ids['供应商A']
+    assert _lookup_from_other_thread(directory, '供应商B', '市外') == ids['供应商B']
+
+
+def test_rolled_back_supplier_never_published(conn):
+    directory = SupplierDirectory()
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    directory.resolve_many(cursor, {'供应商A': '市内'})
+    conn.commit()
+    directory.publish()
+
+    cursor.execute("BEGIN IMMEDIATE")
+    directory.resolve_many(cursor, {'供应商B': '市外', '供应商A': '市外'})
+    assert _lookup_from_other_thread(directory, '供应商B') is None
+    assert _lookup_from_other_thread(directory, '供应商A', '市内') is not None
+    conn.rollback()
+    directory.invalidate()
+
+    assert _lookup_from_other_thread(directory, '供应商B') is None
+    cursor.execute("BEGIN IMMEDIATE")
+    assert directory.get_id(cursor, '供应商B') is None
+    assert directory.resolve_many(cursor, {'供应商A': '市内'})['供应商A'] == 1
+    conn.commit()
+    directory.publish()
+    assert _lookup_from_other_thread(directory, '供应商A', '市内') == 1
@@ -4,15 +4,36 @@ import os
 class Config:
     # 数据库配置
     DATABASE_PATH = 'supplier_evaluation.db'
+    # SQLite 页缓存大小（KB）
+    SQLITE_CACHE_SIZE_KB = 64 * 1024
+    # SQLite 内存映射读取大小（字节，0 表示不使用）
+    SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+    # SQLite 等待数据库锁的超时时间（秒），超时后才报 database is locked
+    SQLITE_BUSY_TIMEOUT = 30.0
+    # 是否由专用写线程统一写库（排队中的写操作合并为一个事务提交，读操作在 WAL 下不受写入阻塞）
+    WRITE_QUEUE = True
+    # 写线程单个事务最多合并的写操作数
+    WRITE_BATCH_SIZE = 64
+    # 写线程合并写操作时等待后续写操作的时间（秒，0 表示只合并已在排队的写操作）
+    WRITE_BATCH_DELAY = 0.0
+    # 最多排队的写操作数（写库跟不上时提交方等待）
+    WRITE_QUEUE_MAX_PENDING = 8
+    # 生成报告时是否先复制数据库快照（整个生成过程读取同一份只读快照，不受同时进行的导入影响）
+    REPORT_SNAPSHOT = True
+    # 快照文件目录（None 表示系统临时目录）
+    SNAPSHOT_DIR = None
 
     # 文件路径配置
     DATA_DIR = 'data'
     OUTPUT_DIR = 'output'
     CHARTS_DIR = os.path.join(OUTPUT_DIR, 'charts')
     REPORTS_DIR = os.path.join(OUTPUT_DIR, 'reports')
+    PARSE_CACHE_DIR = os.path.join(OUTPUT_DIR, 'cache')
+    QUARANTINE_DIR = os.path.join(OUTPUT_DIR, 'quarantine')
+    SCORE_TRACE_DIR = os.path.join(OUTPUT_DIR, 'traces')
 
     # 确保目录存在
-    for dir_path in [DATA_DIR, OUTPUT_DIR, CHARTS_DIR, REPORTS_DIR]:
+    for dir_path in [DATA_DIR, OUTPUT_DIR, CHARTS_DIR, REPORTS_DIR, PARSE_CACHE_DIR, QUARANTINE_DIR, SCORE_TRACE_DIR]:
         os.makedirs(dir_path, exist_ok=True)
 
     # 评估权重配置
@@ -98,10 +119,81 @@ class Config:
         'max_penalty': 0.2,
         'max_bonus': 0.15,
     }
+    # 日志级别（DEBUG 时输出逐条评估记录等调试信息）
+    LOG_LEVEL = 'INFO'
     # 是否启用LLM
     ENABLE_LLM = False
     # 是否导入数据
     IMPORT_DATA = False
+    # 导入模式
+    """
+    ROW 逐行导入（每行单独写库）
+    BULK 批量导入（整表按列处理，单事务写库）
+    STREAM 流式导入（只读模式逐行读取，按固定行数分块批量写库，内存占用恒定）
+    """
+    IMPORT_MODE = 'BULK'
+    # 流式导入每个数据块的行数
+    IMPORT_CHUNK_SIZE = 5000
+    # 是否缓存Excel解析结果（按文件指纹缓存，整表读取时生效）
+    # 默认缓存为 pickle；安装 pyarrow（可选，不在 requirements.txt 中）后列类型一致的表缓存为 Parquet，
+    # 含混合类型列（如手机号、夹杂数字的文本题）的表仍为 pickle
+    PARSE_CACHE = True
+    # 是否增量导入（按文件指纹跳过未变化文件，按行内容哈希只写入新增或变化的行）
+    INCREMENTAL_IMPORT = True
+    # 是否按目录导入（自动识别 DATA_DIR 下全部评估工作簿，多进程解析、单进程写库）
+    DIRECTORY_IMPORT = False
+    # 目录导入的文件匹配模式（相对 DATA_DIR，支持 ** 递归）
+    DIRECTORY_IMPORT_PATTERN = '**/*.xlsx'
+    # 目录导入的解析进程数（None 表示使用全部CPU核数）
+    IMPORT_WORKERS = None
+    # 是否在批量导入前校验数据（不合格的行写入 QUARANTINE_DIR 下的隔离文件，不入库）
+    VALIDATE_IMPORTS = True
+    # 校验时是否拒绝重复作答（同一手机号对同一供应商只保留首次出现的有效行）
+    """
+    False 不拒绝（默认）：同一评估人对同一供应商的多次评价都会导入，按出现顺序
+          区分为第N次评价（增量导入的源数据行标识），例如跨评估周期的复评
+    True 只保留首次作答，其余行写入隔离文件
+    """
+    REJECT_DUPLICATE_RESPONSES = False
+    # 有效评分范围（含两端）
+    SCORE_RANGE = (1, 5)
+    # 评分存储编码
+    """
+    JSON 以JSON文本存储（默认）
+    PACKED 按问卷评分项顺序打包为字节数组（每项1字节），无法打包的记录自动退回JSON
+    """
+    SCORE_ENCODING = 'JSON'
+    # 维度得分来源
+    """
+    EVALUATIONS 逐条评估记录计算（默认；需要每条记录的计算过程时配置 SCORE_TRACE）
+    STATS 由维度汇总表 supplier_dimension_stats 直接计算（修改评分权重配置后需执行 rebuild-stats），
+          计算量与评估条数无关；报告仍需逐条读取评估的反馈（词云、意见汇总），但不读取和解码评分字段
+    """
+    DIMENSION_SCORE_SOURCE = 'EVALUATIONS'
+    # 逐条评估记录计算维度得分时使用的计算引擎
+    """
+    VECTOR 矩阵计算（默认），结果与 LOOP 一致
+    LOOP 逐条循环计算
+    记录评分过程的供应商（SCORE_TRACE）总是逐条计算
+    """
+    SCORING_ENGINE = 'VECTOR'
+    # 记录评分过程（每条评估的项目信息、维度得分、反馈调整、样本量调整和加权过程）的供应商
+    """
+    None 不记录（默认，评分过程不产生任何输出开销）
+    'ALL' 记录全部供应商
+    ['供应商A', ...] 只记录列出的供应商
+    """
+    SCORE_TRACE = None
+    # 评分过程的输出格式
+    """
+    TEXT 输出到控制台
+    JSON 写入 SCORE_TRACE_DIR 下的 {供应商}_评分过程.json
+    """
+    SCORE_TRACE_FORMAT = 'TEXT'
+    # 导入评估记录所属的评估周期（None 表示按评估日期所在年份自动归入年度周期，如 '2024'）
+    EVALUATION_CYCLE = None
+    # 生成报告的评估周期（None 表示使用全部历史记录）
+    REPORT_CYCLE = None
     # 报告生成模式
     """
     ALL 全部生成
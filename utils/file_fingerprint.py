@@ -0,0 +1,24 @@
+"""文件指纹工具"""
+import hashlib
+import os
+from typing import Dict
+
+
+def file_content_hash(file_path: str, block_size: int = 1 << 20) -> str:
+    """分块计算文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_fingerprint(file_path: str, with_hash: bool = True) -> Dict:
+    """获取文件指纹（路径、大小、修改时间，可选内容哈希）"""
+    stat = os.stat(file_path)
+    return {
+        'path': os.path.abspath(file_path),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'content_hash': file_content_hash(file_path) if with_hash else None
+    }